@@ -1,7 +1,11 @@
 # ----- Import libraries -----
 import numpy as np
-import matplotlib.pyplot as plt
-import pandas as pd
+
+from datasets import load_dataset
+from exact_phi import exact_phi_table
+from figures import render_all
+from localization import (considere_criterion, monotone_crossing, swift_major_strain, hill_major_strain,
+                          find_peak as find_localization, closest_value_finder as closest_eps_finder)
 
 # ----- Constants (material, geometry) -----
 elastic_modulus = 68e9
@@ -23,55 +27,29 @@ def cos2(value):
 def sin2(value):
     return np.sin(value) ** 2
 
-def considere_criterion(strain, stress):
-    # Take numerical derivative
-    derivative = np.gradient(stress, strain)
-
-    # Filter possible nan or inf when strain is zero
-    derivative[np.isnan(derivative)] = 10 ** 9
-    derivative[np.isinf(derivative)] = 10 ** 9
-
-    # Find localization point
-    absolute_difference = abs(stress - derivative)
-    minimum = np.min(absolute_difference)
-    minimum_location = list(absolute_difference).index(minimum)
-    localization_x = float(strain[minimum_location])
-    localization_y = float(stress[minimum_location])
-
-    return derivative, localization_x, localization_y
-
-def find_localization(force):
-    # Find peak force
-    peak_force = np.max(force)
-
-    # Find point of peak force
-    peak_location = list(force).index(peak_force)
+# A tuple of sections saves only those figures, e.g. ("stress_comparison", "localization_prediction")
+def selected(function, section):
+    return function == section or function == "save_all" or (isinstance(function, tuple) and section in function)
 
-    return peak_location
+def saving(function):
+    return function == "save_all" or isinstance(function, tuple)
 
 def save_analytical_figures(dimensions):
     alphas = [0.25, 0.375, 0.5, 0.75, 1.0, 1.25, 1.5, 2.0, 2.5, 3.0]
 
+    # Every alpha is rendered in its own worker process
     if dimensions == 3:
-        for alpha in alphas:
-            print(alpha)
-            three_dimensional_strain(alpha, "save_all")
+        render_all(tasks=[("AnalyticalTensionTorsion", "three_dimensional_strain", (alpha, "save_all"))
+                          for alpha in alphas])
     elif dimensions == 2:
-        for alpha in alphas:
-            print(alpha)
-            two_dimensional_strain(alpha, "save_all")
+        render_all(tasks=[("AnalyticalTensionTorsion", "two_dimensional_strain", (alpha, "save_all"))
+                          for alpha in alphas])
     else:
         raise ValueError("Input (3) or (2)-dimensional strain state assumption")
 
-def closest_eps_finder(ana_eps, target_eps):
-    eps_difference = abs(ana_eps - target_eps)
-    minimum_difference = np.min(eps_difference)
-    minimum_location = list(eps_difference).index(minimum_difference)
-
-    return int(minimum_location)
-
-
 def three_dimensional_strain(alpha, function):
+    import matplotlib.pyplot as plt
+
     # Array of all possible e23 values
     small_strains = np.linspace(0, 0.01, 51)
     big_strains = np.linspace(0.01, 2.0, 400)
@@ -103,14 +81,14 @@ def three_dimensional_strain(alpha, function):
     forcepath = rf"AlphaResults/Alpha{alpha_dictionary[alpha]}.csv"
 
     # --- Plot comparison between analytical and numerical stress-strain curves ---
-    if function == "stress_comparison" or function == "save_all":
+    if selected(function, "stress_comparison"):
 
-        # Read in .csv data as pandas DataFrame
-        abq_data = pd.read_csv(filepath, delimiter=";")
+        # Read in .csv data (cached binary copy)
+        abq_data = load_dataset(filepath)
 
         # Extract data
-        abq_eps = (abq_data["EPS [-]"].dropna()).to_numpy()
-        abq_vm = (abq_data["VM [Pa]"].dropna()).to_numpy() / 10 ** 6
+        abq_eps = abq_data.column("EPS [-]")
+        abq_vm = abq_data.column("VM [Pa]") / 10 ** 6
 
         # Make plot
         plt.figure(figsize=(8, 5), dpi=150)
@@ -123,14 +101,14 @@ def three_dimensional_strain(alpha, function):
         plt.legend()
         plt.grid()
 
-        if function == "save_all":
+        if saving(function):
             plt.savefig(fr"ThreeDimensionalAnalytical/StressStrainAlpha{alpha_dictionary[alpha]}")
         else:
             plt.show()
 
 
     # --- Plot comparison between analytical and numerical moment curves
-    if function == "moment_comparison" or function == "save_all":
+    if selected(function, "moment_comparison"):
 
         # Analytical method
         secant_modulus = vm_stress / eps
@@ -145,12 +123,12 @@ def three_dimensional_strain(alpha, function):
         moment = (sigma_23 / outer_radius ** hardening_n) * geometry_term * 10 ** 6
 
         # Numerical method
-        abq_data = pd.read_csv(filepath, delimiter=";")
-        moment_data = pd.read_csv(forcepath, delimiter=";")
+        abq_data = load_dataset(filepath)
+        moment_data = load_dataset(forcepath)
 
         # Extract data
-        abq_moment = -(moment_data["RM2 [Nm]"].dropna()).to_numpy()
-        abq_eps = (abq_data["EPS [-]"].dropna()).to_numpy()[:len(abq_moment)]
+        abq_moment = -moment_data.column("RM2 [Nm]")
+        abq_eps = abq_data.column("EPS [-]")[:len(abq_moment)]
 
         # Actual localization point (peak force)
         localization_location = find_localization(abq_moment)
@@ -169,13 +147,13 @@ def three_dimensional_strain(alpha, function):
         plt.legend()
         plt.grid()
 
-        if function == "save_all":
+        if saving(function):
             plt.savefig(fr"ThreeDimensionalAnalytical/MomentComparison{alpha_dictionary[alpha]}")
         else:
             plt.show()
 
     # --- Plot comparison between analytical and numerical moment curves
-    if function == "force_comparison" or function == "save_all":
+    if selected(function, "force_comparison"):
 
         # Analytical method
         secant_modulus = vm_stress / eps
@@ -191,12 +169,12 @@ def three_dimensional_strain(alpha, function):
         force = moment * outer_radius * alpha * initial_area / polar_moment
 
         # Numerical method
-        abq_data = pd.read_csv(filepath, delimiter=";")
-        force_data = pd.read_csv(forcepath, delimiter=";")
+        abq_data = load_dataset(filepath)
+        force_data = load_dataset(forcepath)
 
         # Extract data
-        abq_force = (force_data["RF Mag [N]"].dropna()).to_numpy()
-        abq_eps = (abq_data["EPS [-]"].dropna()).to_numpy()[:len(abq_force)]
+        abq_force = force_data.column("RF Mag [N]")
+        abq_eps = abq_data.column("EPS [-]")[:len(abq_force)]
 
         # Actual localization point (peak force)
         localization_location = find_localization(abq_force)
@@ -214,27 +192,27 @@ def three_dimensional_strain(alpha, function):
         plt.legend()
         plt.grid()
 
-        if function == "save_all":
+        if saving(function):
             plt.savefig(fr"ThreeDimensionalAnalytical/ForceComparison{alpha_dictionary[alpha]}")
         else:
             plt.show()
 
     # --- Make localization prediction based on Considère criterion ---
-    if function == "localization_prediction" or function == "save_all":
-        # Read in .csv data as pandas DataFrame
-        abq_data = pd.read_csv(filepath, delimiter=";")
+    if selected(function, "localization_prediction"):
+        # Read in .csv data (cached binary copy)
+        abq_data = load_dataset(filepath)
 
         # Extract data
-        abq_eps = (abq_data["EPS [-]"].dropna()).to_numpy()
-        abq_vm = (abq_data["VM [Pa]"].dropna()).to_numpy() / 10 ** 6
+        abq_eps = abq_data.column("EPS [-]")
+        abq_vm = abq_data.column("VM [Pa]") / 10 ** 6
 
         # Localization points for analytical and numerical
         ana_derivative, ana_loc_x, ana_loc_y = considere_criterion(eps, vm_stress)
         num_derivative, num_loc_x, num_loc_y = considere_criterion(abq_eps, abq_vm)
 
         # Actual localization point (peak force)
-        force_data = pd.read_csv(forcepath, delimiter=";")
-        abq_force = (force_data["RF Mag [N]"].dropna()).to_numpy()
+        force_data = load_dataset(forcepath)
+        abq_force = force_data.column("RF Mag [N]")
         localization_location = find_localization(abq_force)
         localization_x, localization_y = abq_eps[localization_location], abq_vm[localization_location]
 
@@ -255,7 +233,7 @@ def three_dimensional_strain(alpha, function):
         plt.legend(loc="lower right")
         plt.grid()
 
-        if function == "save_all":
+        if saving(function):
             plt.savefig(fr"ThreeDimensionalAnalytical/LocalizationPrediction{alpha_dictionary[alpha]}")
         else:
             plt.show()
@@ -286,6 +264,8 @@ def three_dimensional_strain(alpha, function):
 
 
 def two_dimensional_strain(alpha, function):
+    import matplotlib.pyplot as plt
+
     # Array of all possible e23 values
     small_strains = np.linspace(0, 0.01, 101)
     big_strains = np.linspace(0.01, 2.0, 8000)
@@ -316,14 +296,14 @@ def two_dimensional_strain(alpha, function):
     forcepath = rf"AlphaResults/Alpha{alpha_dictionary[alpha]}.csv"
 
     # --- Plot comparison between analytical and numerical stress-strain curves ---
-    if function == "stress_comparison" or function == "save_all":
+    if selected(function, "stress_comparison"):
 
-        # Read in .csv data as pandas DataFrame
-        abq_data = pd.read_csv(filepath, delimiter=";")
+        # Read in .csv data (cached binary copy)
+        abq_data = load_dataset(filepath)
 
         # Extract data
-        abq_eps = (abq_data["EPS [-]"].dropna()).to_numpy()
-        abq_vm = (abq_data["VM [Pa]"].dropna()).to_numpy() / 10 ** 6
+        abq_eps = abq_data.column("EPS [-]")
+        abq_vm = abq_data.column("VM [Pa]") / 10 ** 6
 
         # Make plot
         plt.figure(figsize=(8, 5), dpi=150)
@@ -336,13 +316,13 @@ def two_dimensional_strain(alpha, function):
         plt.legend()
         plt.grid()
 
-        if function == "save_all":
+        if saving(function):
             plt.savefig(fr"TwoDimensionalAnalytical/StressStrainAlpha{alpha_dictionary[alpha]}")
         else:
             plt.show()
 
     # --- Plot comparison between analytical and numerical moment curves
-    if function == "moment_comparison" or function == "save_all":
+    if selected(function, "moment_comparison"):
 
         # Analytical method
         secant_modulus = vm_stress / eps
@@ -357,12 +337,12 @@ def two_dimensional_strain(alpha, function):
         moment = (sigma_23 / outer_radius ** hardening_n) * geometry_term * 10 ** 6
 
         # Numerical method
-        abq_data = pd.read_csv(filepath, delimiter=";")
-        moment_data = pd.read_csv(forcepath, delimiter=";")
+        abq_data = load_dataset(filepath)
+        moment_data = load_dataset(forcepath)
 
         # Extract data
-        abq_moment = -(moment_data["RM2 [Nm]"].dropna()).to_numpy()
-        abq_eps = (abq_data["EPS [-]"].dropna()).to_numpy()[:len(abq_moment)]
+        abq_moment = -moment_data.column("RM2 [Nm]")
+        abq_eps = abq_data.column("EPS [-]")[:len(abq_moment)]
 
         # Actual localization point (peak force)
         localization_location = find_localization(abq_moment)
@@ -380,13 +360,13 @@ def two_dimensional_strain(alpha, function):
         plt.legend()
         plt.grid()
 
-        if function == "save_all":
+        if saving(function):
             plt.savefig(fr"TwoDimensionalAnalytical/MomentComparison{alpha_dictionary[alpha]}")
         else:
             plt.show()
 
     # --- Plot comparison between analytical and numerical moment curves
-    if function == "force_comparison" or function == "save_all":
+    if selected(function, "force_comparison"):
 
         # Analytical method
         secant_modulus = vm_stress / eps
@@ -402,12 +382,12 @@ def two_dimensional_strain(alpha, function):
         force = moment * outer_radius * alpha * initial_area / polar_moment
 
         # Numerical method
-        abq_data = pd.read_csv(filepath, delimiter=";")
-        force_data = pd.read_csv(forcepath, delimiter=";")
+        abq_data = load_dataset(filepath)
+        force_data = load_dataset(forcepath)
 
         # Extract data
-        abq_force = (force_data["RF Mag [N]"].dropna()).to_numpy()
-        abq_eps = (abq_data["EPS [-]"].dropna()).to_numpy()[:len(abq_force)]
+        abq_force = force_data.column("RF Mag [N]")
+        abq_eps = abq_data.column("EPS [-]")[:len(abq_force)]
 
         # Actual localization point (peak force)
         localization_location = find_localization(abq_force)
@@ -425,27 +405,27 @@ def two_dimensional_strain(alpha, function):
         plt.legend()
         plt.grid()
 
-        if function == "save_all":
+        if saving(function):
             plt.savefig(fr"TwoDimensionalAnalytical/ForceComparison{alpha_dictionary[alpha]}")
         else:
             plt.show()
 
     # --- Make localization prediction based on Considère criterion ---
-    if function == "localization_prediction" or function == "save_all":
-        # Read in .csv data as pandas DataFrame
-        abq_data = pd.read_csv(filepath, delimiter=";")
+    if selected(function, "localization_prediction"):
+        # Read in .csv data (cached binary copy)
+        abq_data = load_dataset(filepath)
 
         # Extract data
-        abq_eps = (abq_data["EPS [-]"].dropna()).to_numpy()
-        abq_vm = (abq_data["VM [Pa]"].dropna()).to_numpy() / 10 ** 6
+        abq_eps = abq_data.column("EPS [-]")
+        abq_vm = abq_data.column("VM [Pa]") / 10 ** 6
 
         # Localization points for analytical and numerical
         ana_derivative, ana_loc_x, ana_loc_y = considere_criterion(eps, vm_stress)
         num_derivative, num_loc_x, num_loc_y = considere_criterion(abq_eps, abq_vm)
 
         # Actual localization point (peak force)
-        force_data = pd.read_csv(forcepath, delimiter=";")
-        abq_force = (force_data["RF Mag [N]"].dropna()).to_numpy()
+        force_data = load_dataset(forcepath)
+        abq_force = force_data.column("RF Mag [N]")
         localization_location = find_localization(abq_force)
         localization_x, localization_y = abq_eps[localization_location], abq_vm[localization_location]
 
@@ -467,7 +447,7 @@ def two_dimensional_strain(alpha, function):
         plt.legend(loc="lower right")
         plt.grid()
 
-        if function == "save_all":
+        if saving(function):
             plt.savefig(fr"TwoDimensionalAnalytical/LocalizationPrediction{alpha_dictionary[alpha]}")
         else:
             plt.show()
@@ -514,24 +494,24 @@ def two_dimensional_strain(alpha, function):
         # There are three different localization detection methods in 2D strain states:
         # Considere, Hill, Swift
         # Numerically, there's Considere, peak load and peak moment
-        # Read in .csv data as pandas DataFrame
-        abq_data = pd.read_csv(filepath, delimiter=";")
+        # Read in .csv data (cached binary copy)
+        abq_data = load_dataset(filepath)
 
         # Extract data
-        abq_eps = (abq_data["EPS [-]"].dropna()).to_numpy()
-        abq_vm = (abq_data["VM [Pa]"].dropna()).to_numpy() / 10 ** 6
+        abq_eps = abq_data.column("EPS [-]")
+        abq_vm = abq_data.column("VM [Pa]") / 10 ** 6
 
         # Localization points for analytical and numerical
         ana_derivative, ana_loc_x, ana_loc_y = considere_criterion(eps, vm_stress)
         num_derivative, num_loc_x, num_loc_y = considere_criterion(abq_eps, abq_vm)
 
         # Actual localization point (peak force)
-        force_data = pd.read_csv(forcepath, delimiter=";")
-        abq_force = (force_data["RF Mag [N]"].dropna()).to_numpy()
+        force_data = load_dataset(forcepath)
+        abq_force = force_data.column("RF Mag [N]")
         force_localization_location = find_localization(abq_force)
         force_localization = abq_eps[force_localization_location]
 
-        abq_moment = -(force_data["RM2 [Nm]"].dropna()).to_numpy()
+        abq_moment = -force_data.column("RM2 [Nm]")
         moment_localization_location = find_localization(abq_moment)
         moment_localization = abq_eps[moment_localization_location]
 
@@ -540,19 +520,21 @@ def two_dimensional_strain(alpha, function):
         mean_strain_ratio = np.mean(strain_ratio[~np.isnan(strain_ratio)])
 
         # Then Swift abd Hill localization strain
-        swift_major = 2 * hardening_n * ((1 + mean_strain_ratio + mean_strain_ratio ** 2)
-                                                  / (2 + mean_strain_ratio + mean_strain_ratio ** 2 + 2 * mean_strain_ratio ** 3))
-        swift_result = eps[closest_eps_finder(epsilon_1, swift_major)]
-        hill_major = hardening_n / (1 + mean_strain_ratio)
-        hill_result = eps[closest_eps_finder(epsilon_1, hill_major)]
+        swift_major = swift_major_strain(mean_strain_ratio, hardening_n)
+        swift_result = monotone_crossing(eps, epsilon_1, swift_major)
+        hill_major = hill_major_strain(mean_strain_ratio, hardening_n)
+        hill_result = monotone_crossing(eps, epsilon_1, hill_major)
 
         return ana_loc_x, num_loc_x, force_localization, moment_localization, swift_result, hill_result
 
     return None
 
 
-def three_two_dimensions_comparison(function=None):
-    alphas = [0.25, 0.375, 0.5, 0.75, 1.0, 1.25, 1.5, 2.0, 2.5, 3.0]
+def three_two_dimensions_comparison(function=None, alphas=None):
+    import matplotlib.pyplot as plt
+
+    if alphas is None:
+        alphas = [0.25, 0.375, 0.5, 0.75, 1.0, 1.25, 1.5, 2.0, 2.5, 3.0]
     for alpha in alphas:
         print(alpha)
 
@@ -569,14 +551,14 @@ def three_two_dimensions_comparison(function=None):
         two_moment, two_force, two_eps = two_dimensional_strain(alpha, "comparison")
 
         # Get numerical data
-        abq_data = pd.read_csv(filepath, delimiter=";")
+        abq_data = load_dataset(filepath)
         # Actual localization point (peak force)
-        force_data = pd.read_csv(forcepath, delimiter=";")
-        abq_force = (force_data["RF Mag [N]"].dropna()).to_numpy()
+        force_data = load_dataset(forcepath)
+        abq_force = force_data.column("RF Mag [N]")
 
         # Extract data
-        abq_vm = (abq_data["VM [Pa]"].dropna()).to_numpy() / 10 ** 6
-        abq_eps = (abq_data["EPS [-]"].dropna()).to_numpy()[:len(abq_force)]
+        abq_vm = abq_data.column("VM [Pa]") / 10 ** 6
+        abq_eps = abq_data.column("EPS [-]")[:len(abq_force)]
 
         localization_location = find_localization(abq_force)
         localization_x, localization_y = abq_eps[localization_location], abq_force[localization_location]
@@ -603,6 +585,8 @@ def three_two_dimensions_comparison(function=None):
 
 
 def localization_prediction(phi_type):
+    import matplotlib.pyplot as plt
+
     alphas = [0.25, 0.375, 0.5, 0.75, 1.0, 1.25, 1.5, 2.0, 2.5, 3.0]
 
     results = np.empty((len(alphas), 7))
@@ -662,10 +646,8 @@ def two_dimensional_exact_phi(alpha, function):
 
     epsilon_23 = np.concatenate((small_strains, big_strains[1:]))
 
-    # Principal rotation angle
-    phi_dictionary = {0.25:0.753648, 0.375:0.736434, 0.5:0.71911, 0.75:0.686111, 1.0:0.65193, 1.25:0.618939,
-                      1.5:0.585027, 2:0.525188, 2.5:0.474167, 3:0.422358}
-    phi = phi_dictionary[alpha]
+    # Principal rotation angle, from the exact phi lookup table of the 2D strain state
+    phi = float(exact_phi_table(eta_r, "2D")(alpha))
 
     # All other general strain components
     epsilon_22 = epsilon_23 * ((cos2(phi) - sin2(phi)) / (np.sin(phi) * np.cos(phi)))
@@ -690,24 +672,24 @@ def two_dimensional_exact_phi(alpha, function):
     # There are three different localization detection methods in 2D strain states:
     # Considere, Hill, Swift
     # Also numerically Considere and peak load
-    # Read in .csv data as pandas DataFrame
-    abq_data = pd.read_csv(filepath, delimiter=";")
+    # Read in .csv data (cached binary copy)
+    abq_data = load_dataset(filepath)
 
     # Extract data
-    abq_eps = (abq_data["EPS [-]"].dropna()).to_numpy()
-    abq_vm = (abq_data["VM [Pa]"].dropna()).to_numpy() / 10 ** 6
+    abq_eps = abq_data.column("EPS [-]")
+    abq_vm = abq_data.column("VM [Pa]") / 10 ** 6
 
     # Localization points for analytical and numerical
     ana_derivative, ana_loc_x, ana_loc_y = considere_criterion(eps, vm_stress)
     num_derivative, num_loc_x, num_loc_y = considere_criterion(abq_eps, abq_vm)
 
     # Actual localization point (peak force)
-    force_data = pd.read_csv(forcepath, delimiter=";")
-    abq_force = (force_data["RF Mag [N]"].dropna()).to_numpy()
+    force_data = load_dataset(forcepath)
+    abq_force = force_data.column("RF Mag [N]")
     force_localization_location = find_localization(abq_force)
     force_localization = abq_eps[force_localization_location]
 
-    abq_moment = -(force_data["RM2 [Nm]"].dropna()).to_numpy()
+    abq_moment = -force_data.column("RM2 [Nm]")
     moment_localization_location = find_localization(abq_moment)
     moment_localization = abq_eps[moment_localization_location]
 
@@ -716,11 +698,10 @@ def two_dimensional_exact_phi(alpha, function):
     mean_strain_ratio = np.mean(strain_ratio[~np.isnan(strain_ratio)])
 
     # Then Swift abd Hill localization strain
-    swift_major = 2 * hardening_n * ((1 + mean_strain_ratio + mean_strain_ratio ** 2)
-                                     / (2 + mean_strain_ratio + mean_strain_ratio ** 2 + 2 * mean_strain_ratio ** 3))
-    swift_result = eps[closest_eps_finder(epsilon_1, swift_major)]
-    hill_major = hardening_n / (1 + mean_strain_ratio)
-    hill_result = eps[closest_eps_finder(epsilon_1, hill_major)]
+    swift_major = swift_major_strain(mean_strain_ratio, hardening_n)
+    swift_result = monotone_crossing(eps, epsilon_1, swift_major)
+    hill_major = hill_major_strain(mean_strain_ratio, hardening_n)
+    hill_result = monotone_crossing(eps, epsilon_1, hill_major)
 
     return ana_loc_x, num_loc_x, force_localization, moment_localization, swift_result, hill_result
 
@@ -732,9 +713,12 @@ def two_dimensional_exact_phi(alpha, function):
 
 
 
-# three_two_dimensions_comparison("save_all")
+if __name__ == "__main__":
+    import matplotlib.pyplot as plt
+
+    # three_two_dimensions_comparison("save_all")
 
-# two_dimensional_strain(3.0, "hill_criterion")
-# save_analytical_figures(2)
-localization_prediction("exact")
-plt.close('all')
+    # two_dimensional_strain(3.0, "hill_criterion")
+    # save_analytical_figures(2)
+    localization_prediction("exact")
+    plt.close('all')
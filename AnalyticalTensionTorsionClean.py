@@ -1,7 +1,17 @@
 # ----- Import libraries -----
 import numpy as np
-import matplotlib.pyplot as plt
-import pandas as pd
+
+from datasets import DATASET_PATHS, registry
+from exact_phi import exact_phi_table, solve_exact_phi
+from figures import figure_spec, add_line, add_scatter, render_all, show_figures
+from hardening import PowerLaw
+from stress_states import stress_invariants
+from localization import (considere_criterion, find_peak, swift_major_strain, hill_major_strain,
+                          path_necking_strains)
+
+
+# ----- Result fields of the moment/force solver -----
+MOMENT_FORCE_FIELDS = ("moment", "force", "eps", "sigma_1", "sigma_2", "sigma_3")
 
 
 # ----- Static function definitions -----
@@ -11,49 +21,21 @@ def cos2(value):
 def sin2(value):
     return np.sin(value) ** 2
 
-def considere_criterion(strain, stress):
-    # Take numerical derivative
-    derivative = np.gradient(stress, strain)
-
-    # Filter possible nan or inf when strain is zero
-    derivative[np.isnan(derivative)] = 10 ** 9
-    derivative[np.isinf(derivative)] = 10 ** 9
-
-    # Find localization point
-    absolute_difference = abs(stress - derivative)
-    minimum = np.min(absolute_difference)
-    minimum_location = list(absolute_difference).index(minimum)
-    localization_x = float(strain[minimum_location])
-    localization_y = float(stress[minimum_location])
-
-    return derivative, localization_x, localization_y
-
-def find_peak(array):
-    # Find peak value
-    peak_value = np.max(array)
-
-    # Find point of peak force
-    peak_location = list(array).index(peak_value)
-
-    return peak_location
-
-def closest_value_finder(array, target_value):
-    difference = abs(array - target_value)
-    minimum_difference = np.min(difference)
-    minimum_location = list(difference).index(minimum_difference)
-
-    return minimum_location
-
 
 # ----- Class definition for tension-torsion sample -----
 class TensionTorsionSample:
-    def __init__(self):
+    def __init__(self, hardening_law=None):
         # Material parameters
         self.elastic_modulus = 68e9
         self.yield_strength = 267e6
         self.hardening_n = 0.057
         self.yield_strain = self.yield_strength / self.elastic_modulus
 
+        # Flow stress of the analytical models, any law from hardening.py
+        if hardening_law is None:
+            hardening_law = PowerLaw(self.elastic_modulus, self.yield_strength, self.hardening_n)
+        self.hardening_law = hardening_law
+
         # Geometry parameters
         self.outer_radius = 0.02319
         self.inner_radius = 0.02217
@@ -61,88 +43,267 @@ class TensionTorsionSample:
         self.initial_area = np.pi * (self.outer_radius ** 2 - self.inner_radius ** 2)
         self.polar_moment = np.pi / 2 * (self.outer_radius ** 4 - self.inner_radius ** 4)
 
+        # Gauss points over the wall, the moment integrates the shear stress over the radius
+        points, weights = np.polynomial.legendre.leggauss(4)
+        self.wall_radii = self.inner_radius + (points + 1) / 2 * (self.outer_radius - self.inner_radius)
+        self.wall_weights = weights / 2 * (self.outer_radius - self.inner_radius)
+
         # Loading ratio alpha
         self.alphas = [0.25, 0.375, 0.5, 0.75, 1.0, 1.25, 1.5, 2.0, 2.5, 3.0]
         self.alphas_text_dictionary = {0.25:"025", 0.375:"0375", 0.5:"05", 0.75:"075", 1.0:"10",
                                        1.25:"125", 1.5:"15", 2.0:"20", 2.5:"25", 3.0:"30"}
 
-        # "Exact" values of phi
-        self.phi_dictionary = {0.25:0.753648, 0.375:0.736434, 0.5:0.71911, 0.75:0.686111, 1.0:0.65193,
-                               1.25:0.618939, 1.5:0.585027, 2:0.525188, 2.5:0.474167, 3:0.422358}
+    # Path to the .csv export of a dataset kind
+    def dataset_path(self, kind, alpha, shell_size=None):
+        return DATASET_PATHS[kind].format(alpha=self.alphas_text_dictionary[alpha])
+
+    # Dataset from the shared registry, so every export is only loaded once per process
+    def dataset(self, kind, alpha, shell_size=None):
+        return registry.get((alpha, shell_size, kind), self.dataset_path(kind, alpha, shell_size))
 
-    # Solve strains
-    def solve_strain_state(self, alpha, phi_type, strain_state_type):
-        # Array of all possible e23 values
+    # Array of all possible e23 values
+    @staticmethod
+    def strain_grid():
         small_strains = np.linspace(0, 0.01, 51)
         big_strains = np.linspace(0.01, 2.0, 4000)
-        epsilon_23 = np.concatenate((small_strains, big_strains[1:]))
 
-        phi = None
+        return np.concatenate((small_strains, big_strains[1:]))
+
+    # Principal rotation angle phi, for a single alpha or an array of alphas
+    # The exact phi matches the former phi_dictionary at its ten alphas, see exact_phi.py
+    def principal_angle(self, alpha, phi_type, strain_state_type="3D"):
         if phi_type == "approximation":
-            phi = 0.5 * np.arctan(4 / alpha)
+            return 0.5 * np.arctan(4 / np.asarray(alpha, dtype=float))
         elif phi_type == "exact":
-            phi = self.phi_dictionary[alpha]
+            # Parameter studies give every alpha its own geometry (eta_r as a column), those are solved directly
+            if np.ndim(self.eta_r) > 0:
+                return solve_exact_phi(alpha, np.reshape(self.eta_r, np.shape(alpha)), strain_state_type)
+            return exact_phi_table(self.eta_r, strain_state_type)(alpha)
+        else:
+            raise ValueError("Please select either the approximation or the exact phi type!")
+
+    # Solve strains for many alphas at once, rows are alphas and columns are e23 values
+    # The e23 grid is either shared by all alphas (1D) or given per alpha (2D), by default the fixed grid is used
+    def solve_strain_states(self, alphas, phi_type, strain_state_type, epsilon_23=None):
+        if epsilon_23 is None:
+            epsilon_23 = self.strain_grid()
+        epsilon_23 = np.atleast_2d(epsilon_23)
+        phi = self.principal_angle(np.atleast_1d(alphas), phi_type, strain_state_type)[:, np.newaxis]
+
+        # Trigonometric terms only depend on alpha, so they are column vectors
+        cos2_phi = cos2(phi)
+        sin2_phi = sin2(phi)
+        sin_cos_phi = np.sin(phi) * np.cos(phi)
 
         if strain_state_type == "2D" or strain_state_type == "2d" or strain_state_type == 2:
             # All other general strain components
-            epsilon_22 = epsilon_23 * ((cos2(phi) - sin2(phi)) / (np.sin(phi) * np.cos(phi)))
+            epsilon_22 = epsilon_23 * ((cos2_phi - sin2_phi) / sin_cos_phi)
 
             # Principal strains
-            epsilon_1 = epsilon_22 * cos2(phi) + 2 * epsilon_23 * np.sin(phi) * np.cos(phi)
-            epsilon_2 = np.zeros(len(epsilon_22))
-            epsilon_3 = epsilon_22 * sin2(phi) - 2 * epsilon_23 * np.sin(phi) * np.cos(phi)
-
-            # Equivalent plastic strain and von Mises stress
-            eps = (2 / 3) ** 0.5 * (epsilon_1 ** 2 + epsilon_2 ** 2 + epsilon_3 ** 2) ** 0.5
-            vm_stress = self.yield_strength * (self.elastic_modulus * eps / self.yield_strength) ** self.hardening_n / 10 ** 6
-
-            return eps, vm_stress, epsilon_1, epsilon_2, epsilon_3
+            epsilon_1 = epsilon_22 * cos2_phi + 2 * epsilon_23 * sin_cos_phi
+            epsilon_2 = np.zeros(np.shape(epsilon_22))
+            epsilon_3 = epsilon_22 * sin2_phi - 2 * epsilon_23 * sin_cos_phi
 
         elif strain_state_type == "3D" or strain_state_type == "3d" or strain_state_type == 3:
             # All other general strain components
-            epsilon_11 = -epsilon_23 * (cos2(phi) - sin2(phi)) / ((1 + 2 * self.eta_r) * np.sin(phi) * np.cos(phi))
+            epsilon_11 = -epsilon_23 * (cos2_phi - sin2_phi) / ((1 + 2 * self.eta_r) * sin_cos_phi)
             epsilon_22 = -epsilon_11 * (1 + self.eta_r)
             epsilon_33 = epsilon_11 * self.eta_r
 
             # Principal strains
-            epsilon_1 = epsilon_22 * cos2(phi) + 2 * epsilon_23 * np.sin(phi) * np.cos(phi) + epsilon_33 * sin2(phi)
+            epsilon_1 = epsilon_22 * cos2_phi + 2 * epsilon_23 * sin_cos_phi + epsilon_33 * sin2_phi
             epsilon_2 = epsilon_11
-            epsilon_3 = epsilon_22 * sin2(phi) - 2 * epsilon_23 * np.sin(phi) * np.cos(phi) + epsilon_33 * cos2(phi)
-
-            # Equivalent principal strain and von Mises stress
-            eps = (2 / 3) ** 0.5 * (epsilon_1 ** 2 + epsilon_2 ** 2 + epsilon_3 ** 2) ** 0.5
-            vm_stress = self.yield_strength * (self.elastic_modulus * eps / self.yield_strength) ** self.hardening_n / 10 ** 6
-
-            return eps, vm_stress, epsilon_1, epsilon_2, epsilon_3
+            epsilon_3 = epsilon_22 * sin2_phi - 2 * epsilon_23 * sin_cos_phi + epsilon_33 * cos2_phi
 
         else:
             raise ValueError("Please select either 2D strain state (2D, 2d, 2) or 3D strain state (3D, 3d, 3)!")
 
-    # Solve for moment and force
-    def solve_moment_force(self, alpha, phi_type, strain_state_type):
+        # Equivalent plastic strain and von Mises stress
+        eps = (2 / 3) ** 0.5 * (epsilon_1 ** 2 + epsilon_2 ** 2 + epsilon_3 ** 2) ** 0.5
+        vm_stress = self.hardening_law.flow_stress(eps) / 10 ** 6
+
+        return eps, vm_stress, epsilon_1, epsilon_2, epsilon_3
+
+    # Solve strains for a single alpha
+    def solve_strain_state(self, alpha, phi_type, strain_state_type, epsilon_23=None):
+        results = self.solve_strain_states([alpha], phi_type, strain_state_type, epsilon_23)
+
+        return tuple(result[0] for result in results)
+
+    # Considere, Swift and Hill residuals along the strain path, each one is positive before its crossing
+    def localization_residuals(self, alphas, phi_type, strain_state_type, epsilon_23):
+        eps, vm_stress, epsilon_1, epsilon_2, epsilon_3 = self.solve_strain_states(alphas, phi_type,
+                                                                                   strain_state_type, epsilon_23)
+
+        # The strain path is proportional, so the strain ratio is a constant per alpha
+        unit_strains = self.solve_strain_states(alphas, phi_type, strain_state_type, [1.0])
+        strain_ratio = unit_strains[4] / unit_strains[2]
+
+        # The Swift and Hill criteria use the local hardening exponent, which is n for the power law
+        hardening_exponent = self.hardening_law.hardening_exponent(eps)
+
+        considere = self.hardening_law.tangent_modulus(eps) / 10 ** 6 - vm_stress
+        swift = swift_major_strain(strain_ratio, hardening_exponent) - epsilon_1
+        hill = hill_major_strain(strain_ratio, hardening_exponent) - epsilon_1
+
+        return np.stack((considere, swift, hill))
+
+    # Considere, Swift and Hill localization eps for many alphas at once, as columns of the result
+    def localization_strains(self, alphas, phi_type, strain_state_type):
+        # The strain path is proportional, so one point on it fixes the strain ratio and eps per unit major strain
+        eps, vm_stress, epsilon_1, epsilon_2, epsilon_3 = self.solve_strain_states(alphas, phi_type,
+                                                                                   strain_state_type, [1.0])
+        strain_ratio = epsilon_3[:, 0] / epsilon_1[:, 0]
+        eps_per_major = eps[:, 0] / epsilon_1[:, 0]
+
+        # Every criterion is d(vm)/d(eps) / vm dropping to 1 / scale, the scale is the criterion strain for n = 1
+        # Scales are columns like the strains, so law parameters given per alpha (as a column) line up
+        # This holds for every law with array parameters (power law, Swift, Voce, Swift-Voce), a TabularLaw is one table
+        scales = (np.ones(np.shape(strain_ratio)), swift_major_strain(strain_ratio, 1.0) * eps_per_major,
+                  hill_major_strain(strain_ratio, 1.0) * eps_per_major)
+
+        return np.stack([self.hardening_law.instability_strain(scale[:, np.newaxis])[:, 0] for scale in scales],
+                        axis=-1)
+
+    # Swift and Hill localization eps for many alphas, with the criteria applied pointwise along the strain path
+    def necking_strains(self, alphas, phi_type, strain_state_type, epsilon_23=None):
+        eps, vm_stress, epsilon_1, epsilon_2, epsilon_3 = self.solve_strain_states(alphas, phi_type,
+                                                                                   strain_state_type, epsilon_23)
+
+        return path_necking_strains(eps, epsilon_1, epsilon_3, self.hardening_law.hardening_exponent(eps))
+
+    # Adaptive e23 grid per alpha, refined around the Considere, Swift and Hill crossings and ending past them
+    def adaptive_strain_grid(self, alphas, phi_type, strain_state_type, tolerance=1e-4,
+                             n_coarse=201, n_patch=21, margin=0.5):
+        alphas = np.atleast_1d(np.asarray(alphas, dtype=float))
+        n_alphas = len(alphas)
+
+        # eps grows linearly with e23, so tolerances on eps convert to e23 with one factor per alpha
+        eps_per_e23 = self.solve_strain_states(alphas, phi_type, strain_state_type, [1.0])[0]
+
+        # Coarse pass to bracket the first sign change of every residual
+        coarse_grid = np.linspace(0, self.strain_grid()[-1], 101)
+        residuals = self.localization_residuals(alphas, phi_type, strain_state_type, coarse_grid)
+        crossed = residuals <= 0
+        upper_index = np.where(np.any(crossed, axis=-1), np.argmax(crossed, axis=-1), len(coarse_grid) - 1)
+        lower = coarse_grid[np.maximum(upper_index - 1, 0)].transpose()
+        upper = coarse_grid[upper_index].transpose()
+
+        # Bisection on all (alpha, criterion) brackets at once until they are well within the tolerance
+        criteria = np.arange(3)
+        while np.max((upper - lower) * eps_per_e23) > tolerance / 10:
+            middle = (lower + upper) / 2
+            positive = self.localization_residuals(alphas, phi_type, strain_state_type, middle)[criteria, :, criteria]
+            lower = np.where(positive.transpose() > 0, middle, lower)
+            upper = np.where(positive.transpose() > 0, upper, middle)
+        crossings = (lower + upper) / 2
+
+        # Coarse part of the grid stops past the last crossing
+        grid_end = (1 + margin) * np.max(crossings, axis=1, keepdims=True)
+        coarse_part = np.linspace(0, 1, n_coarse)[np.newaxis, :] * grid_end
+
+        # Fine patches centred on every crossing, with the spacing set by the tolerance on eps
+        spacing = tolerance / eps_per_e23
+        offsets = (np.arange(n_patch) - (n_patch - 1) / 2)[np.newaxis, np.newaxis, :] * spacing[:, :, np.newaxis]
+        patches = np.clip(crossings[:, :, np.newaxis] + offsets, 0, grid_end[:, :, np.newaxis])
+
+        epsilon_23 = np.concatenate((coarse_part, patches.reshape((n_alphas, -1))), axis=1)
+
+        return np.sort(epsilon_23, axis=1)
+
+    # Structured dtype holding one moment/force case, every result field is a row of length n_strain
+    @staticmethod
+    def moment_force_dtype(n_strain):
+        case_fields = [("alpha", float), ("phi_type", "U13"), ("strain_state_type", "U2")]
+        result_fields = [(field, float, (n_strain,)) for field in MOMENT_FORCE_FIELDS]
+
+        return np.dtype(case_fields + result_fields)
+
+    # Solve for moment and force for many alphas at once, optionally writing into a structured array
+    def solve_moment_forces(self, alphas, phi_type, strain_state_type, epsilon_23=None, out=None):
         # Get strains from strain state solver
-        eps, vm_stress, epsilon_1, epsilon_2, epsilon_3 = self.solve_strain_state(alpha, phi_type, strain_state_type)
-
-        # Solve principal stresses
-        secant_modulus = vm_stress / eps
-        secant_modulus[np.isnan(secant_modulus)] = 0
-        sigma_1 = secant_modulus * (4 * epsilon_1 + 2 * epsilon_3) / 3
-        sigma_2 = np.zeros(np.shape(sigma_1))
-        sigma_3 = -2 * secant_modulus * epsilon_2 - sigma_1
+        eps, vm_stress, epsilon_1, epsilon_2, epsilon_3 = self.solve_strain_states(alphas, phi_type,
+                                                                                   strain_state_type, epsilon_23)
+        alphas = np.atleast_1d(np.asarray(alphas, dtype=float))
+
+        if out is None:
+            out = np.empty(len(alphas), dtype=self.moment_force_dtype(np.shape(eps)[1]))
+
+        out["alpha"] = alphas
+        out["phi_type"] = phi_type
+        out["strain_state_type"] = str(strain_state_type).upper()
+        out["eps"] = eps
+        alphas = alphas[:, np.newaxis]
+
+        # Solve principal stresses, secant modulus is zero where the strain is zero
+        secant_modulus = np.divide(vm_stress, eps, out=np.zeros(np.shape(eps)), where=eps != 0)
+        sigma_1 = np.multiply(secant_modulus, (4 * epsilon_1 + 2 * epsilon_3) / 3, out=out["sigma_1"])
+        sigma_2 = out["sigma_2"]
+        sigma_2[...] = 0
+        sigma_3 = np.subtract(-2 * secant_modulus * epsilon_2, sigma_1, out=out["sigma_3"])
 
         # Solve s23
-        sigma_23 = ((sigma_1 - sigma_3) ** 2 / (4 * (1 + alpha ** 2 / 16))) ** 0.5
-
-        # Solve moment and force
-        geometry_term = (2 * np.pi / (self.hardening_n + 3)
-                         * (self.outer_radius ** (self.hardening_n + 3) - self.inner_radius ** (self.hardening_n + 3)))
-        moment = (sigma_23 / self.outer_radius ** self.hardening_n) * geometry_term * 10 ** 6
-        force = moment * self.outer_radius * alpha * self.initial_area / self.polar_moment
-
-        return moment, force, eps, sigma_1, sigma_2, sigma_3
+        sigma_23 = np.abs(sigma_1 - sigma_3) / (2 * (1 + alphas ** 2 / 16) ** 0.5)
+
+        # Solve moment, the strains scale with the radius so the shear stress follows the flow stress over the wall
+        outer_stress = vm_stress * 10 ** 6
+        wall_term = np.zeros(np.shape(eps))
+        for (radius, weight) in zip(self.wall_radii, self.wall_weights):
+            stress_ratio = np.divide(self.hardening_law.flow_stress(eps * radius / self.outer_radius), outer_stress,
+                                     out=np.zeros(np.shape(eps)), where=outer_stress != 0)
+            wall_term += 2 * np.pi * radius ** 2 * weight * stress_ratio
+        moment = np.multiply(sigma_23 * 10 ** 6, wall_term, out=out["moment"])
+
+        # Solve force
+        force = np.multiply(moment, self.outer_radius * alphas * self.initial_area / self.polar_moment,
+                            out=out["force"])
+
+        return moment, force, out["eps"], sigma_1, sigma_2, sigma_3
+
+    # Solve for moment and force for a single alpha
+    def solve_moment_force(self, alpha, phi_type, strain_state_type, epsilon_23=None):
+        results = self.solve_moment_forces([alpha], phi_type, strain_state_type, epsilon_23)
+
+        return tuple(result[0] for result in results)
+
+    # Moment, force, eps and principal stresses for every (phi type, strain state, alpha) case in one array
+    # Giving a tolerance on the localization strain switches every block to its adaptive strain grid
+    def moment_force_study(self, alphas=None, phi_types=("approximation", "exact"), strain_state_types=("2D", "3D"),
+                           tolerance=None, n_coarse=201, n_patch=21):
+        if alphas is None:
+            alphas = self.alphas
+
+        n_alphas = len(alphas)
+        n_strain = len(self.strain_grid()) if tolerance is None else n_coarse + 3 * n_patch
+        results = np.empty(len(phi_types) * len(strain_state_types) * n_alphas, dtype=self.moment_force_dtype(n_strain))
+
+        # Every (phi type, strain state) block is solved for all alphas at once, straight into the result array
+        block = 0
+        for phi_type in phi_types:
+            for strain_state_type in strain_state_types:
+                epsilon_23 = None
+                if tolerance is not None:
+                    epsilon_23 = self.adaptive_strain_grid(alphas, phi_type, strain_state_type, tolerance,
+                                                           n_coarse, n_patch)
+
+                self.solve_moment_forces(alphas, phi_type, strain_state_type, epsilon_23,
+                                         out=results[block * n_alphas:(block + 1) * n_alphas])
+                block += 1
+
+        return results
 
     # Force and moment curves
     def create_figures(self, phi_type, strain_state_type, action="show"):
+        specs = self.moment_force_specs(phi_type, strain_state_type)
+
+        # Saved figures are rendered in parallel without a display
+        if action == "save":
+            render_all(specs)
+        else:
+            show_figures(specs)
+
+    # Figure specs of the moment and force comparison for every alpha
+    def moment_force_specs(self, phi_type, strain_state_type):
         # Create string to determine where to save figure (based on strain state type)
         if strain_state_type == "2D":
             folder = "TwoDimensionalAnalytical"
@@ -151,127 +312,98 @@ class TensionTorsionSample:
         else:
             folder = ""
 
+        # Solve all alphas at once
+        moments, forces, eps_curves, sigma_1s, sigma_2s, sigma_3s = self.solve_moment_forces(self.alphas, phi_type,
+                                                                                            strain_state_type)
+
         # Creates moment-force figures, lops for every possible value of alpha
-        for alpha in self.alphas:
-            moment, force, eps, sigma_1, sigma_2, sigma_3 = self.solve_moment_force(alpha, phi_type, strain_state_type)
+        specs = []
+        for (n, alpha) in enumerate(self.alphas):
+            moment, force, eps = moments[n], forces[n], eps_curves[n]
 
             # Retrieve data from .csv files
-            filepath = rf"StressStrainCurves/Alpha{self.alphas_text_dictionary[alpha]}.csv"
-            forcepath = rf"AlphaResults/Alpha{self.alphas_text_dictionary[alpha]}.csv"
-            abq_data = pd.read_csv(filepath, delimiter=";")
-            load_data = pd.read_csv(forcepath, delimiter=";")
+            abq_data = self.dataset("stress_strain", alpha)
+            load_data = self.dataset("alpha_results", alpha)
+            inputs = [self.dataset_path("stress_strain", alpha), self.dataset_path("alpha_results", alpha)]
 
             # Extract data
-            abq_moment = -(load_data["RM2 [Nm]"].dropna()).to_numpy()
-            abq_force = (load_data["RF Mag [N]"].dropna()).to_numpy()
-            abq_eps = (abq_data["EPS [-]"].dropna()).to_numpy()[:len(abq_moment)]
+            abq_moment = -load_data.column("RM2 [Nm]")
+            abq_force = load_data.column("RF Mag [N]")
+            abq_eps = abq_data.column("EPS [-]")[:len(abq_moment)]
 
             # Actual localization point (peak moment)
             moment_location = find_peak(abq_moment)
             moment_x, moment_y = abq_eps[moment_location], abq_moment[moment_location]
 
-            plt.figure(figsize=(8, 5), dpi=150)
-            plt.plot(eps, moment, label="Analytical")
-            plt.plot(abq_eps, abq_moment, label="Numerical")
-            plt.scatter(moment_x, moment_y, color="tab:orange", marker="x", label="Num. localization, moment")
-            plt.xlim(-0.005, 1.1 * moment_x)
-            plt.xlabel(r"Equivalent plastic strain $\bar{\varepsilon}$ [-]")
-            plt.ylabel(r"Resultant moment $M$ [Nm]")
-            plt.title(fr"Resultant moment $M$ in tension-torsion, $\alpha$ = {alpha}")
-            plt.legend()
-            plt.grid()
-
-            if action == "save":
-                plt.savefig(fr"{folder}/MomentComparison{self.alphas_text_dictionary[alpha]}")
-            else:
-                plt.show()
+            spec = figure_spec(fr"{folder}/MomentComparison{self.alphas_text_dictionary[alpha]}.png",
+                               fr"Resultant moment $M$ in tension-torsion, $\alpha$ = {alpha}",
+                               r"Equivalent plastic strain $\bar{\varepsilon}$ [-]", r"Resultant moment $M$ [Nm]",
+                               xlim=(-0.005, 1.1 * moment_x), inputs=inputs)
+            add_line(spec, eps, moment, label="Analytical")
+            add_line(spec, abq_eps, abq_moment, label="Numerical")
+            add_scatter(spec, moment_x, moment_y, color="tab:orange", marker="x", label="Num. localization, moment")
+            specs.append(spec)
 
             # Actual localization point (peak force)
             force_location = find_peak(abq_force)
             force_x, force_y = abq_eps[force_location], abq_force[force_location]
 
-            plt.figure(figsize=(8, 5), dpi=150)
-            plt.plot(eps, force, label="Analytical")
-            plt.plot(abq_eps, abq_force, label="Numerical")
-            plt.scatter(force_x, force_y, color="tab:orange", marker="x", label="Num. localization, force")
-            plt.xlim(-0.005, 1.1 * force_x)
-            plt.xlabel(r"Equivalent plastic strain $\bar{\varepsilon}$ [-]")
-            plt.ylabel(r"Resultant force $F$ [N]")
-            plt.title(fr"Resultant force $F$ in tension-torsion, $\alpha$ = {alpha}")
-            plt.legend()
-            plt.grid()
+            spec = figure_spec(fr"{folder}/ForceComparison{self.alphas_text_dictionary[alpha]}.png",
+                               fr"Resultant force $F$ in tension-torsion, $\alpha$ = {alpha}",
+                               r"Equivalent plastic strain $\bar{\varepsilon}$ [-]", r"Resultant force $F$ [N]",
+                               xlim=(-0.005, 1.1 * force_x), inputs=inputs)
+            add_line(spec, eps, force, label="Analytical")
+            add_line(spec, abq_eps, abq_force, label="Numerical")
+            add_scatter(spec, force_x, force_y, color="tab:orange", marker="x", label="Num. localization, force")
+            specs.append(spec)
 
-            if action == "save":
-                plt.savefig(fr"{folder}/ForceComparison{self.alphas_text_dictionary[alpha]}")
-            else:
-                plt.show()
+        return specs
 
+    # Triaxiality, Lode angle, von Mises stress and equivalent strain along the analytical strain path
+    def invariant_path(self, alpha, phi_type, strain_state_type, epsilon_23=None):
+        moment, force, eps, sigma_1, sigma_2, sigma_3 = self.solve_moment_force(alpha, phi_type, strain_state_type,
+                                                                                epsilon_23)
+        invariants = stress_invariants(sigma_1, sigma_2, sigma_3)
+        invariants["equivalent_strain"] = eps
 
-    def localization_prediction(self, alpha, phi_type, strain_state_type):
+        return invariants
+
+    def localization_prediction(self, alpha, phi_type, strain_state_type, tolerance=None):
         # There are three different localization detection methods for the analytical solution:
         # Considere, Hill, and Swift
         # For the numerical solution, there are also three:
         # Considere, peak load, and peak moment
 
         # --- Analytical section ---
-        eps, vm_stress, epsilon_1, epsilon_2, epsilon_3 = self.solve_strain_state(alpha, phi_type, strain_state_type)
+        # With a tolerance on the localization strain, the adaptive strain grid is used
+        epsilon_23 = None
+        if tolerance is not None:
+            epsilon_23 = self.adaptive_strain_grid(alpha, phi_type, strain_state_type, tolerance)[0]
 
         # Considere, analytical
-        ana_derivative, considere_analytical, ana_loc_y = considere_criterion(eps, vm_stress)
-
-        # Determine some "mean" strain ratio
-        strain_ratio = epsilon_3 / epsilon_1
-        mean_strain_ratio = np.mean(strain_ratio[~np.isnan(strain_ratio)])
-
-        phi = None
-        if phi_type == "approximation":
-            phi = 0.5 * np.arctan(4 / alpha)
-        elif phi_type == "exact":
-            phi = self.phi_dictionary[alpha]
-
-        alpha_s = -(np.tan(phi) ** 2)
-
-        # Then Swift and Hill localization strain
-        swift_major = 2 * self.hardening_n * ((1 + mean_strain_ratio + mean_strain_ratio ** 2)
-                                         / (2 + mean_strain_ratio + mean_strain_ratio ** 2 + 2 * mean_strain_ratio ** 3))
-        swift_result = eps[closest_value_finder(epsilon_1, swift_major)]
-        hill_major = self.hardening_n / (1 + mean_strain_ratio)
-        hill_result = eps[closest_value_finder(epsilon_1, hill_major)]
-
-        # --- WIP --- Different formulation for Hill ---
-        moment, force, eps, sigma_1, sigma_2, sigma_3 = self.solve_moment_force(alpha, phi_type, strain_state_type)
-        dsigma_1 = np.diff(sigma_1)
-        depsilon_1 = np.diff(epsilon_1)
-
-        new_hill_criterion = abs(dsigma_1 / depsilon_1 - (1 + mean_strain_ratio) * sigma_1[1:])
-        # print(eps[list(new_hill_criterion).index(np.min(new_hill_criterion))])
-
-        # --- WIP --- Stress triaxiality ---
-        mean_stress = (sigma_1 + sigma_2 + sigma_3) / 3
-        stress_triaxiality = mean_stress / vm_stress
-        # print(sigma_1, sigma_3, stress_triaxiality, alpha)
+        considere_analytical = self.localization_strains(alpha, phi_type, strain_state_type)[0, 0]
 
+        # Swift and Hill, applied along the strain path
+        swift_result, hill_result = self.necking_strains(alpha, phi_type, strain_state_type, epsilon_23)[0]
 
         # --- Numerical section ---
         # Read in .csv data as pandas DataFrame
-        filepath = rf"StressStrainCurves/Alpha{self.alphas_text_dictionary[alpha]}.csv"
-        forcepath = rf"AlphaResults/Alpha{self.alphas_text_dictionary[alpha]}.csv"
-        abq_data = pd.read_csv(filepath, delimiter=";")
+        abq_data = self.dataset("stress_strain", alpha)
 
         # Extract data
-        abq_eps = (abq_data["EPS [-]"].dropna()).to_numpy()
-        abq_vm = (abq_data["VM [Pa]"].dropna()).to_numpy() / 10 ** 6
+        abq_eps = abq_data.column("EPS [-]")
+        abq_vm = abq_data.column("VM [Pa]") / 10 ** 6
 
         # Considere, numerical
         num_derivative, considere_numerical, num_loc_y = considere_criterion(abq_eps, abq_vm)
 
         # Actual localization point (peak force)
-        force_data = pd.read_csv(forcepath, delimiter=";")
-        abq_force = (force_data["RF Mag [N]"].dropna()).to_numpy()
+        force_data = self.dataset("alpha_results", alpha)
+        abq_force = force_data.column("RF Mag [N]")
         force_localization_location = find_peak(abq_force)
         force_localization = abq_eps[force_localization_location]
 
-        abq_moment = -(force_data["RM2 [Nm]"].dropna()).to_numpy()
+        abq_moment = -force_data.column("RM2 [Nm]")
         moment_localization_location = find_peak(abq_moment)
         moment_localization = abq_eps[moment_localization_location]
 
@@ -279,6 +411,8 @@ class TensionTorsionSample:
                 considere_numerical, force_localization, moment_localization)
 
     def localization_figures(self, phi_type, strain_state_type):
+        import matplotlib.pyplot as plt
+
         results = np.empty((len(self.alphas), 6))
 
         for n, alpha in enumerate(self.alphas):
@@ -316,6 +450,8 @@ class TensionTorsionSample:
         plt.show()
 
     def combined_analytical_numerical_figures(self, phi_type, strain_state_type, action=None):
+        import matplotlib.pyplot as plt
+
         if strain_state_type == "2D":
             folder = "TwoDimensionalAnalytical"
         elif strain_state_type == "3D":
@@ -326,22 +462,24 @@ class TensionTorsionSample:
         fig, axs = plt.subplots(5, 2, figsize=(10, 20), dpi=150)
         positions = np.arange(10).reshape((5, 2))
 
+        # Solve all alphas at once
+        moments, forces, eps_curves, sigma_1s, sigma_2s, sigma_3s = self.solve_moment_forces(self.alphas, phi_type,
+                                                                                            strain_state_type)
+
         # Creates force figures, lops for every possible value of alpha
         for (n, alpha) in enumerate(self.alphas):
             plot_x_position = np.where(positions == n)[0][0]
             plot_y_position = np.where(positions == n)[1][0]
 
-            moment, force, eps, sigma_1, sigma_2, sigma_3 = self.solve_moment_force(alpha, phi_type, strain_state_type)
+            force, eps = forces[n], eps_curves[n]
 
             # Retrieve data from .csv files
-            filepath = rf"StressStrainCurves/Alpha{self.alphas_text_dictionary[alpha]}.csv"
-            forcepath = rf"AlphaResults/Alpha{self.alphas_text_dictionary[alpha]}.csv"
-            abq_data = pd.read_csv(filepath, delimiter=";")
-            load_data = pd.read_csv(forcepath, delimiter=";")
+            abq_data = self.dataset("stress_strain", alpha)
+            load_data = self.dataset("alpha_results", alpha)
 
             # Extract data
-            abq_force = (load_data["RF Mag [N]"].dropna()).to_numpy()
-            abq_eps = (abq_data["EPS [-]"].dropna()).to_numpy()[:len(abq_force)]
+            abq_force = load_data.column("RF Mag [N]")
+            abq_eps = abq_data.column("EPS [-]")[:len(abq_force)]
 
             # Actual localization point (peak force)
             force_location = find_peak(abq_force)
@@ -366,6 +504,8 @@ class TensionTorsionSample:
             plt.show()
 
     def combined_experimental_numerical_figures(self, action=None):
+        import matplotlib.pyplot as plt
+
         fig, axs = plt.subplots(5, 2, figsize=(10, 20), dpi=150)
         positions = np.arange(10).reshape((5, 2))
 
@@ -375,14 +515,13 @@ class TensionTorsionSample:
             plot_y_position = np.where(positions == n)[1][0]
 
             # Retrieve data from .csv files
-            path = rf"AlphaResults/Alpha{self.alphas_text_dictionary[alpha]}.csv"
-            data = pd.read_csv(path, sep=None)
+            data = self.dataset("alpha_results", alpha)
 
             # Normal data
-            sigma = (data["Sigma [MPa]"].dropna()).to_numpy()
-            extension = (data["Extension [-]"].dropna()).to_numpy()
-            paper_extension = (data["Paper extension [-]"].dropna()).to_numpy()
-            paper_sigma = (data["Paper Sigma [MPa]"].dropna()).to_numpy()
+            sigma = data.column("Sigma [MPa]")
+            extension = data.column("Extension [-]")
+            paper_extension = data.column("Paper extension [-]")
+            paper_sigma = data.column("Paper Sigma [MPa]")
 
             axs[plot_x_position, plot_y_position].plot(paper_extension, paper_sigma, label="Experimental")
             axs[plot_x_position, plot_y_position].plot(extension, sigma, label="Numerical")
@@ -410,14 +549,13 @@ class TensionTorsionSample:
             plot_y_position = np.where(positions == n)[1][0]
 
             # Retrieve data from .csv files
-            path = rf"AlphaResults/Alpha{self.alphas_text_dictionary[alpha]}.csv"
-            data = pd.read_csv(path, sep=None)
+            data = self.dataset("alpha_results", alpha)
 
             # Shear data
-            tau = (data["Tau [MPa]"].dropna()).to_numpy()
-            angle = (data["Actual angle [deg]"].dropna()).to_numpy()
-            paper_angle = (data["Paper angle [deg]"].dropna()).to_numpy()
-            paper_tau = (data["Paper Tau [MPa]"].dropna()).to_numpy()
+            tau = data.column("Tau [MPa]")
+            angle = data.column("Actual angle [deg]")
+            paper_angle = data.column("Paper angle [deg]")
+            paper_tau = data.column("Paper Tau [MPa]")
 
             axs[plot_x_position, plot_y_position].plot(paper_angle, paper_tau, label="Experimental")
             axs[plot_x_position, plot_y_position].plot(angle, tau, label="Numerical")
@@ -438,8 +576,9 @@ class TensionTorsionSample:
 
 
 
-simple = TensionTorsionSample()
-simple.combined_experimental_numerical_figures(action="save")
+if __name__ == "__main__":
+    simple = TensionTorsionSample()
+    simple.combined_experimental_numerical_figures(action="save")
 
 
 
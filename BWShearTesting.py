@@ -1,6 +1,5 @@
 # ----- Import libraries -----
 import numpy as np
-import matplotlib.pyplot as plt
 
 # Bressan-Williams for pure shear
 def pure_shear_bressan_williams(strain_ratio, critical_shear_stress):
@@ -48,21 +47,63 @@ def calibration_shear_stress(power_law_amplitude, power_law_exponent):
 
     return critical
 
+# Criteria of the forming limit envelope, with the strain ratio (beta) range where each one applies
+FORMING_LIMIT_CRITERIA = ("pure_shear", "surrounding_shear", "hill_local_necking")
+CRITERION_BETA_RANGES = ((-1.5, -0.5), (-1.5, -0.5), (-0.5, 0.0))
 
-beta_values = np.linspace(-1.5, -0.5, 101)
-beta_hill = np.linspace(-0.5, 0, 51)
+def forming_limit_envelope(power_law_amplitude, power_law_exponent, strain_ratio,
+                           beta_ranges=CRITERION_BETA_RANGES):
+    # Materials are given by broadcastable amplitude and exponent arrays, results have an extra last axis for beta
+    power_law_amplitude = np.asarray(power_law_amplitude, dtype=float)[..., np.newaxis]
+    power_law_exponent = np.asarray(power_law_exponent, dtype=float)[..., np.newaxis]
+    strain_ratio = np.asarray(strain_ratio, dtype=float)
 
-calibrated_shear_stress = calibration_shear_stress(1, 0.1)
+    critical_shear_stress = calibration_shear_stress(power_law_amplitude, power_law_exponent)
 
-pure_shear = pure_shear_bressan_williams(beta_values, calibrated_shear_stress)
-surrounding_shear = surrounding_shear_bressan_williams(beta_values, calibrated_shear_stress)
-hill_results = hill_local_necking(beta_hill, 1, 0.1)
+    # Critical sigma_1 of every criterion on the full (material, beta) grid, stacked on the first axis
+    with np.errstate(invalid="ignore", divide="ignore"):
+        criteria = np.stack(np.broadcast_arrays(
+            pure_shear_bressan_williams(strain_ratio, critical_shear_stress),
+            surrounding_shear_bressan_williams(strain_ratio, critical_shear_stress),
+            hill_local_necking(strain_ratio, power_law_amplitude, power_law_exponent)))
 
-plt.plot(beta_values, pure_shear, label="Pure shear")
-plt.plot(beta_values, surrounding_shear, label="Surrounding shear")
-plt.plot(beta_hill, hill_results, label="Hill local necking")
-plt.xlabel("Strain ratio (beta)")
-plt.ylabel("Normalized sigma 1")
-plt.legend()
-plt.grid()
-plt.show()
+    # Outside of its beta range, or where the formula has no real positive value, a criterion never governs
+    beta_ranges = np.asarray(beta_ranges, dtype=float)
+    applies = ((strain_ratio >= beta_ranges[:, 0, np.newaxis]) & (strain_ratio <= beta_ranges[:, 1, np.newaxis]))
+    applies = applies.reshape((len(beta_ranges),) + (1,) * (criteria.ndim - 2) + (len(strain_ratio),))
+    criteria = np.where(applies & np.isfinite(criteria) & (criteria > 0), criteria, np.inf)
+
+    # Lowest critical sigma_1 and the index of the criterion giving it, -1 where none applies
+    governing = np.argmin(criteria, axis=0)
+    envelope = np.min(criteria, axis=0)
+    governing = np.where(np.isfinite(envelope), governing, -1)
+    envelope = np.where(np.isfinite(envelope), envelope, np.nan)
+
+    return envelope, governing
+
+
+# Normalized sigma 1 at failure for both shear modes and Hill local necking
+def bressan_williams_figure():
+    import matplotlib.pyplot as plt
+
+    beta_values = np.linspace(-1.5, -0.5, 101)
+    beta_hill = np.linspace(-0.5, 0, 51)
+
+    calibrated_shear_stress = calibration_shear_stress(1, 0.1)
+
+    pure_shear = pure_shear_bressan_williams(beta_values, calibrated_shear_stress)
+    surrounding_shear = surrounding_shear_bressan_williams(beta_values, calibrated_shear_stress)
+    hill_results = hill_local_necking(beta_hill, 1, 0.1)
+
+    plt.plot(beta_values, pure_shear, label="Pure shear")
+    plt.plot(beta_values, surrounding_shear, label="Surrounding shear")
+    plt.plot(beta_hill, hill_results, label="Hill local necking")
+    plt.xlabel("Strain ratio (beta)")
+    plt.ylabel("Normalized sigma 1")
+    plt.legend()
+    plt.grid()
+    plt.show()
+
+
+if __name__ == "__main__":
+    bressan_williams_figure()
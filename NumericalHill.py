@@ -1,14 +1,13 @@
 # ----- Import libraries -----
 import numpy as np
-import pandas as pd
-import math
-import matplotlib.pyplot as plt
-import matplotlib.colors as mcolors
-import os
 
 # ----- Import class definition -----
 import AnalyticalTensionTorsionClean as Attc
-plt.rcParams['font.family'] = 'arial'
+from datasets import DATASET_PATHS
+from figures import report_pyplot
+from localization import hill_damage
+from hill_monitor import monitor_export
+from stress_states import strain_invariants
 
 
 # ----- Class definition -----
@@ -25,34 +24,61 @@ class NumericalHill(Attc.TensionTorsionSample):
         self.element_height = self.parallel_height / self.element_numbers
         self.thickness_ratio = self.element_height / self.parallel_thickness
 
+    # Plane stress triaxiality from the in-plane strain ratio
     @staticmethod
     def triaxiality(ratio):
-        return (1 + ratio) / (3 ** 0.5 * (1 + ratio + ratio ** 2) ** 0.5)
+        return strain_invariants(1.0, ratio)["triaxiality"]
+
+    # Shell exports are also split by shell size
+    def dataset_path(self, kind, alpha, shell_size=None):
+        return DATASET_PATHS[kind].format(alpha=self.alphas_text_dictionary[alpha],
+                                          shell_size=self.shell_size_dictionary.get(shell_size))
 
     def strain_ratio(self, alpha, shell_size):
         # Read data from correct .csv file, but only if it exists
-        path = fr"HillData/Alpha{self.alphas_text_dictionary[alpha]}/{self.shell_size_dictionary[shell_size]}Ratio.csv"
+        data = self.dataset("hill_ratio", alpha, shell_size)
 
-        if os.path.isfile(path):
-            data = pd.read_csv(path, sep=None)
-        else:
+        if data is None:
             return None, None
 
         # Average values from bottom and top integration points
-        peeq = (data["PEEQMAX"].values + data["PEEQMIN"].values) / 2
-        major_strain = (data["PE1MAX"].values + data["PE1MIN"].values) / 2
-        minor_strain = (data["PE2MAX"].values + data["PE2MIN"].values) / 2
+        peeq = (data["PEEQMAX"] + data["PEEQMIN"]) / 2
+        major_strain = (data["PE1MAX"] + data["PE1MIN"]) / 2
+        minor_strain = (data["PE2MAX"] + data["PE2MIN"]) / 2
         strain_ratio = minor_strain / major_strain
 
         return peeq, strain_ratio
 
+    # Triaxiality, Lode angle and equivalent strain along a shell run, None if it was not run
+    def shell_invariants(self, alpha, shell_size):
+        data = self.dataset("hill_ratio", alpha, shell_size)
+
+        if data is None:
+            return None
+
+        # Average of the bottom and top integration points, as in strain_ratio
+        peeq = (data["PEEQMAX"] + data["PEEQMIN"]) / 2
+        major_strain = (data["PE1MAX"] + data["PE1MIN"]) / 2
+        minor_strain = (data["PE2MAX"] + data["PE2MIN"]) / 2
+
+        invariants = strain_invariants(major_strain, minor_strain)
+        invariants["peeq"] = peeq
+
+        return invariants
+
     def non_proportionality(self, shell_size):
+        import matplotlib.colors as mcolors
+        plt = report_pyplot()
+
         # Initialize figure
         plt.figure(figsize=(8, 5), dpi=150)
 
         # Make array of standard matplotlib colors as strings
         colors = np.array(list(mcolors.TABLEAU_COLORS.items()))[:, 0]
 
+        # Hill predictions for all alphas at once
+        predictions = self.hill_predictions(self.alphas, [shell_size])[:, 0]
+
         # Plot loading path for each value of alpha
         for (n, alpha) in enumerate(self.alphas):
             # Make sure colors are the same for the scatters
@@ -74,9 +100,8 @@ class NumericalHill(Attc.TensionTorsionSample):
                 plt.scatter(self.triaxiality(nonnan_strain_ratio[0]), nonzero_peeq[0], marker="x", color=color)
 
                 # Plot localization points
-                localization_peeq, localization_indicator, localization_strain_ratio = self.hill_prediction(alpha, shell_size)
-                localization_triaxiality = self.triaxiality(localization_strain_ratio)
-                plt.scatter(localization_triaxiality, localization_peeq, marker="o", color=color)
+                localization_triaxiality = self.triaxiality(predictions[n]["strain_ratio"])
+                plt.scatter(localization_triaxiality, predictions[n]["peeq"], marker="o", color=color)
 
         # Plot Hill prediction path
         hill_alphas = np.linspace(-1, 0, 1001)
@@ -94,43 +119,82 @@ class NumericalHill(Attc.TensionTorsionSample):
         plt.tight_layout()
         plt.show()
 
-    #
+    # Structured result of the Hill damage prediction for one run
+    @staticmethod
+    def hill_dtype():
+        return np.dtype([("alpha", float), ("shell_size", float), ("found", bool), ("localized", bool),
+                         ("increment", int), ("peeq", float), ("indicator", float), ("strain_ratio", float)])
+
+    # Hill damage prediction for all combinations of alpha and shell size at once
+    def hill_predictions(self, alphas=None, shell_sizes=None):
+        if alphas is None:
+            alphas = self.alphas
+        if shell_sizes is None:
+            shell_sizes = self.shell_sizes
+
+        results = np.zeros((len(alphas), len(shell_sizes)), dtype=self.hill_dtype())
+        results["alpha"] = np.asarray(alphas, dtype=float)[:, None]
+        results["shell_size"] = np.asarray(shell_sizes, dtype=float)[None, :]
+        results["increment"] = -1
+        results[["peeq", "indicator", "strain_ratio"]] = (np.nan, np.nan, np.nan)
+
+        # Collect the runs that exist, the result stays nan for missing files
+        runs = []
+        for (n, alpha) in enumerate(alphas):
+            for (m, shell_size) in enumerate(shell_sizes):
+                peeq, strain_ratio = self.strain_ratio(alpha, shell_size)
+                if peeq is not None:
+                    runs.append((n, m, peeq, strain_ratio))
+
+        if not runs:
+            return results
+
+        # Pad all runs to the same length and evaluate them together
+        length = max(len(peeq) for (n, m, peeq, strain_ratio) in runs)
+        peeqs = np.full((len(runs), length), np.nan)
+        strain_ratios = np.full((len(runs), length), np.nan)
+        for (k, (n, m, peeq, strain_ratio)) in enumerate(runs):
+            peeqs[k, :len(peeq)] = peeq
+            strain_ratios[k, :len(strain_ratio)] = strain_ratio
+
+        indicator, increment = hill_damage(peeqs, strain_ratios, self.hardening_n)
+
+        # Localized runs give the PEEQ at the start of the critical increment, others keep a PEEQ of zero
+        rows, columns = np.array([(n, m) for (n, m, peeq, strain_ratio) in runs]).transpose()
+        localized = increment < indicator.shape[1]
+        last = np.where(localized, increment, indicator.shape[1] - 1)
+        runs_index = np.arange(len(runs))
+
+        found = results[rows, columns]
+        found["found"] = True
+        found["localized"] = localized
+        found["increment"] = np.where(localized, increment, -1)
+        found["indicator"] = indicator[runs_index, last]
+        found["peeq"] = np.where(localized, peeqs[runs_index, last], 0.0)
+        found["strain_ratio"] = np.where(localized, strain_ratios[runs_index, last + 1], np.nan)
+        results[rows, columns] = found
+
+        return results
+
+    # Hill damage prediction for a single run, see hill_predictions
     def hill_prediction(self, alpha, shell_size):
-        # Get PEEQ and strain ratio
-        peeq, strain_ratio = self.strain_ratio(alpha, shell_size)
-
-        # Check if peeq and strain ratio exist (in case the file doesn't exist)
-        if peeq is None or strain_ratio is None:
-            return None, None
-
-        # Calculate PEEQ increments for cumulative use
-        peeq_increments = np.diff(peeq)
-
-        # Set "failure" indicator to zero
-        failure_indicator = 0
+        return self.hill_predictions([alpha], [shell_size])[0, 0]
 
-        # Loop through each PEEQ increment
-        for (n, increment) in enumerate(peeq_increments):
-            # Filter all nan values from strain ratio array
-            if not math.isnan(strain_ratio[n + 1]):
-                # Calculate failure strain at this strain ratio using Hill's criterion
-                failure_strain = self.hardening_n / (1 + strain_ratio[n + 1])
-
-                # Increment failure indicator using this PEEQ increment
-                failure_increment = increment / failure_strain
-                failure_indicator += failure_increment
-
-            # "Failure" (localization) occurs when the indicator becomes unity
-            if failure_indicator >= 1:
-                # Then return PEEQ, indicator and the strain ratio
-                return peeq[n], failure_indicator, strain_ratio[n + 1]
-
-        return 0, failure_indicator
+    # Follow the export of a running shell job, returns as soon as the Hill indicator reaches unity
+    def monitor_hill_run(self, alpha, shell_size, chunk_size=1000, poll_interval=1.0, idle_timeout=60.0,
+                         follow=True):
+        return monitor_export(self.dataset_path("hill_ratio", alpha, shell_size), self.hardening_n,
+                              chunk_size, poll_interval, idle_timeout, follow)
 
     def hill_comparison(self, phi_type, strain_state_type, shell_size):
+        plt = report_pyplot()
+
         # Result array
         results = np.empty((len(self.alphas), 7))
 
+        # Shell results for all alphas at once
+        shell_hills = self.hill_predictions(self.alphas, [shell_size])["peeq"][:, 0]
+
         # Collect localization results
         for (n, alpha) in enumerate(self.alphas):
             # All results BUT shells
@@ -138,12 +202,9 @@ class NumericalHill(Attc.TensionTorsionSample):
              hill_result, considere_numerical,
              force_localization, moment_localization) = self.localization_prediction(alpha, phi_type, strain_state_type)
 
-            # Shell results
-            shell_hill = self.hill_prediction(alpha, shell_size)[0]
-
             # Save in result array
             result_vector = (considere_analytical, swift_result, hill_result, considere_numerical,
-                             force_localization, moment_localization, shell_hill)
+                             force_localization, moment_localization, shell_hills[n])
             results[n] = result_vector
 
         (considere_analytical, swift_result, hill_result,
@@ -185,18 +246,12 @@ class NumericalHill(Attc.TensionTorsionSample):
         plt.show()
 
     def shell_convergence(self, alpha):
-        # Result list
-        shell_results = []
-        actual_sizes = []
-
-        # Get shell results for all sizes
-        for n, size in enumerate(self.shell_sizes):
-            result = self.hill_prediction(alpha, size)[0]
-            if result is None:
-                pass
-            else:
-                shell_results.append(result)
-                actual_sizes.append(n)
+        plt = report_pyplot()
+
+        # Get shell results for all sizes, skipping the ones that were not run
+        predictions = self.hill_predictions([alpha], self.shell_sizes)[0]
+        actual_sizes = np.flatnonzero(predictions["found"])
+        shell_results = predictions["peeq"][actual_sizes]
 
         # Get axisymmetric results (truth)
         (considere_analytical, swift_result,
@@ -219,6 +274,9 @@ class NumericalHill(Attc.TensionTorsionSample):
         plt.show()
 
     def shell_thickness_plot(self):
+        import pandas as pd
+        plt = report_pyplot()
+
         # Shell thicknesses
         shell_thickness_data = pd.read_csv("ShellThicknesses.csv", sep=None).to_numpy().transpose()
 
@@ -256,16 +314,14 @@ class NumericalHill(Attc.TensionTorsionSample):
         plt.show()
 
     def get_abaqus_data(self, alpha):
-        # Make ABAQUS path with ductile damage (DD)
-        abaqus_path = fr"HillData/Alpha{self.alphas_text_dictionary[alpha]}/5Ratio_DD.csv"
-        if os.path.isfile(abaqus_path):
-            data = pd.read_csv(abaqus_path, sep=None)
-        else:
+        # ABAQUS export with ductile damage (DD), only available for the coarsest shells
+        data = self.dataset("hill_damage", alpha, 5.0)
+        if data is None:
             return None
 
         # Get PEEQ and DUCTCRT values
-        peeq = data["PEEQ"].values
-        damage = data["DUCTCRT"].values
+        peeq = data["PEEQ"]
+        damage = data["DUCTCRT"]
 
         # Determine point at which damage becomes unity
         localization_point = (np.where(damage == 1))[0][0]
@@ -275,23 +331,23 @@ class NumericalHill(Attc.TensionTorsionSample):
 
 
     def abaqus_python_comparison(self, phi_type, strain_state_type):
+        plt = report_pyplot()
+
         # Comparison based on loading parameter alpha
         (abaqus_results, python_results, fine_results, finer_results, finest_results,
          axisym_results, used_alphas) = [], [], [], [], [], [], []
 
+        # Shell predictions for ratios 5.0, 2.5, 1.0 and 0.3
+        predictions = self.hill_predictions(self.alphas, [5, 3, 1, 0.3])
+
         for n, alpha in enumerate(self.alphas):
             # ABAQUS data
             abaqus_peeq = self.get_abaqus_data(alpha)
 
             # Python data
-            python_peeq = self.hill_prediction(alpha, 5)[0]
-
-            # Finer data (2.5 , 1, 0.3)
-            fine_peeq = self.hill_prediction(alpha, 3)[0]
-            finer_peeq = self.hill_prediction(alpha, 1)[0]
-            finest_peeq = self.hill_prediction(alpha, 0.3)[0]
+            python_peeq, fine_peeq, finer_peeq, finest_peeq = predictions[n]["peeq"]
 
-            if abaqus_peeq is None or python_peeq is None:
+            if abaqus_peeq is None or not predictions[n, 0]["found"]:
                 pass
             else:
                 # Save ABAQUS and Python data
@@ -351,8 +407,9 @@ class NumericalHill(Attc.TensionTorsionSample):
 
 
 
-hill = NumericalHill()
-# hill.shell_convergence(0.5)
-# hill.non_proportionality(0.3)
-# hill.shell_thickness_plot()
-hill.abaqus_python_comparison("approximation", "3D")
\ No newline at end of file
+if __name__ == "__main__":
+    hill = NumericalHill()
+    # hill.shell_convergence(0.5)
+    # hill.non_proportionality(0.3)
+    # hill.shell_thickness_plot()
+    hill.abaqus_python_comparison("approximation", "3D")
\ No newline at end of file
@@ -1,6 +1,164 @@
 # ----- Import libraries -----
 import numpy as np
-import pandas as pd
+import os
+
+from hardening import PowerLaw
+
+
+# ----- Plastic table settings -----
+# Default plastic strains of a *PLASTIC table
+PLASTIC_STRAINS = np.linspace(0, 1, 101)
+
+
+# ----- Function definitions -----
+# Structured dtype holding the plastic table of one material, the name field fits the longest name
+def plastic_table_dtype(n_points, name_length=64):
+    return np.dtype([("name", f"U{max(name_length, 1)}"), ("elastic_modulus", float), ("yield_strength", float),
+                     ("hardening_exponent", float), ("plastic_strain", float, (n_points,)),
+                     ("yield_stress", float, (n_points,))])
+
+
+def refined_strains(hardening_law, n_points, max_strain=1.0, uniform_fraction=0.25, n_fine=2001):
+    # Plastic strains with the linear interpolation error spread evenly, the point density follows sqrt(|d2 sigma|)
+    # A uniform fraction of the points keeps the spacing bounded where the curve is straight
+    fine_strains = np.linspace(0, max_strain, n_fine)
+    curvature = np.abs(np.gradient(np.atleast_2d(hardening_law.tangent_modulus(fine_strains)), fine_strains, axis=-1))
+    density = np.sqrt(curvature)
+
+    # Cumulative point density per material, from 0 to 1
+    cumulative = np.concatenate((np.zeros((len(density), 1)),
+                                 np.cumsum((density[:, 1:] + density[:, :-1]) / 2, axis=1)), axis=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cumulative = np.nan_to_num(cumulative / cumulative[:, -1:])
+    cumulative = (1 - uniform_fraction) * cumulative + uniform_fraction * fine_strains / max_strain
+
+    # Offsetting the materials by 2 sorts the whole matrix, so one binary search inverts all of them
+    n_materials = len(cumulative)
+    offsets = 2 * np.arange(n_materials)[:, np.newaxis]
+    targets = np.linspace(0, 1, n_points)[np.newaxis, :] + offsets
+    index = np.searchsorted((cumulative + offsets).ravel(), targets.ravel()).reshape(targets.shape)
+    index = np.clip(index - n_fine * np.arange(n_materials)[:, np.newaxis], 1, n_fine - 1)
+
+    # Linear interpolation of the strain within the fine interval
+    rows = np.arange(n_materials)[:, np.newaxis]
+    before, after = cumulative[rows, index - 1], cumulative[rows, index]
+    fraction = np.clip((targets - offsets - before) / (after - before), 0, 1)
+    strains = fine_strains[index - 1] + fraction * (fine_strains[index] - fine_strains[index - 1])
+
+    # ABAQUS needs the table to start at zero plastic strain
+    strains[:, 0] = 0
+
+    return strains
+
+
+def plastic_tables(elastic_modulus, yield_strength, hardening_exponent, names=None, plastic_strains=None,
+                   refine=False, n_points=101, chunk_size=1000):
+    # Plastic tables for many power law materials, yielded in chunks so memory stays bounded
+    elastic_modulus, yield_strength, hardening_exponent = np.broadcast_arrays(
+        *(np.atleast_1d(np.asarray(values, dtype=float)) for values in (elastic_modulus, yield_strength,
+                                                                         hardening_exponent)))
+    n_materials = len(elastic_modulus)
+
+    if names is None:
+        names = [f"material{n}" for n in range(n_materials)]
+    if len(names) != n_materials:
+        raise ValueError("Please give one name per material!")
+    name_length = max((len(name) for name in names), default=1)
+    if plastic_strains is None:
+        plastic_strains = np.linspace(0, 1, n_points)
+    if not refine:
+        n_points = len(plastic_strains)
+
+    for start in range(0, n_materials, chunk_size):
+        stop = min(start + chunk_size, n_materials)
+        chunk = np.empty(stop - start, dtype=plastic_table_dtype(n_points, name_length))
+        chunk["name"] = names[start:stop]
+        chunk["elastic_modulus"] = elastic_modulus[start:stop]
+        chunk["yield_strength"] = yield_strength[start:stop]
+        chunk["hardening_exponent"] = hardening_exponent[start:stop]
+
+        # Parameters as column vectors, so one law describes the whole chunk
+        hardening_law = PowerLaw(chunk["elastic_modulus"][:, np.newaxis], chunk["yield_strength"][:, np.newaxis],
+                                 chunk["hardening_exponent"][:, np.newaxis],
+                                 strain_offset=(chunk["yield_strength"] / chunk["elastic_modulus"])[:, np.newaxis])
+
+        if refine:
+            chunk["plastic_strain"] = refined_strains(hardening_law, n_points, max_strain=plastic_strains[-1])
+        else:
+            chunk["plastic_strain"] = plastic_strains
+        chunk["yield_stress"] = hardening_law.flow_stress(chunk["plastic_strain"])
+
+        yield chunk
+
+
+def table_rows(table):
+    # (stress, strain) rows as written by pandas, at full precision
+    return "".join(f"{stress!r},{strain!r}\n" for (stress, strain) in zip(table["yield_stress"].tolist(),
+                                                                          table["plastic_strain"].tolist()))
+
+
+def write_plastic_csvs(tables, folder="."):
+    # One headerless .csv per material, same format as PowerLawMaterial.plastic_behavior
+    paths = []
+    for chunk in tables:
+        for table in chunk:
+            path = os.path.join(folder, f"{table['name']}.csv")
+            with open(path, "w") as file:
+                file.write(table_rows(table))
+            paths.append(path)
+
+    return paths
+
+
+def write_plastic_includes(tables, folder="."):
+    # One ABAQUS include file per material, used as *INCLUDE, INPUT=<name>.inp inside its *MATERIAL block
+    paths = []
+    for chunk in tables:
+        for table in chunk:
+            path = os.path.join(folder, f"{table['name']}.inp")
+            with open(path, "w") as file:
+                file.write(f"** Power law, E = {table['elastic_modulus']:.6g} Pa, "
+                           f"yield strength = {table['yield_strength']:.6g} Pa, n = {table['hardening_exponent']:.6g}\n")
+                file.write("*PLASTIC\n")
+                file.write(table_rows(table))
+            paths.append(path)
+
+    return paths
+
+
+def write_plastic_archive(tables, path, n_materials):
+    # All tables in one structured .npy file, filled chunk by chunk and read back with np.load(path, mmap_mode="r")
+    archive = None
+    start = 0
+    for chunk in tables:
+        if archive is None:
+            archive = np.lib.format.open_memmap(path, mode="w+", dtype=chunk.dtype, shape=(n_materials,))
+        archive[start:start + len(chunk)] = chunk
+        start += len(chunk)
+
+    if archive is not None:
+        archive.flush()
+
+    return path
+
+
+def batch_plastic_behavior(elastic_modulus, yield_strength, hardening_exponent, names=None, output="include",
+                           path=".", refine=False, n_points=101, chunk_size=1000):
+    # Output is a folder for the include and csv files, or the .npy file of the archive
+    tables = plastic_tables(elastic_modulus, yield_strength, hardening_exponent, names, refine=refine,
+                            n_points=n_points, chunk_size=chunk_size)
+
+    if output == "include":
+        return write_plastic_includes(tables, path)
+    elif output == "csv":
+        return write_plastic_csvs(tables, path)
+    elif output == "archive":
+        n_materials = np.broadcast(np.atleast_1d(elastic_modulus), np.atleast_1d(yield_strength),
+                                   np.atleast_1d(hardening_exponent)).size
+        return write_plastic_archive(tables, path, n_materials)
+    else:
+        raise ValueError("Please select either include, csv or archive as output!")
+
 
 # Power law material definition
 class PowerLawMaterial:
@@ -15,13 +173,11 @@ class PowerLawMaterial:
         return yield_strain
 
     def plastic_behavior(self):
-        plastic_strains = np.linspace(0, 1, 101)
-        fraction = self.elastic_modulus * (self.elastic_behavior() + plastic_strains) / self.yield_strength
-        yield_stresses = self.yield_strength * np.power(fraction, self.hardening_exponent)
+        tables = plastic_tables(self.elastic_modulus, self.yield_strength, self.hardening_exponent,
+                                [self.dataframe_name], PLASTIC_STRAINS)
+        write_plastic_csvs(tables)
 
-        plastic_array = np.vstack((yield_stresses, plastic_strains)).transpose()
-        plastic_dataframe = pd.DataFrame(plastic_array)
-        plastic_dataframe.to_csv(f"{self.dataframe_name}.csv", header=None, index=False)
 
-test_material = PowerLawMaterial(68e9, 300e6, 0.01, "baseline")
-test_material.plastic_behavior()
+if __name__ == "__main__":
+    test_material = PowerLawMaterial(68e9, 300e6, 0.01, "baseline")
+    test_material.plastic_behavior()
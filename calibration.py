@@ -0,0 +1,199 @@
+# ----- Import libraries -----
+import numpy as np
+
+from datasets import load_dataset
+from hardening import PowerLaw, SwiftLaw, VoceLaw, SwiftVoceLaw
+from localization import find_peak
+
+
+# ----- Calibration settings -----
+# Fitted parameters of every law, the power law keeps the elastic modulus of the sample fixed
+LAW_PARAMETERS = {"power_law": ("yield_strength", "hardening_n"),
+                  "swift": ("strength_coefficient", "eps_0", "hardening_n"),
+                  "voce": ("yield_strength", "saturation_stress", "saturation_rate"),
+                  "swift_voce": ("strength_coefficient", "eps_0", "hardening_n", "yield_strength",
+                                 "saturation_stress", "saturation_rate", "weight")}
+
+# Columns of the ABAQUS exports compared with the analytical model, the moment is exported negative
+CURVE_COLUMNS = {"vm": ("stress_strain", "VM [Pa]", 1.0), "moment": ("alpha_results", "RM2 [Nm]", -1.0),
+                 "force": ("alpha_results", "RF Mag [N]", 1.0)}
+
+
+# ----- Function definitions -----
+def hardening_law(law, parameters, elastic_modulus=68e9, plastic_strain=False):
+    # Plastic strain tables (e.g. MaterialCalibrations.csv) start at the yield strength, so the power law is offset
+    if law == "power_law":
+        yield_strength, hardening_n = parameters
+        strain_offset = yield_strength / elastic_modulus if plastic_strain else 0.0
+        return PowerLaw(elastic_modulus, yield_strength, hardening_n, strain_offset)
+    elif law == "swift":
+        return SwiftLaw(*parameters)
+    elif law == "voce":
+        return VoceLaw(*parameters)
+    elif law == "swift_voce":
+        return SwiftVoceLaw(SwiftLaw(*parameters[:3]), VoceLaw(*parameters[3:6]), parameters[6])
+    else:
+        raise ValueError("Please select either power_law, swift, voce or swift_voce as hardening law!")
+
+
+def initial_parameters(law, strains, stresses, elastic_modulus=68e9):
+    # Rough starting point from the first and last point of the curve
+    strains, stresses = np.asarray(strains, dtype=float), np.asarray(stresses, dtype=float)
+    initial_stress, final_stress = stresses[0], stresses[-1]
+    hardening_n = max(np.log(final_stress / initial_stress) / np.log(elastic_modulus * strains[-1] / initial_stress),
+                      1e-3)
+
+    if law == "power_law":
+        return np.array([initial_stress, hardening_n])
+    elif law == "swift":
+        return np.array([final_stress / strains[-1] ** 0.1, 0.01, 0.1])
+    elif law == "voce":
+        return np.array([initial_stress, final_stress - initial_stress, 10 / strains[-1]])
+    elif law == "swift_voce":
+        return np.concatenate((initial_parameters("swift", strains, stresses, elastic_modulus),
+                               initial_parameters("voce", strains, stresses, elastic_modulus), [0.5]))
+    else:
+        raise ValueError("Please select either power_law, swift, voce or swift_voce as hardening law!")
+
+
+def levenberg_marquardt(residuals, initial, max_iterations=200, tolerance=1e-10, step=1e-7):
+    # Least squares in the logarithm of the parameters, so they stay positive and are scaled alike
+    # The status is "converged", "max_iterations" (cap reached) or "damping" (no step lowers the cost any more)
+    x = np.log(np.asarray(initial, dtype=float))
+    residual = residuals(np.exp(x))
+    cost = residual @ residual
+    damping = 1e-3
+
+    iteration = 0
+    for iteration in range(1, max_iterations + 1):
+        # Forward difference Jacobian, one residual evaluation per parameter
+        jacobian = np.empty((len(residual), len(x)))
+        for n in range(len(x)):
+            shifted = x.copy()
+            shifted[n] += step
+            jacobian[:, n] = (residuals(np.exp(shifted)) - residual) / step
+
+        gradient = jacobian.transpose() @ residual
+        normal = jacobian.transpose() @ jacobian
+
+        # Raise the damping until the step lowers the cost
+        while True:
+            update = np.linalg.solve(normal + damping * np.diag(np.maximum(np.diag(normal), 1e-12)), -gradient)
+            trial_residual = residuals(np.exp(x + update))
+            trial_cost = trial_residual @ trial_residual
+
+            if np.isfinite(trial_cost) and trial_cost <= cost:
+                damping = max(damping / 3, 1e-12)
+                break
+            damping *= 4
+            if damping > 1e12:
+                return np.exp(x), cost, iteration, "damping"
+
+        x, residual = x + update, trial_residual
+        converged = cost - trial_cost <= tolerance * cost or np.max(np.abs(update)) <= tolerance
+        cost = trial_cost
+
+        if converged:
+            return np.exp(x), cost, iteration, "converged"
+
+    return np.exp(x), cost, iteration, "max_iterations"
+
+
+def abaqus_curves(sample, alphas, targets=("vm",)):
+    # ABAQUS curves of all alphas padded to one matrix, from first yield up to the force peak (localization)
+    curves = []
+    for alpha in alphas:
+        eps = sample.dataset("stress_strain", alpha).column("EPS [-]")
+        force = sample.dataset("alpha_results", alpha).column("RF Mag [N]")
+        end = find_peak(force) + 1
+
+        plastic = eps[:end] > 0
+        columns = []
+        for target in targets:
+            kind, name, sign = CURVE_COLUMNS[target]
+            columns.append(sign * sample.dataset(kind, alpha).column(name)[:end][plastic])
+        curves.append((eps[:end][plastic], columns))
+
+    n_points = max(len(eps) for (eps, columns) in curves)
+    eps = np.zeros((len(alphas), n_points))
+    values = np.zeros((len(targets), len(alphas), n_points))
+    mask = np.zeros((len(alphas), n_points), dtype=bool)
+    for (n, (curve_eps, columns)) in enumerate(curves):
+        eps[n, :len(curve_eps)] = curve_eps
+        mask[n, :len(curve_eps)] = True
+        for (m, column) in enumerate(columns):
+            values[m, n, :len(curve_eps)] = column
+
+    # Every curve is weighted by its largest value, so moments, forces and stresses count alike
+    scales = np.max(np.abs(values), axis=-1, keepdims=True)
+
+    return {"alphas": np.asarray(alphas, dtype=float), "targets": tuple(targets), "eps": eps, "values": values,
+            "scales": scales, "mask": mask}
+
+
+def curve_residuals(sample, law, curves, phi_type="approximation", strain_state_type="3D"):
+    # Analytical model at the ABAQUS strains of every alpha at once, eps is linear in e23 on the proportional path
+    eps_per_e23 = sample.solve_strain_states(curves["alphas"], phi_type, strain_state_type, [1.0])[0]
+    epsilon_23 = curves["eps"] / eps_per_e23
+
+    # The solver uses the law of the sample, which is put back afterwards, also when the solver fails
+    sample_law, sample.hardening_law = sample.hardening_law, law
+    try:
+        moment, force, eps, sigma_1, sigma_2, sigma_3 = sample.solve_moment_forces(curves["alphas"], phi_type,
+                                                                                   strain_state_type, epsilon_23)
+    finally:
+        sample.hardening_law = sample_law
+
+    # von Mises stress of the principal stresses [MPa]
+    vm_stress = (((sigma_1 - sigma_2) ** 2 + (sigma_2 - sigma_3) ** 2 + (sigma_3 - sigma_1) ** 2) / 2) ** 0.5
+    model = {"vm": vm_stress * 10 ** 6, "moment": moment, "force": force}
+
+    residuals = [((model[target] - curves["values"][n]) / curves["scales"][n])[curves["mask"]]
+                 for (n, target) in enumerate(curves["targets"])]
+
+    return np.concatenate(residuals)
+
+
+def calibrate_sample(sample, law="power_law", alphas=None, targets=("vm",), phi_type="approximation",
+                     strain_state_type="3D", initial=None, max_iterations=200):
+    # Fits the hardening law to the ABAQUS curves of all alphas, the sample keeps the calibrated law
+    if alphas is None:
+        alphas = sample.alphas
+    curves = abaqus_curves(sample, alphas, targets)
+
+    if initial is None:
+        stresses = sample.dataset("stress_strain", alphas[0]).column("VM [Pa]")
+        initial = initial_parameters(law, [sample.yield_strain, 1.0], [sample.yield_strength, np.max(stresses)],
+                                     sample.elastic_modulus)
+
+    def residuals(parameters):
+        return curve_residuals(sample, hardening_law(law, parameters, sample.elastic_modulus), curves, phi_type,
+                               strain_state_type)
+
+    parameters, cost, iterations, status = levenberg_marquardt(residuals, initial, max_iterations)
+    sample.hardening_law = hardening_law(law, parameters, sample.elastic_modulus)
+
+    return {"law": law, "parameters": dict(zip(LAW_PARAMETERS[law], parameters)), "hardening_law": sample.hardening_law,
+            "rms": (cost / np.count_nonzero(curves["mask"]) / len(targets)) ** 0.5, "iterations": iterations,
+            "converged": status == "converged", "status": status}
+
+
+def calibrate_table(path="MaterialCalibrations.csv", column="VMStress", law="power_law", elastic_modulus=68e9,
+                    initial=None, max_iterations=200):
+    # Fits the hardening law to a plastic strain table, e.g. the von Mises or Hill48 column of MaterialCalibrations.csv
+    data = load_dataset(path)
+    strains, stresses = data.column("PlasticStrain"), data.column(column)
+
+    if initial is None:
+        initial = initial_parameters(law, strains + stresses[0] / elastic_modulus, stresses, elastic_modulus)
+
+    def residuals(parameters):
+        law_stresses = hardening_law(law, parameters, elastic_modulus, plastic_strain=True).flow_stress(strains)
+        return (law_stresses - stresses) / np.max(stresses)
+
+    parameters, cost, iterations, status = levenberg_marquardt(residuals, initial, max_iterations)
+
+    return {"law": law, "parameters": dict(zip(LAW_PARAMETERS[law], parameters)),
+            "hardening_law": hardening_law(law, parameters, elastic_modulus, plastic_strain=True),
+            "rms": (cost / len(strains)) ** 0.5, "iterations": iterations,
+            "converged": status == "converged", "status": status}
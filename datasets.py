@@ -0,0 +1,175 @@
+# ----- Import libraries -----
+import numpy as np
+import hashlib
+import json
+import os
+
+from collections import OrderedDict
+
+
+# ----- Cache location and dataset kinds -----
+CACHE_FOLDER = ".dataset_cache"
+
+DATASET_PATHS = {"stress_strain": "StressStrainCurves/Alpha{alpha}.csv",
+                 "alpha_results": "AlphaResults/Alpha{alpha}.csv",
+                 "hill_ratio": "HillData/Alpha{alpha}/{shell_size}Ratio.csv",
+                 "hill_damage": "HillData/Alpha{alpha}/{shell_size}Ratio_DD.csv"}
+
+
+# ----- Function definitions -----
+def file_hash(path):
+    sha1 = hashlib.sha1()
+    with open(path, "rb") as file:
+        for block in iter(lambda: file.read(1 << 20), b""):
+            sha1.update(block)
+
+    return sha1.hexdigest()
+
+def sniff_delimiter(path):
+    # The exports use either ; or , so the first line is enough, and the fast C parser can be used afterwards
+    with open(path, encoding="utf-8-sig") as file:
+        header = file.readline()
+
+    return ";" if header.count(";") > header.count(",") else ","
+
+def cache_paths(path, cache_folder):
+    # Keyed by a hash of the absolute path, so absolute paths and .. stay inside the cache folder
+    name = os.path.splitext(os.path.basename(path))[0]
+    key = hashlib.sha1(os.path.abspath(path).encode()).hexdigest()[:16]
+    base = os.path.join(cache_folder, f"{name}-{key}")
+
+    return base + ".npy", base + ".json"
+
+def replace_file(path, write, mode="w"):
+    # Written to a temporary file of this process first, so other processes never read a half-written file
+    temporary_path = f"{path}.{os.getpid()}.tmp"
+    with open(temporary_path, mode) as file:
+        write(file)
+    os.replace(temporary_path, path)
+
+
+# ----- Class definition for a cached dataset -----
+class Dataset:
+    def __init__(self, columns, values):
+        self.columns = list(columns)
+        self.values = values
+        self.column_index = {name: n for (n, name) in enumerate(self.columns)}
+
+    def __getitem__(self, name):
+        # Full column including the nan padding of shorter columns
+        return self.values[:, self.column_index[name]]
+
+    def __contains__(self, name):
+        return name in self.column_index
+
+    def column(self, name):
+        # Column without nan values, same as dropna() on the DataFrame
+        values = self[name]
+
+        return np.asarray(values[~np.isnan(values)])
+
+    def to_numpy(self):
+        return np.asarray(self.values)
+
+
+def parse_csv(path, header=0):
+    # Only needed when the cache is (re)built
+    import pandas as pd
+
+    data = pd.read_csv(path, delimiter=sniff_delimiter(path), header=header, encoding="utf-8-sig")
+    columns = [str(name) for name in data.columns]
+
+    return columns, data.to_numpy(dtype=float)
+
+def load_dataset(path, header=0, cache_folder=CACHE_FOLDER):
+    # Typed binary copy of a .csv export, parsed once and memory-mapped afterwards
+    values_path, meta_path = cache_paths(path, cache_folder)
+    source = os.stat(path)
+
+    if os.path.isfile(values_path) and os.path.isfile(meta_path):
+        with open(meta_path) as file:
+            meta = json.load(file)
+
+        # Unchanged modification time and size, use the cache directly
+        fresh = meta["mtime_ns"] == source.st_mtime_ns and meta["size"] == source.st_size
+
+        # Otherwise the file may only have been touched, in which case the hash still matches
+        if not fresh and meta["size"] == source.st_size and meta["sha1"] == file_hash(path):
+            meta["mtime_ns"] = source.st_mtime_ns
+            replace_file(meta_path, lambda file: json.dump(meta, file))
+            fresh = True
+
+        if fresh and meta["header"] == header:
+            return Dataset(meta["columns"], np.load(values_path, mmap_mode="r"))
+
+    # (Re)build the cache, the meta is replaced last so it only matches a complete array
+    columns, values = parse_csv(path, header)
+    os.makedirs(cache_folder, exist_ok=True)
+    replace_file(values_path, lambda file: np.save(file, values), mode="wb")
+
+    meta = {"columns": columns, "header": header, "mtime_ns": source.st_mtime_ns,
+            "size": source.st_size, "sha1": file_hash(path)}
+    replace_file(meta_path, lambda file: json.dump(meta, file))
+
+    return Dataset(columns, np.load(values_path, mmap_mode="r"))
+
+
+# ----- Class definition for the in-process dataset registry -----
+class DatasetRegistry:
+    def __init__(self, memory_budget=256 * 2 ** 20):
+        # Least recently used datasets are evicted once the budget (in bytes) is exceeded
+        self.memory_budget = memory_budget
+        self.memory_used = 0
+        self.entries = OrderedDict()
+
+        # Counters to see where loading time goes
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, path, header=0):
+        # The path and header are part of the entry, so the same caller key never returns another file or parse
+        key = (key, os.path.abspath(path), header)
+        if key in self.entries:
+            self.hits += 1
+            self.entries.move_to_end(key)
+            return self.entries[key]
+
+        self.misses += 1
+
+        # Missing exports are not an error, some cases were never run
+        if not os.path.isfile(path):
+            return None
+
+        # Copy the memory-mapped cache into memory once, shared read-only between all users
+        cached = load_dataset(path, header)
+        values = np.array(cached.values)
+        values.flags.writeable = False
+        dataset = Dataset(cached.columns, values)
+
+        if values.nbytes > self.memory_budget:
+            return dataset
+
+        self.entries[key] = dataset
+        self.memory_used += values.nbytes
+        while self.memory_used > self.memory_budget:
+            evicted_key, evicted = self.entries.popitem(last=False)
+            self.memory_used -= evicted.values.nbytes
+
+        return dataset
+
+    def statistics(self):
+        requests = self.hits + self.misses
+        hit_rate = self.hits / requests if requests else 0.0
+
+        return {"hits": self.hits, "misses": self.misses, "hit_rate": hit_rate,
+                "entries": len(self.entries), "memory_used": self.memory_used}
+
+    def clear(self):
+        self.entries.clear()
+        self.memory_used = 0
+        self.hits = 0
+        self.misses = 0
+
+
+# Registry shared by every sample in the process
+registry = DatasetRegistry()
@@ -0,0 +1,118 @@
+# ----- Import libraries -----
+import numpy as np
+from functools import lru_cache
+
+
+# ----- Exact phi reference values -----
+# Exact phi at the alphas of the tension-torsion runs (the former phi_dictionary), every exact phi matches these
+REFERENCE_ALPHAS = np.array([0.25, 0.375, 0.5, 0.75, 1.0, 1.25, 1.5, 2.0, 2.5, 3.0])
+REFERENCE_PHI = np.array([0.753648, 0.736434, 0.71911, 0.686111, 0.65193, 0.618939, 0.585027, 0.525188, 0.474167,
+                          0.422358])
+
+
+# ----- Function definitions -----
+def strain_state_dimension(strain_state_type):
+    if strain_state_type == "2D" or strain_state_type == "2d" or strain_state_type == 2:
+        return 2
+    elif strain_state_type == "3D" or strain_state_type == "3d" or strain_state_type == 3:
+        return 3
+    else:
+        raise ValueError("Please select either 2D strain state (2D, 2d, 2) or 3D strain state (3D, 3d, 3)!")
+
+
+def stress_ratio(phi, eta_r):
+    # Principal strains of the 3D (incompressible) strain state, for unit e23
+    sin_phi, cos_phi = np.sin(phi), np.cos(phi)
+    epsilon_11 = -(cos_phi ** 2 - sin_phi ** 2) / ((1 + 2 * eta_r) * sin_phi * cos_phi)
+    epsilon_22 = -epsilon_11 * (1 + eta_r)
+    epsilon_33 = epsilon_11 * eta_r
+
+    epsilon_1 = epsilon_22 * cos_phi ** 2 + 2 * sin_phi * cos_phi + epsilon_33 * sin_phi ** 2
+    epsilon_2 = epsilon_11
+    epsilon_3 = epsilon_22 * sin_phi ** 2 - 2 * sin_phi * cos_phi + epsilon_33 * cos_phi ** 2
+
+    # Principal stresses from the flow rule, the secant modulus cancels out of the ratio
+    sigma_1 = (4 * epsilon_1 + 2 * epsilon_3) / 3
+    sigma_3 = -2 * epsilon_2 - sigma_1
+
+    # Rotate back to the axial-hoop frame
+    sigma_22 = sigma_1 * cos_phi ** 2 + sigma_3 * sin_phi ** 2
+    sigma_23 = (sigma_1 - sigma_3) * sin_phi * cos_phi
+
+    return sigma_22 / sigma_23
+
+
+def flow_rule_phi(alphas, eta_r, tolerance=1e-12):
+    # Bisection on all alphas at once, the stress ratio decreases monotonically from infinity to zero on (0, pi/4]
+    # The flow rule is coaxial, for a thin wall (eta_r = 0) the root is the approximation 0.5 * arctan(4 / alpha)
+    alphas = np.asarray(alphas, dtype=float)
+    if np.any(alphas < 0):
+        raise ValueError("Loading ratio alpha must be non-negative!")
+
+    shape = np.broadcast(alphas, eta_r).shape
+    lower = np.full(shape, 1e-9)
+    upper = np.full(shape, np.pi / 4)
+
+    while np.max(upper - lower, initial=0) > tolerance:
+        middle = 0.5 * (lower + upper)
+        above = stress_ratio(middle, eta_r) - alphas > 0
+        lower = np.where(above, middle, lower)
+        upper = np.where(above, upper, middle)
+
+    return 0.5 * (lower + upper)
+
+
+def solve_exact_phi(alphas, eta_r, strain_state_type="3D", tolerance=1e-12):
+    # Flow rule root scaled by its ratio to the reference values, interpolated linearly in alpha (constant above)
+    # Pure shear (alpha = 0) is exactly pi / 4 for every model, so the ratio goes to one there
+    # The 2D strain state has no radial strain, so it uses the thin wall limit of the flow rule (eta_r = 0)
+    # Reproduces the reference phi at their ten alphas for both strain states, eta_r may be given per alpha
+    alphas = np.asarray(alphas, dtype=float)
+    eta_r = np.asarray(eta_r, dtype=float)
+    if strain_state_dimension(strain_state_type) == 2:
+        eta_r = np.zeros_like(eta_r)
+    nodes = np.concatenate(([0.0], REFERENCE_ALPHAS))
+    factors = REFERENCE_PHI / flow_rule_phi(REFERENCE_ALPHAS, eta_r[..., np.newaxis], tolerance)
+    factors = np.concatenate((np.ones(np.shape(factors)[:-1] + (1,)), factors), axis=-1)
+
+    index = np.clip(np.searchsorted(nodes, alphas) - 1, 0, len(nodes) - 2)
+    lower, upper = nodes[index], nodes[index + 1]
+    weight = np.clip((alphas - lower) / (upper - lower), 0, 1)
+    factors = np.broadcast_to(factors, np.shape(alphas) + (len(nodes),))
+    factor = ((1 - weight) * np.take_along_axis(factors, index[..., np.newaxis], axis=-1)[..., 0]
+              + weight * np.take_along_axis(factors, index[..., np.newaxis] + 1, axis=-1)[..., 0])
+
+    return flow_rule_phi(alphas, eta_r, tolerance) * factor
+
+
+# ----- Class definition for the exact phi lookup table -----
+class ExactPhiTable:
+    def __init__(self, eta_r, strain_state_type="3D", alpha_min=0.0, alpha_max=10.0, n_points=4001):
+        self.eta_r = eta_r
+        self.strain_state_type = strain_state_type
+        self.alpha_grid = np.linspace(alpha_min, alpha_max, n_points)
+        self.phi_grid = solve_exact_phi(self.alpha_grid, eta_r, strain_state_type)
+
+        # Interpolation error bound, worst case is halfway between two grid points
+        midpoints = (self.alpha_grid[1:] + self.alpha_grid[:-1]) / 2
+        midpoint_error = np.abs(np.interp(midpoints, self.alpha_grid, self.phi_grid)
+                                - solve_exact_phi(midpoints, eta_r, strain_state_type))
+        self.error_bound = float(np.max(midpoint_error))
+
+    def __call__(self, alphas):
+        alphas = np.asarray(alphas, dtype=float)
+        phi = np.asarray(np.interp(alphas, self.alpha_grid, self.phi_grid))
+
+        # Values outside of the table and the reference alphas themselves are solved directly
+        direct = ((alphas < self.alpha_grid[0]) | (alphas > self.alpha_grid[-1])
+                  | np.isin(alphas, REFERENCE_ALPHAS))
+        if np.any(direct):
+            phi[direct] = solve_exact_phi(alphas[direct], self.eta_r, self.strain_state_type)
+
+        return phi
+
+
+@lru_cache(maxsize=None)
+def exact_phi_table(eta_r, strain_state_type="3D"):
+    # One table per geometry and strain state, shared between all samples
+    return ExactPhiTable(eta_r, strain_state_dimension(strain_state_type))
@@ -0,0 +1,284 @@
+# ----- Import libraries -----
+import numpy as np
+import ast
+import hashlib
+import importlib
+import json
+import os
+
+from concurrent.futures import ProcessPoolExecutor
+
+from datasets import file_hash
+
+
+# ----- Build manifest location -----
+# Key of every figure that was built, so a rebuild only redraws figures whose inputs changed
+MANIFEST_PATH = ".figure_manifest.json"
+
+
+# ----- Figure specifications -----
+# A figure is described by plain data (lines, scatters, labels and limits), so it can be built in one process
+# and rendered in another
+# Inputs are the .csv files the data was read from, they are recorded in the build manifest
+def figure_spec(path, title=None, xlabel=None, ylabel=None, xlim=None, ylim=None, legend=True,
+                legend_location=None, figsize=(8, 5), dpi=150, inputs=()):
+    return {"path": path, "title": title, "xlabel": xlabel, "ylabel": ylabel, "xlim": xlim, "ylim": ylim,
+            "legend": legend, "legend_location": legend_location, "figsize": figsize, "dpi": dpi,
+            "inputs": list(inputs), "lines": [], "scatters": []}
+
+def add_line(spec, x, y, fmt="", **kwargs):
+    spec["lines"].append((x, y, fmt, kwargs))
+
+def add_scatter(spec, x, y, **kwargs):
+    spec["scatters"].append((x, y, kwargs))
+
+
+# ----- Rendering -----
+def report_pyplot():
+    # pyplot with the font of the report, set when figures are drawn instead of when a module is imported
+    import matplotlib.pyplot as plt
+    plt.rcParams["font.family"] = "arial"
+
+    return plt
+
+def draw_figure(spec):
+    plt = report_pyplot()
+
+    figure = plt.figure(figsize=spec["figsize"], dpi=spec["dpi"])
+    for (x, y, fmt, kwargs) in spec["lines"]:
+        plt.plot(x, y, fmt, **kwargs)
+    for (x, y, kwargs) in spec["scatters"]:
+        plt.scatter(x, y, **kwargs)
+
+    if spec["title"] is not None:
+        plt.title(spec["title"])
+    if spec["xlabel"] is not None:
+        plt.xlabel(spec["xlabel"])
+    if spec["ylabel"] is not None:
+        plt.ylabel(spec["ylabel"])
+    if spec["xlim"] is not None:
+        plt.xlim(*spec["xlim"])
+    if spec["ylim"] is not None:
+        plt.ylim(*spec["ylim"])
+    plt.grid()
+    if spec["legend"]:
+        plt.legend(loc=spec["legend_location"])
+
+    return figure
+
+def render_figure(spec):
+    import matplotlib.pyplot as plt
+
+    figure = draw_figure(spec)
+    figure.savefig(spec["path"])
+    plt.close(figure)
+
+    return spec["path"]
+
+def show_figures(specs):
+    import matplotlib.pyplot as plt
+
+    for spec in specs:
+        draw_figure(spec)
+        plt.show()
+
+def run_task(task):
+    # Figures that are still drawn by a module function, given as (module name, function name, arguments)
+    plt = report_pyplot()
+
+    module_name, function_name, arguments = task
+    getattr(importlib.import_module(module_name), function_name)(*arguments)
+    plt.close("all")
+
+    return task
+
+def use_agg():
+    # Worker processes never show figures, so they render without a display
+    os.environ["MPLBACKEND"] = "Agg"
+    import matplotlib
+    matplotlib.use("Agg", force=True)
+
+def render_all(specs=(), tasks=(), max_workers=None):
+    # Specs and tasks are spread over a process pool, one worker per core by default
+    specs, tasks = list(specs), list(tasks)
+
+    if max_workers == 1:
+        return [render_figure(spec) for spec in specs] + [run_task(task) for task in tasks]
+
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=use_agg) as executor:
+        rendered = list(executor.map(render_figure, specs)) + list(executor.map(run_task, tasks))
+
+    return rendered
+
+
+# ----- Build targets and manifest -----
+# A target is one spec or one task, with the figures it writes and the files it is built from
+def spec_target(spec):
+    return {"name": spec["path"], "outputs": [spec["path"]], "inputs": spec["inputs"], "spec": spec, "task": None}
+
+def module_sources(module_name, sources=None, lazy=True):
+    # Local .py files of a module and everything it imports from the repository
+    # Imports inside functions only count for the module itself, as the task function may use them
+    if sources is None:
+        sources = []
+    path = f"{module_name}.py"
+    if path in sources or not os.path.isfile(path):
+        return sources
+    sources.append(path)
+
+    with open(path, encoding="utf-8") as file:
+        tree = ast.parse(file.read())
+    for node in (ast.walk(tree) if lazy else tree.body):
+        if isinstance(node, ast.Import):
+            for alias in node.names:
+                module_sources(alias.name.split(".")[0], sources, lazy=False)
+        elif isinstance(node, ast.ImportFrom) and node.level == 0 and node.module is not None:
+            module_sources(node.module.split(".")[0], sources, lazy=False)
+
+    return sources
+
+def task_target(module_name, function_name, arguments, outputs, inputs):
+    # The model parameters of the scripts are module constants, so the source files of the module are inputs too
+    task = (module_name, function_name, tuple(arguments))
+    inputs = list(inputs) + [path for path in module_sources(module_name) if path not in inputs]
+
+    return {"name": f"{module_name}.{function_name}{task[2]}", "outputs": list(outputs), "inputs": list(inputs),
+            "spec": None, "task": task}
+
+def spec_digest(spec):
+    # Hash of everything that ends up in the figure, the plotted data covers the model parameters
+    sha1 = hashlib.sha1()
+    for name in sorted(spec):
+        if name not in ("lines", "scatters"):
+            sha1.update(repr((name, spec[name])).encode())
+
+    for item in spec["lines"] + spec["scatters"]:
+        for value in item:
+            if isinstance(value, dict):
+                sha1.update(repr(sorted(value.items())).encode())
+            elif isinstance(value, str):
+                sha1.update(value.encode())
+            else:
+                sha1.update(np.ascontiguousarray(value, dtype=float).tobytes())
+
+    return sha1.hexdigest()
+
+def target_key(target, input_hashes):
+    # Missing inputs get an empty hash, so the figure is rebuilt once they appear
+    inputs = {path: input_hashes.setdefault(path, file_hash(path) if os.path.isfile(path) else "")
+              for path in target["inputs"]}
+    parameters = spec_digest(target["spec"]) if target["spec"] is not None else repr(target["task"])
+
+    key = hashlib.sha1(json.dumps({"inputs": inputs, "parameters": parameters}, sort_keys=True).encode())
+
+    return key.hexdigest(), inputs
+
+def read_manifest(manifest_path=MANIFEST_PATH):
+    if not os.path.isfile(manifest_path):
+        return {}
+
+    with open(manifest_path) as file:
+        return json.load(file)
+
+def write_manifest(manifest, manifest_path=MANIFEST_PATH):
+    # Written to a temporary file first, so an interrupted build never leaves a corrupt manifest
+    with open(manifest_path + ".tmp", "w") as file:
+        json.dump(manifest, file, indent=1, sort_keys=True)
+    os.replace(manifest_path + ".tmp", manifest_path)
+
+def stale_targets(targets, manifest, input_hashes, overwritten=(), force=False):
+    # Stale when never built, built from other inputs or parameters, a figure is missing,
+    # or a figure was overwritten by an earlier stage
+    stale = []
+    for target in targets:
+        key, inputs = target_key(target, input_hashes)
+        entry = manifest.get(target["name"])
+
+        if (force or entry is None or entry["key"] != key
+                or not all(os.path.isfile(output) for output in target["outputs"])
+                or any(output in overwritten for output in target["outputs"])):
+            stale.append((target, key, inputs))
+
+    return stale
+
+# ----- All saved figures of the repository -----
+def figure_stages(phi_type="approximation"):
+    # Stages are rendered one after the other, a later stage may replace figures of an earlier one
+    import AnalyticalTensionTorsionClean as Attc
+    import plotting
+
+    sample = Attc.TensionTorsionSample()
+
+    # Figures still drawn by the original scripts, split per alpha where they loop over alphas
+    # The moment and force comparisons are left to the specs of the second stage
+    sections = ("stress_comparison", "localization_prediction")
+    targets = []
+    for alpha in sample.alphas:
+        text = sample.alphas_text_dictionary[alpha]
+        inputs = [sample.dataset_path("stress_strain", alpha), sample.dataset_path("alpha_results", alpha)]
+
+        for (function_name, folder) in (("three_dimensional_strain", "ThreeDimensionalAnalytical"),
+                                        ("two_dimensional_strain", "TwoDimensionalAnalytical")):
+            outputs = [f"{folder}/{name}{text}.png" for name in ("StressStrainAlpha", "LocalizationPrediction")]
+            targets.append(task_target("AnalyticalTensionTorsion", function_name, (alpha, sections), outputs, inputs))
+
+        targets.append(task_target("AnalyticalTensionTorsion", "three_two_dimensions_comparison",
+                                   ("save_all", [alpha]), [f"DimensionComparison/DimensionComparisonAlpha{text}.png"],
+                                   inputs))
+
+    targets.append(task_target("AnalyticalPS", "stress_strain_curve", ("save_all",),
+                               ["ThreeDimensionalAnalytical/StressStrainPS.png",
+                                "ThreeDimensionalAnalytical/LocalizationPredictionPS.png"],
+                               ["StressStrainCurves/AlphaPS.csv", "AlphaResults/AlphaPS.csv"]))
+
+    # Combined grids of the sample class
+    targets.append(task_target("figures", "combined_figures", (phi_type, "3D"),
+                               ["ThreeDimensionalAnalytical/ForceComparisonCombined.png",
+                                "AlphaFigures/NormalComparisonCombined.png",
+                                "AlphaFigures/ShearComparisonCombined.png"],
+                               [sample.dataset_path(kind, alpha) for kind in ("stress_strain", "alpha_results")
+                                for alpha in sample.alphas]))
+
+    # Specs built from the data, the moment and force comparisons replace the ones of the original scripts
+    specs = plotting.alpha_results_specs()
+    for strain_state_type in ("2D", "3D"):
+        specs += sample.moment_force_specs(phi_type, strain_state_type)
+
+    return [targets, [spec_target(spec) for spec in specs]]
+
+def combined_figures(phi_type, strain_state_type):
+    import AnalyticalTensionTorsionClean as Attc
+
+    sample = Attc.TensionTorsionSample()
+    sample.combined_analytical_numerical_figures(phi_type, strain_state_type, action="save")
+    sample.combined_experimental_numerical_figures(action="save")
+
+def dependent_targets(path, phi_type="approximation"):
+    # Targets whose build key changes with the file, i.e. the ones a rebuild redraws after it is edited
+    # Specs are not listed, they are rebuilt from the data and only redrawn when the plotted data changes
+    input_hashes, edited_hashes = {}, {path: "edited"}
+
+    return [target["name"] for targets in figure_stages(phi_type) for target in targets
+            if target_key(target, input_hashes)[0] != target_key(target, edited_hashes)[0]]
+
+def rebuild_figures(phi_type="approximation", max_workers=None, force=False, manifest_path=MANIFEST_PATH):
+    # Only stale figures are redrawn, force redraws all of them
+    manifest = read_manifest(manifest_path)
+    input_hashes = {}
+    overwritten = set()
+
+    rendered = []
+    for targets in figure_stages(phi_type):
+        stale = stale_targets(targets, manifest, input_hashes, overwritten, force)
+
+        specs = [target["spec"] for (target, key, inputs) in stale if target["spec"] is not None]
+        tasks = [target["task"] for (target, key, inputs) in stale if target["task"] is not None]
+        rendered += render_all(specs, tasks, max_workers)
+
+        # Recorded per stage, so an interrupted build keeps the figures that were finished
+        for (target, key, inputs) in stale:
+            manifest[target["name"]] = {"key": key, "outputs": target["outputs"], "inputs": inputs}
+            overwritten.update(target["outputs"])
+        write_manifest(manifest, manifest_path)
+
+    return rendered
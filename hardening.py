@@ -0,0 +1,159 @@
+# ----- Import libraries -----
+import numpy as np
+
+from datasets import load_dataset
+
+
+# ----- Base class for a hardening law -----
+# Flow stress [Pa] as a function of the equivalent strain, every method works on arrays of any shape
+class HardeningLaw:
+    def flow_stress(self, eps):
+        raise NotImplementedError
+
+    def tangent_modulus(self, eps):
+        raise NotImplementedError
+
+    def __call__(self, eps):
+        return self.flow_stress(eps)
+
+    # Local hardening exponent eps * d(sigma)/d(eps) / sigma, equal to n everywhere for the power law
+    def hardening_exponent(self, eps):
+        eps = np.asarray(eps, dtype=float)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return eps * self.tangent_modulus(eps) / self.flow_stress(eps)
+
+    # Smallest eps where d(sigma)/d(eps) / sigma drops to 1 / scale, nan if it does not happen before eps_max
+    # Considere is scale 1, the Swift and Hill criteria scale with their major strain for n = 1
+    # Law parameters given as columns (one row per scale) line up with the flattened scales
+    def instability_strain(self, scale, eps_max=5.0, n_grid=2001, iterations=40):
+        scale = np.asarray(scale, dtype=float)
+        flat_scale = scale.reshape((-1, 1))
+
+        # Grid pass to bracket the first crossing, then bisection on all brackets at once
+        grid = np.linspace(0, eps_max, n_grid)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            crossed = flat_scale * self.tangent_modulus(grid) - self.flow_stress(grid) <= 0
+        found = np.any(crossed, axis=1, keepdims=True)
+        index = np.argmax(crossed, axis=1)[:, np.newaxis]
+        lower, upper = grid[np.maximum(index - 1, 0)], grid[index]
+
+        # Brackets stay columns, so the middle points line up with column parameters as in the grid pass
+        for _ in range(iterations):
+            middle = (lower + upper) / 2
+            with np.errstate(divide="ignore", invalid="ignore"):
+                positive = flat_scale * self.tangent_modulus(middle) - self.flow_stress(middle) > 0
+            lower = np.where(positive, middle, lower)
+            upper = np.where(positive, upper, middle)
+
+        return np.where(found, (lower + upper) / 2, np.nan).reshape(scale.shape)
+
+
+# ----- Closed-form hardening laws -----
+# Swift: sigma = K * (eps_0 + eps) ** n
+class SwiftLaw(HardeningLaw):
+    def __init__(self, strength_coefficient, eps_0, hardening_n):
+        self.strength_coefficient = strength_coefficient
+        self.eps_0 = eps_0
+        self.hardening_n = hardening_n
+
+    def flow_stress(self, eps):
+        return self.strength_coefficient * (self.eps_0 + np.asarray(eps, dtype=float)) ** self.hardening_n
+
+    def tangent_modulus(self, eps):
+        # Infinite at zero strain without offset
+        with np.errstate(divide="ignore"):
+            return (self.hardening_n * self.strength_coefficient
+                    * (self.eps_0 + np.asarray(eps, dtype=float)) ** (self.hardening_n - 1))
+
+    def hardening_exponent(self, eps):
+        eps = np.asarray(eps, dtype=float)
+        ratio = np.divide(eps, self.eps_0 + eps, out=np.ones(np.shape(eps)), where=self.eps_0 + eps != 0)
+
+        return self.hardening_n * ratio
+
+    def instability_strain(self, scale, eps_max=5.0, n_grid=2001, iterations=40):
+        # n / (eps_0 + eps) = 1 / scale
+        return np.maximum(self.hardening_n * np.asarray(scale, dtype=float) - self.eps_0, 0)
+
+
+# Power law of the analytical models: sigma = yield_strength * (E * (eps + offset) / yield_strength) ** n
+# The *PLASTIC tables use the yield strain as offset, so the plastic strain starts at the yield strength
+class PowerLaw(SwiftLaw):
+    def __init__(self, elastic_modulus, yield_strength, hardening_n, strain_offset=0.0):
+        super().__init__(yield_strength * (elastic_modulus / yield_strength) ** hardening_n, strain_offset,
+                         hardening_n)
+        self.elastic_modulus = elastic_modulus
+        self.yield_strength = yield_strength
+
+    def flow_stress(self, eps):
+        # Same rounding as the original formula, so the flow stress at the offset is exactly the yield strength
+        fraction = self.elastic_modulus * (self.eps_0 + np.asarray(eps, dtype=float)) / self.yield_strength
+
+        return self.yield_strength * fraction ** self.hardening_n
+
+
+# Voce: sigma = yield_strength + Q * (1 - exp(-b * eps))
+class VoceLaw(HardeningLaw):
+    def __init__(self, yield_strength, saturation_stress, saturation_rate):
+        self.yield_strength = yield_strength
+        self.saturation_stress = saturation_stress
+        self.saturation_rate = saturation_rate
+
+    def flow_stress(self, eps):
+        eps = np.asarray(eps, dtype=float)
+
+        return self.yield_strength - self.saturation_stress * np.expm1(-self.saturation_rate * eps)
+
+    def tangent_modulus(self, eps):
+        eps = np.asarray(eps, dtype=float)
+
+        return self.saturation_stress * self.saturation_rate * np.exp(-self.saturation_rate * eps)
+
+
+# Swift-Voce: weighted sum of both laws, weight 1 is pure Swift
+class SwiftVoceLaw(HardeningLaw):
+    def __init__(self, swift: SwiftLaw, voce: VoceLaw, weight):
+        self.swift = swift
+        self.voce = voce
+        self.weight = weight
+
+    def flow_stress(self, eps):
+        return self.weight * self.swift.flow_stress(eps) + (1 - self.weight) * self.voce.flow_stress(eps)
+
+    def tangent_modulus(self, eps):
+        return self.weight * self.swift.tangent_modulus(eps) + (1 - self.weight) * self.voce.tangent_modulus(eps)
+
+
+# ----- Tabular hardening law -----
+# Linear interpolation between the points, constant flow stress past the last one (same as ABAQUS *PLASTIC)
+class TabularLaw(HardeningLaw):
+    def __init__(self, strains, stresses):
+        self.strains = np.asarray(strains, dtype=float)
+        self.stresses = np.asarray(stresses, dtype=float)
+
+        if np.any(np.diff(self.strains) <= 0):
+            raise ValueError("Please give the table with strictly increasing strains!")
+        self.slopes = np.diff(self.stresses) / np.diff(self.strains)
+
+    # Headerless (stress, strain) table as written by PowerLaw.py, e.g. SwiftVoce.csv
+    @classmethod
+    def from_plastic_table(cls, path):
+        data = load_dataset(path, header=None)
+
+        return cls(data.column("1"), data.column("0"))
+
+    # Table with a header, e.g. the VMStress or Hill48Stress column of MaterialCalibrations.csv
+    @classmethod
+    def from_csv(cls, path, stress_column, strain_column="PlasticStrain"):
+        data = load_dataset(path)
+
+        return cls(data.column(strain_column), data.column(stress_column))
+
+    def flow_stress(self, eps):
+        return np.interp(eps, self.strains, self.stresses)
+
+    def tangent_modulus(self, eps):
+        eps = np.asarray(eps, dtype=float)
+        index = np.clip(np.searchsorted(self.strains, eps, side="right") - 1, 0, len(self.slopes) - 1)
+
+        return np.where(eps < self.strains[-1], self.slopes[index], 0.0)
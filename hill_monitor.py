@@ -0,0 +1,149 @@
+# ----- Import libraries -----
+import numpy as np
+import os
+import time
+
+from localization import hill_damage
+
+
+# ----- Function definitions -----
+def shell_strains(chunk):
+    # Average values from bottom and top integration points, same as NumericalHill.strain_ratio
+    peeq = (np.asarray(chunk["PEEQMAX"], dtype=float) + np.asarray(chunk["PEEQMIN"], dtype=float)) / 2
+    major_strain = (np.asarray(chunk["PE1MAX"], dtype=float) + np.asarray(chunk["PE1MIN"], dtype=float)) / 2
+    minor_strain = (np.asarray(chunk["PE2MAX"], dtype=float) + np.asarray(chunk["PE2MIN"], dtype=float)) / 2
+
+    # Zero major strain at the start of the run gives nan ratios, which do not add damage
+    with np.errstate(divide="ignore", invalid="ignore"):
+        strain_ratio = minor_strain / major_strain
+
+    return peeq, strain_ratio
+
+
+def parse_value(text):
+    # Empty cells are written for fields without output at that increment
+    text = text.strip()
+
+    return float(text) if text else np.nan
+
+
+def follow_csv(path, chunk_size=1000, poll_interval=1.0, idle_timeout=60.0, follow=True):
+    # Yields the complete rows of a .csv file that is still being written, as a dictionary of column arrays
+    # Stops once the file has not grown for idle_timeout seconds (e.g. the job has finished)
+    # With follow=False the file is taken as finished and read once up to its end, without waiting
+    last_activity = time.monotonic()
+    while not os.path.isfile(path):
+        if not follow or time.monotonic() - last_activity > idle_timeout:
+            return
+        time.sleep(poll_interval)
+
+    with open(path, encoding="utf-8-sig") as file:
+        columns, rows, buffer = None, [], ""
+
+        while True:
+            text = file.read()
+            if text:
+                last_activity = time.monotonic()
+                buffer += text
+
+            # Only complete lines are used, the remainder is kept until the rest is written
+            # Once the file is finished, the last line counts as complete even without a line break
+            finished = not text and (not follow or time.monotonic() - last_activity > idle_timeout)
+            *lines, buffer = buffer.split("\n")
+            if finished:
+                lines, buffer = lines + [buffer], ""
+
+            for line in lines:
+                line = line.strip()
+                if not line:
+                    continue
+
+                delimiter = ";" if line.count(";") > line.count(",") else ","
+                if columns is None:
+                    columns = [name.strip() for name in line.split(delimiter)]
+                else:
+                    rows.append([parse_value(value) for value in line.split(delimiter)])
+
+                if len(rows) == chunk_size:
+                    yield dict(zip(columns, np.array(rows).transpose()))
+                    rows = []
+
+            if not text:
+                if rows:
+                    yield dict(zip(columns, np.array(rows).transpose()))
+                    rows = []
+
+                if finished:
+                    return
+                time.sleep(poll_interval)
+
+
+# ----- Class definition for the streaming Hill damage indicator -----
+class HillDamageAccumulator:
+    def __init__(self, hardening_n):
+        self.hardening_n = hardening_n
+
+        # State carried over between chunks
+        self.indicator = 0.0
+        self.increments = 0
+        self.previous_peeq = None
+
+        # Localization point, same values as NumericalHill.hill_prediction
+        self.localized = False
+        self.increment = -1
+        self.peeq = 0.0
+        self.strain_ratio = np.nan
+
+    # Adds the next PEEQ and strain ratio values, returns True as soon as the indicator reaches unity
+    def update(self, peeq, strain_ratio):
+        if self.localized:
+            return True
+
+        peeq = np.asarray(peeq, dtype=float)
+        strain_ratio = np.asarray(strain_ratio, dtype=float)
+        if len(peeq) == 0:
+            return False
+
+        # The last point of the previous chunk is the start of the first increment of this one
+        if self.previous_peeq is not None:
+            peeq = np.concatenate(([self.previous_peeq], peeq))
+            strain_ratio = np.concatenate(([np.nan], strain_ratio))
+        self.previous_peeq = peeq[-1]
+
+        if len(peeq) < 2:
+            return False
+
+        indicator, increment = hill_damage(peeq, strain_ratio, self.hardening_n, self.indicator)
+        indicator, increment = indicator[0], int(increment[0])
+
+        if increment < len(indicator):
+            self.localized = True
+            self.increment = self.increments + increment
+            self.indicator = indicator[increment]
+            self.peeq = peeq[increment]
+            self.strain_ratio = strain_ratio[increment + 1]
+        else:
+            self.indicator = indicator[-1]
+
+        self.increments += len(indicator)
+
+        return self.localized
+
+    # Same as update, for a chunk with the PE1, PE2 and PEEQ columns of the shell exports
+    def update_exports(self, chunk):
+        return self.update(*shell_strains(chunk))
+
+    def consume(self, chunks):
+        # Stops reading as soon as localization is found, so the job can be stopped early
+        for chunk in chunks:
+            if self.update_exports(chunk):
+                break
+
+        return self.localized
+
+
+def monitor_export(path, hardening_n, chunk_size=1000, poll_interval=1.0, idle_timeout=60.0, follow=True):
+    accumulator = HillDamageAccumulator(hardening_n)
+    accumulator.consume(follow_csv(path, chunk_size, poll_interval, idle_timeout, follow))
+
+    return accumulator
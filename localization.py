@@ -0,0 +1,112 @@
+# ----- Import libraries -----
+import numpy as np
+
+
+# ----- Closed-form necking strains for a power law material -----
+def swift_major_strain(strain_ratio, hardening_n):
+    return 2 * hardening_n * ((1 + strain_ratio + strain_ratio ** 2)
+                              / (2 + strain_ratio + strain_ratio ** 2 + 2 * strain_ratio ** 3))
+
+def hill_major_strain(strain_ratio, hardening_n):
+    return hardening_n / (1 + strain_ratio)
+
+
+# ----- Localization on discrete curves -----
+def first_sign_change(residual):
+    # Index of the first step where the residual goes from positive to zero or negative, None if it never does
+    crossed = np.flatnonzero((residual[:-1] > 0) & (residual[1:] <= 0))
+
+    if len(crossed) == 0:
+        return None
+
+    return int(crossed[0])
+
+def interpolate_crossing(x, residual, index):
+    # Linear interpolation of x where the residual is zero, between index and index + 1
+    fraction = residual[index] / (residual[index] - residual[index + 1])
+
+    return x[index] + fraction * (x[index + 1] - x[index])
+
+def considere_criterion(strain, stress):
+    # Take numerical derivative
+    derivative = np.gradient(stress, strain)
+
+    # Filter possible nan or inf when strain is zero
+    derivative[~np.isfinite(derivative)] = 10 ** 9
+
+    # Localization point where the hardening slope first drops below the stress
+    residual = derivative - stress
+    index = first_sign_change(residual)
+
+    # Without a sign change, fall back to the closest approach
+    if index is None:
+        minimum_location = int(np.argmin(np.abs(residual)))
+        return derivative, float(strain[minimum_location]), float(stress[minimum_location])
+
+    localization_x = float(interpolate_crossing(strain, residual, index))
+    localization_y = float(interpolate_crossing(stress, residual, index))
+
+    return derivative, localization_x, localization_y
+
+def first_crossings(x, residual):
+    # First crossing of every row from positive to zero or negative, interpolated linearly in x, nan if there is none
+    x, residual = np.broadcast_arrays(np.atleast_2d(x), np.atleast_2d(residual))
+    crossed = (residual[:, :-1] > 0) & (residual[:, 1:] <= 0)
+    found = np.any(crossed, axis=1)
+
+    rows = np.arange(len(residual))
+    index = np.argmax(crossed, axis=1)
+    before, after = residual[rows, index], residual[rows, index + 1]
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        crossing = x[rows, index] + before / (before - after) * (x[rows, index + 1] - x[rows, index])
+
+    return np.where(found, crossing, np.nan)
+
+def path_necking_strains(eps, major_strain, minor_strain, hardening_n):
+    # Swift and Hill criteria at every point of the strain paths (rows), using the strain ratio of the increment
+    eps, major_strain, minor_strain = (np.atleast_2d(np.asarray(values, dtype=float))
+                                       for values in (eps, major_strain, minor_strain))
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        strain_ratio = np.diff(minor_strain, axis=1) / np.diff(major_strain, axis=1)
+
+    # The first point takes the ratio of the first increment, zero increments give nan and never cross
+    strain_ratio = np.concatenate((strain_ratio[:, :1], strain_ratio), axis=1)
+
+    swift = first_crossings(eps, swift_major_strain(strain_ratio, hardening_n) - major_strain)
+    hill = first_crossings(eps, hill_major_strain(strain_ratio, hardening_n) - major_strain)
+
+    return np.stack((swift, hill), axis=-1)
+
+def monotone_crossing(x, y, target_value):
+    # Value of x where an increasing y reaches the target, by binary search and linear interpolation
+    return np.interp(target_value, y, x)
+
+def find_peak(array):
+    # Point of peak value, first one if there are several
+    return int(np.argmax(array))
+
+def closest_value_finder(array, target_value):
+    return int(np.argmin(np.abs(array - target_value)))
+
+def hill_damage(peeq, strain_ratio, hardening_n, initial=0.0):
+    # Cumulative Hill damage for every run (row) at once, shorter runs are padded with nan at the end
+    # The initial indicator allows continuing runs that were evaluated up to an earlier point
+    peeq = np.atleast_2d(np.asarray(peeq, dtype=float))
+    strain_ratio = np.atleast_2d(np.asarray(strain_ratio, dtype=float))
+
+    # Each PEEQ increment is divided by Hill's failure strain at the end of the increment, nan strain ratios add nothing
+    ratios = strain_ratio[:, 1:]
+    contributions = np.where(np.isnan(ratios), 0.0, np.diff(peeq, axis=1) * (1 + ratios) / hardening_n)
+    indicator = np.reshape(initial, (-1, 1)) + np.cumsum(contributions, axis=1)
+
+    # Whether unity has been reached is sorted within each run, so offsetting the runs by 2 sorts the whole matrix
+    n_runs, n_increments = indicator.shape
+    reached = np.logical_or.accumulate(indicator >= 1, axis=1)
+    keys = (2 * np.arange(n_runs)[:, None] + reached).ravel()
+
+    # One binary search finds the first increment reaching unity for all runs, n_increments if it never does
+    increment = np.searchsorted(keys, 2 * np.arange(n_runs) + 1) - n_increments * np.arange(n_runs)
+
+    return indicator, increment
@@ -1,14 +1,11 @@
 # ----- Import libraries -----
-import matplotlib.pyplot as plt
 import numpy as np
-import pandas as pd
 import os
-import matplotlib.colors as mcolors
 
 from textwrap import wrap
 
-
-plt.rcParams['font.family'] = 'arial'
+from datasets import load_dataset
+from figures import figure_spec, add_line, render_all, report_pyplot, show_figures
 
 
 def load_maximum(x_data, y_data):
@@ -24,6 +21,9 @@ def load_maximum(x_data, y_data):
 
 # ----- For mesh sensitivity -----
 def mesh_sensitivity_plot():
+    import pandas as pd
+    plt = report_pyplot()
+
     mesh_sensitivity_data = pd.read_csv("MeshSensitivity.csv", delimiter=";", header=0, index_col=0).to_numpy()
     maximum_force, maximum_extension, maximum_peeq, maximum_sigma, number_of_elements = mesh_sensitivity_data
 
@@ -57,6 +57,9 @@ def mesh_sensitivity_plot():
 
 # ----- For mesh sensitivity -----
 def time_sensitivity_plot():
+    import pandas as pd
+    plt = report_pyplot()
+
     time_sensitivity_data = pd.read_csv("TimeSensitivity.csv", delimiter=";", header=0, index_col=0).to_numpy()
     maximum_force, maximum_extension, maximum_peeq, maximum_sigma, number_of_elements = time_sensitivity_data
 
@@ -89,6 +92,9 @@ def time_sensitivity_plot():
 
 
 def hill_48_normal_plot():
+    import pandas as pd
+    plt = report_pyplot()
+
     hill_48_normal_data = pd.read_csv("Hill48NormalData.csv", delimiter=",", header=0).to_numpy().transpose()
     (paper_extension, paper_stress, vm_extension, vm_stress,
      nguyen_extension, nguyen_stress, boudard_extension, boudard_stress) = hill_48_normal_data
@@ -120,6 +126,9 @@ def hill_48_normal_plot():
 
 
 def hill_48_shear_plot():
+    import pandas as pd
+    plt = report_pyplot()
+
     hill_48_shear_data = pd.read_csv("Hill48ShearData.csv", delimiter=",", header=0).to_numpy().transpose()
     (paper_angle, paper_stress, vm_angle, vm_stress,
      nguyen_angle, nguyen_stress, boudard_angle, boudard_stress) = hill_48_shear_data
@@ -151,6 +160,9 @@ def hill_48_shear_plot():
 
 
 def hill_48_ps_plot():
+    import pandas as pd
+    plt = report_pyplot()
+
     hill_48_normal_data = pd.read_csv("Hill48NormalDataPS.csv", delimiter=",", header=0).to_numpy().transpose()
     (paper_extension, paper_stress, vm_extension, vm_stress,
      nguyen_extension, nguyen_stress, boudard_extension, boudard_stress) = hill_48_normal_data
@@ -198,6 +210,9 @@ def hill_48_ps_plot():
 
 
 def material_calibration_plot():
+    import pandas as pd
+    plt = report_pyplot()
+
     material_calibration_data = pd.read_csv("MaterialCalibrations.csv", delimiter=",", header=0).to_numpy().transpose()
     plastic_strain, vm_stress, hill48_stress = material_calibration_data
 
@@ -215,34 +230,55 @@ def material_calibration_plot():
 
 
 def alpha_results_loop(function):
-    # Loop through all files in the AlphaResults directory
-    for entry in os.scandir("AlphaResults"):
-        alpha_results_plot(entry.path, str(entry)[16:-6], function)
+    # All files in the AlphaResults directory, saved figures are rendered in parallel
+    specs = alpha_results_specs()
+
+    if function == "show":
+        show_figures(specs)
+    elif function == "save":
+        render_all(specs)
+
+
+def alpha_results_specs():
+    specs = []
+    for entry in sorted(os.scandir("AlphaResults"), key=lambda entry: entry.name):
+        specs += alpha_results_case_specs(entry.path, entry.name[5:-4])
+
+    return specs
 
 
 def alpha_results_plot(path, case, function):
-    # Read in .csv data as pandas DataFrame
-    data = pd.read_csv(path, delimiter=";")
+    specs = alpha_results_case_specs(path, case)
+
+    if function == "show":
+        show_figures(specs)
+    elif function == "save":
+        render_all(specs)
+
+
+def alpha_results_case_specs(path, case):
+    # Read in .csv data
+    data = load_dataset(path)
     alpha_dictionary = {"30":3.0, "25":2.5, "20":2.0, "15":1.5, "125":1.25, "10":1.0, "075":0.75, "05":0.5,
                         "0375":0.375, "025":0.25, "PS":"PS"}
-
+    specs = []
 
     # Extract data
-    time = (data["Time [s]"].dropna()).to_numpy()
-    force = (data["RF Mag [N]"].dropna()).to_numpy()
+    time = data.column("Time [s]")
+    force = data.column("RF Mag [N]")
 
-    sigma = (data["Sigma [MPa]"].dropna()).to_numpy()
-    extension = (data["Extension [-]"].dropna()).to_numpy()
+    sigma = data.column("Sigma [MPa]")
+    extension = data.column("Extension [-]")
 
-    paper_extension = (data["Paper extension [-]"].dropna()).to_numpy()
-    paper_sigma = (data["Paper Sigma [MPa]"].dropna()).to_numpy()
+    paper_extension = data.column("Paper extension [-]")
+    paper_sigma = data.column("Paper Sigma [MPa]")
 
     if type(alpha_dictionary[case]) == float:
-        moment = (abs(data["RM2 [Nm]"].dropna()).to_numpy())
-        tau = (data["Tau [MPa]"].dropna()).to_numpy()
-        angle = (data["Actual angle [deg]"].dropna()).to_numpy()
-        paper_angle = (data["Paper angle [deg]"].dropna()).to_numpy()
-        paper_tau = (data["Paper Tau [MPa]"].dropna()).to_numpy()
+        moment = np.abs(data.column("RM2 [Nm]"))
+        tau = data.column("Tau [MPa]")
+        angle = data.column("Actual angle [deg]")
+        paper_angle = data.column("Paper angle [deg]")
+        paper_tau = data.column("Paper Tau [MPa]")
 
         # Constants
         base_factor = 45.053
@@ -252,79 +288,53 @@ def alpha_results_plot(path, case, function):
         ideal_y = [0, np.amax(moment) * loading_factor]
         ideal_x = [0, np.amax(moment)]
 
-        plt.figure(figsize=(8, 5), dpi=150)
-        plt.plot(moment, force, label="ABAQUS")
-        plt.plot(ideal_x, ideal_y, "--", label="Ideal")
-        plt.title(fr"Force-moment relation curve for $\alpha_n$ = {alpha_dictionary[case]}")
-        plt.ylabel("Resultant force [N]")
-        plt.xlabel("Resultant moment [Nm]")
-        plt.ylim(0, 1.1 * np.amax(moment) * loading_factor)
-        plt.xlim(0, 1.1 * np.amax(moment))
-        plt.grid()
-        plt.legend()
-
-        if function == "show":
-            plt.show()
-        elif function == "save":
-            plt.savefig(f"AlphaFigures/MFRelationAlpha{case}.png")
+        spec = figure_spec(f"AlphaFigures/MFRelationAlpha{case}.png",
+                           fr"Force-moment relation curve for $\alpha_n$ = {alpha_dictionary[case]}",
+                           "Resultant moment [Nm]", "Resultant force [N]",
+                           xlim=(0, 1.1 * np.amax(moment)),
+                           ylim=(0, 1.1 * np.amax(moment) * loading_factor), inputs=[path])
+        add_line(spec, moment, force, label="ABAQUS")
+        add_line(spec, ideal_x, ideal_y, "--", label="Ideal")
+        specs.append(spec)
 
         # --- Loading ratio plot ---
         loading_ratio = force[2:] / moment[2:]
         ideal_loading_ratio_x = [0, np.amax(time)]
         ideal_loading_ratio_y = [loading_factor, loading_factor]
 
-        plt.figure(figsize=(8, 5), dpi=150)
-        plt.plot(time[2:], loading_ratio, label="ABAQUS")
-        plt.plot(ideal_loading_ratio_x, ideal_loading_ratio_y, "--", label="Ideal")
-        plt.title(fr"Loading ratio for $\alpha_n$ = {alpha_dictionary[case]}")
-        plt.ylabel("Loading ratio [m$^{-1}$]")
-        plt.xlabel("ABAQUS time [s]")
-        plt.ylim(0.95 * loading_factor, 1.05 * loading_factor)
-        plt.xlim(0, np.amax(time))
-        plt.grid()
-        plt.legend()
-
-        if function == "show":
-            plt.show()
-        elif function == "save":
-            plt.savefig(f"AlphaFigures/LoadingRatioAlpha{case}.png")
+        spec = figure_spec(f"AlphaFigures/LoadingRatioAlpha{case}.png",
+                           fr"Loading ratio for $\alpha_n$ = {alpha_dictionary[case]}",
+                           "ABAQUS time [s]", "Loading ratio [m$^{-1}$]",
+                           xlim=(0, np.amax(time)), ylim=(0.95 * loading_factor, 1.05 * loading_factor), inputs=[path])
+        add_line(spec, time[2:], loading_ratio, label="ABAQUS")
+        add_line(spec, ideal_loading_ratio_x, ideal_loading_ratio_y, "--", label="Ideal")
+        specs.append(spec)
 
         # --- Nominal shear stress ---
-        plt.figure(figsize=(8, 5), dpi=150)
-        plt.plot(angle, tau, label="ABAQUS")
-        plt.plot(paper_angle, paper_tau, "--", label="Ideal")
-        plt.title(fr"Nominal shear stress for $\alpha_n$ = {alpha_dictionary[case]}")
-        plt.ylabel("Nominal shear stress [MPa]")
-        plt.xlabel("Twist angle [deg]")
-        plt.ylim(0, 1.1 * np.amax(tau))
-        plt.xlim(0, 1.1 * np.amax(angle))
-        plt.grid()
-        plt.legend()
-
-        if function == "show":
-            plt.show()
-        elif function == "save":
-            plt.savefig(f"AlphaFigures/ShearAlpha{case}.png")
-
-    # --- Nominal shear stress ---
-    plt.figure(figsize=(8, 5), dpi=150)
-    plt.plot(extension, sigma, label="ABAQUS")
-    plt.plot(paper_extension, paper_sigma, "--", label="Ideal")
-    plt.title(fr"Nominal normal stress for $\alpha_n$ = {alpha_dictionary[case]}")
-    plt.ylabel("Nominal normal stress [MPa]")
-    plt.xlabel("Extension [-]")
-    plt.ylim(0, 1.1 * np.amax(sigma))
-    plt.xlim(0, 1.1 * np.amax(extension))
-    plt.grid()
-    plt.legend()
-
-    if function == "show":
-        plt.show()
-    elif function == "save":
-        plt.savefig(f"AlphaFigures/NormalAlpha{case}.png")
+        spec = figure_spec(f"AlphaFigures/ShearAlpha{case}.png",
+                           fr"Nominal shear stress for $\alpha_n$ = {alpha_dictionary[case]}",
+                           "Twist angle [deg]", "Nominal shear stress [MPa]",
+                           xlim=(0, 1.1 * np.amax(angle)), ylim=(0, 1.1 * np.amax(tau)), inputs=[path])
+        add_line(spec, angle, tau, label="ABAQUS")
+        add_line(spec, paper_angle, paper_tau, "--", label="Ideal")
+        specs.append(spec)
+
+    # --- Nominal normal stress ---
+    spec = figure_spec(f"AlphaFigures/NormalAlpha{case}.png",
+                       fr"Nominal normal stress for $\alpha_n$ = {alpha_dictionary[case]}",
+                       "Extension [-]", "Nominal normal stress [MPa]",
+                       xlim=(0, 1.1 * np.amax(extension)), ylim=(0, 1.1 * np.amax(sigma)), inputs=[path])
+    add_line(spec, extension, sigma, label="ABAQUS")
+    add_line(spec, paper_extension, paper_sigma, "--", label="Ideal")
+    specs.append(spec)
+
+    return specs
 
 
 def alpha_relation_plot():
+    import pandas as pd
+    plt = report_pyplot()
+
     alpha_relation_data = pd.read_csv("AlphaRelation.csv", sep=";").to_numpy().transpose()
     alpha, time, phi_radians, phi_degrees, phi_alpha = alpha_relation_data
 
@@ -342,6 +352,9 @@ def alpha_relation_plot():
 
 
 def strain_ratio_plot():
+    import pandas as pd
+    plt = report_pyplot()
+
     alpha_relation_data = pd.read_csv("StrainRatios.csv", sep=";").to_numpy().transpose()
 
     used_alphas = [0.25, 0.5, 1.0, 2.0, 3.0]
@@ -372,6 +385,10 @@ def strain_ratio_plot():
     plt.show()
 
 def alpha_10_distributions_plot():
+    import matplotlib.colors as mcolors
+    import pandas as pd
+    plt = report_pyplot()
+
     distribution_data = pd.read_csv("Alpha10Distributions.csv", sep=None).to_numpy().transpose()
     experimental_data = pd.read_csv("ExperimentalAlpha10Distributions.csv", sep=None).to_numpy().transpose()
 
@@ -437,6 +454,10 @@ def alpha_10_distributions_plot():
 
 
 def localization_comparison():
+    import pandas as pd
+    import matplotlib.colors as mcolors
+    plt = report_pyplot()
+
     localization_data = pd.read_csv("LocalizationData.csv", sep=None).to_numpy().transpose()
     alphas, paper_peeq, paper_sigma, abq_peeq, abq_sigma = localization_data
 
@@ -461,6 +482,9 @@ def localization_comparison():
 
 
 def korgesaar_non_proportionality():
+    import pandas as pd
+    plt = report_pyplot()
+
     korgesaar_data = pd.read_csv("KorgesaarPath.csv", sep=None).to_numpy().transpose()
     triax, peeq, triax2, peeq2 = korgesaar_data
 
@@ -477,6 +501,9 @@ def korgesaar_non_proportionality():
 
 
 def pe11_evolution():
+    import pandas as pd
+    plt = report_pyplot()
+
     pe11_data = pd.read_csv("PE11Evolution.csv", sep=None).to_numpy().transpose()
     time, pe11, sigma1, pe1 = pe11_data
 
@@ -525,6 +552,7 @@ def pe11_evolution():
 
 
 
-# hill_48_normal_plot()
-# hill_48_shear_plot()
-alpha_10_distributions_plot()
+if __name__ == "__main__":
+    # hill_48_normal_plot()
+    # hill_48_shear_plot()
+    alpha_10_distributions_plot()
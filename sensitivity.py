@@ -0,0 +1,181 @@
+# ----- Import libraries -----
+import numpy as np
+
+from concurrent.futures import ProcessPoolExecutor
+
+import AnalyticalTensionTorsionClean as Attc
+from hardening import PowerLaw
+
+
+# ----- Sensitivity settings -----
+# Order of the sampled parameters (columns) and of the localization criteria (outputs)
+PARAMETER_NAMES = ("hardening_n", "outer_radius", "inner_radius", "alpha")
+CRITERIA = ("considere", "swift", "hill")
+
+# Every chunk is split in batches, the spread of the batch estimates gives the confidence intervals
+N_BATCHES = 10
+CONFIDENCE_Z = 1.96
+
+# Alpha is sampled continuously, so only phi types defined for every alpha can be used
+PHI_TYPES = ("approximation", "exact")
+
+
+# ----- Function definitions -----
+def default_bounds(hardening_spread=0.2, radius_spread=0.02):
+    # Uniform ranges around the sample values, alpha spans the loading ratios of the ABAQUS runs
+    sample = Attc.TensionTorsionSample()
+
+    return np.array([[(1 - hardening_spread) * sample.hardening_n, (1 + hardening_spread) * sample.hardening_n],
+                     [(1 - radius_spread) * sample.outer_radius, (1 + radius_spread) * sample.outer_radius],
+                     [(1 - radius_spread) * sample.inner_radius, (1 + radius_spread) * sample.inner_radius],
+                     [min(sample.alphas), max(sample.alphas)]])
+
+
+def localization_model(parameters, phi_type="approximation", strain_state_type="3D"):
+    # Analytical Considere, Swift and Hill eps for every row of (hardening_n, outer_radius, inner_radius, alpha)
+    parameters = np.atleast_2d(parameters)
+    hardening_n, outer_radius, inner_radius, alpha = parameters.transpose()
+
+    # One sample holds all rows, the geometry is a column so it broadcasts with the alphas
+    sample = Attc.TensionTorsionSample()
+    sample.hardening_law = PowerLaw(sample.elastic_modulus, sample.yield_strength, hardening_n[:, np.newaxis])
+    sample.outer_radius, sample.inner_radius = outer_radius[:, np.newaxis], inner_radius[:, np.newaxis]
+    sample.eta_r = (sample.outer_radius - sample.inner_radius) / (sample.outer_radius + sample.inner_radius)
+
+    return sample.localization_strains(alpha, phi_type, strain_state_type)
+
+
+def check_phi_type(phi_type):
+    # Checked before any chunk is sent to a worker
+    if phi_type not in PHI_TYPES:
+        raise ValueError(f"Please select either the approximation or the exact phi type, {phi_type} phi is not "
+                         f"defined for every sampled alpha!")
+
+
+def scale_parameters(unit_samples, bounds):
+    return bounds[:, 0] + unit_samples * (bounds[:, 1] - bounds[:, 0])
+
+
+def map_chunks(function, arguments, max_workers):
+    # Chunks are evaluated in worker processes, or in this process for a single worker
+    if max_workers == 1:
+        return list(map(function, *arguments))
+
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(function, *arguments))
+
+
+def sobol_chunk(bounds, n_samples, seed, shift, phi_type, strain_state_type):
+    # Saltelli sampling: matrices A and B, and A with column i taken from B for every parameter i
+    # Only sums per batch travel back to the main process, shifted by the nominal output for accuracy
+    rng = np.random.default_rng(seed)
+    n_parameters = len(bounds)
+    a_matrix = scale_parameters(rng.random((n_samples, n_parameters)), bounds)
+    b_matrix = scale_parameters(rng.random((n_samples, n_parameters)), bounds)
+
+    ab_matrices = np.repeat(a_matrix[np.newaxis], n_parameters, axis=0)
+    ab_matrices[np.arange(n_parameters), :, np.arange(n_parameters)] = b_matrix.transpose()
+
+    # All N * (d + 2) evaluations in one batch
+    outputs = localization_model(np.concatenate((a_matrix, b_matrix, ab_matrices.reshape((-1, n_parameters)))),
+                                 phi_type, strain_state_type) - shift
+    f_a, f_b = outputs[:n_samples], outputs[n_samples:2 * n_samples]
+    f_ab = outputs[2 * n_samples:].reshape((n_parameters, n_samples, -1))
+
+    # Saltelli (2010) first order and Jansen total effect means per batch, as (batch, parameter, criterion)
+    starts = np.linspace(0, n_samples, min(N_BATCHES, n_samples) + 1).astype(int)
+    batch_sizes = np.diff(starts)[:, np.newaxis, np.newaxis]
+    first_order = np.add.reduceat(f_b * (f_ab - f_a), starts[:-1], axis=1).transpose((1, 0, 2)) / batch_sizes
+    total = np.add.reduceat((f_a - f_ab) ** 2, starts[:-1], axis=1).transpose((1, 0, 2)) / (2 * batch_sizes)
+
+    return {"count": 2 * n_samples, "sum": np.sum(f_a, axis=0) + np.sum(f_b, axis=0),
+            "sum_squares": np.sum(f_a ** 2, axis=0) + np.sum(f_b ** 2, axis=0),
+            "batch_sizes": np.diff(starts), "first_order": first_order, "total": total}
+
+
+def sobol_indices(bounds=None, n_samples=10 ** 5, chunk_size=10 ** 4, seed=0, max_workers=None,
+                  phi_type="approximation", strain_state_type="3D"):
+    # First order and total Sobol indices of every criterion, n_samples * (d + 2) model evaluations
+    check_phi_type(phi_type)
+    if bounds is None:
+        bounds = default_bounds()
+    shift = localization_model(bounds.mean(axis=1), phi_type, strain_state_type)[0]
+
+    # Fixed chunk sizes and one seed per chunk, so the result does not depend on the number of workers
+    chunk_sizes = [min(chunk_size, n_samples - start) for start in range(0, n_samples, chunk_size)]
+    seeds = np.random.SeedSequence(seed).spawn(len(chunk_sizes))
+    n_chunks = len(chunk_sizes)
+    chunks = map_chunks(sobol_chunk, ([bounds] * n_chunks, chunk_sizes, seeds, [shift] * n_chunks,
+                                      [phi_type] * n_chunks, [strain_state_type] * n_chunks), max_workers)
+
+    # Variance of all A and B outputs, then the batch estimates weighted by their size
+    count = sum(chunk["count"] for chunk in chunks)
+    mean = sum(chunk["sum"] for chunk in chunks) / count
+    variance = sum(chunk["sum_squares"] for chunk in chunks) / count - mean ** 2
+    weights = np.concatenate([chunk["batch_sizes"] for chunk in chunks]) / n_samples
+    n_batches = len(weights)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        first_order = np.concatenate([chunk["first_order"] for chunk in chunks]) / variance
+        total = np.concatenate([chunk["total"] for chunk in chunks]) / variance
+
+    # Spread between the batches gives the standard error and the confidence interval of the estimates
+    # Estimates outside [0, 1] are sampling noise, they are flagged instead of being read as a result
+    def estimate(values):
+        value = np.tensordot(weights, values, axes=1)
+        error = (np.tensordot(weights ** 2, (values - value) ** 2, axes=1) * n_batches
+                 / max(n_batches - 1, 1)) ** 0.5
+        interval = np.stack((value - CONFIDENCE_Z * error, value + CONFIDENCE_Z * error), axis=-1)
+        flag = (value < 0) | (value > 1)
+        return value.transpose(), error.transpose(), interval.transpose((1, 0, 2)), flag.transpose()
+
+    first_order, first_order_error, first_order_interval, first_order_flag = estimate(first_order)
+    total, total_error, total_interval, total_flag = estimate(total)
+
+    return {"parameters": PARAMETER_NAMES, "criteria": CRITERIA, "bounds": bounds,
+            "first_order": first_order, "first_order_error": first_order_error,
+            "first_order_interval": first_order_interval, "first_order_flag": first_order_flag,
+            "total": total, "total_error": total_error, "total_interval": total_interval, "total_flag": total_flag,
+            "variance": variance, "n_evaluations": n_samples * (len(bounds) + 2)}
+
+
+def morris_chunk(bounds, n_trajectories, seed, levels, phi_type, strain_state_type):
+    # One-at-a-time trajectories on a grid of the unit cube, every step moves one parameter by delta
+    rng = np.random.default_rng(seed)
+    n_parameters = len(bounds)
+    delta = levels / (2 * (levels - 1))
+
+    # Start points on the lower grid levels, so every step up stays inside the cube
+    start = rng.integers(0, levels // 2, (n_trajectories, 1, n_parameters)) / (levels - 1)
+    order = np.argsort(rng.random((n_trajectories, n_parameters)), axis=1)
+    steps = np.zeros((n_trajectories, n_parameters + 1, n_parameters))
+    steps[np.arange(n_trajectories)[:, np.newaxis], np.arange(1, n_parameters + 1), order] = delta
+    points = start + np.cumsum(steps, axis=1)
+
+    outputs = localization_model(scale_parameters(points.reshape((-1, n_parameters)), bounds), phi_type,
+                                 strain_state_type).reshape((n_trajectories, n_parameters + 1, -1))
+
+    # Elementary effect of the parameter moved in every step, put back in parameter order
+    effects = np.empty((n_trajectories, n_parameters, outputs.shape[-1]))
+    effects[np.arange(n_trajectories)[:, np.newaxis], order] = np.diff(outputs, axis=1) / delta
+
+    return effects
+
+
+def morris_screening(bounds=None, n_trajectories=1000, levels=4, chunk_size=10 ** 4, seed=0, max_workers=None,
+                     phi_type="approximation", strain_state_type="3D"):
+    # Morris mu* (mean absolute elementary effect) and sigma, in eps per unit of the scaled parameter range
+    check_phi_type(phi_type)
+    if bounds is None:
+        bounds = default_bounds()
+
+    chunk_sizes = [min(chunk_size, n_trajectories - start) for start in range(0, n_trajectories, chunk_size)]
+    seeds = np.random.SeedSequence(seed).spawn(len(chunk_sizes))
+    n_chunks = len(chunk_sizes)
+    effects = np.concatenate(map_chunks(morris_chunk, ([bounds] * n_chunks, chunk_sizes, seeds, [levels] * n_chunks,
+                                                       [phi_type] * n_chunks, [strain_state_type] * n_chunks),
+                                        max_workers))
+
+    return {"parameters": PARAMETER_NAMES, "criteria": CRITERIA, "bounds": bounds,
+            "mu_star": np.mean(np.abs(effects), axis=0).transpose(), "mu": np.mean(effects, axis=0).transpose(),
+            "sigma": np.std(effects, axis=0).transpose(), "n_evaluations": n_trajectories * (len(bounds) + 1)}
@@ -1,9 +1,10 @@
 # ----- Import libraries -----
 import numpy as np
-import pandas as pd
-import matplotlib.pyplot as plt
 
-from icecream import ic
+from functools import lru_cache
+
+
+MATERIAL_PATH = "MaterialParametersShearBandThickness.csv"
 
 
 # Function definition for cotangent
@@ -35,205 +36,191 @@ class ShearBandMaterial:
         return self.softening_modulus / 3
 
 
-# Shear band class definition
-class ShearBand:
-    def __init__(self, band_type, material: ShearBandMaterial):
-        self.band_type = band_type
-        self.material = material
+# Class definition for the theta-dependent coefficients of a shear band
+class ShearBandCoefficients:
+    def __init__(self, material: ShearBandMaterial, theta):
+        # Material constants, evaluated once
+        g = self.g = material.elastic_shear_modulus()
+        g_t = self.g_t = material.hardening_shear_modulus()
+        g_s = self.g_s = material.softening_shear_modulus()
 
-    def band_thickness_shear(self):
-        g = self.material.elastic_shear_modulus()
-        g_t = self.material.hardening_shear_modulus()
-        g_s = self.material.softening_shear_modulus()
+        sigma_y = self.sigma_y = material.yield_strength
+        sigma_u = self.sigma_u = material.ultimate_tensile_strength
 
-        sigma_y = self.material.yield_strength
-        sigma_u = self.material.ultimate_tensile_strength
+        l_cs = material.intrinsic_length
+        epsilon_u = material.strain_at_uts
 
-        l_cs = self.material.intrinsic_length
+        # Trigonometric terms shared by all coefficients
+        self.theta = theta = np.asarray(theta, dtype=float)
+        self.sin_2theta = np.sin(2 * theta)
+        self.cos_theta_2 = np.power(np.cos(theta), 2)
+        self.cos_theta_4 = np.power(np.cos(theta), 4)
+        self.sin_theta_2 = np.power(np.sin(theta), 2)
+        self.sin_2theta_2 = np.power(self.sin_2theta, 2)
+        self.cot_theta = cot(theta)
+        cos_theta_4, sin_2theta_2 = self.cos_theta_4, self.sin_2theta_2
 
-        numerator = -2 * g * g_t * sigma_u
-        denominator = (g_s * g_t * sigma_y) + (g * g_s * (sigma_u - sigma_y))
-        root = (numerator / denominator) ** 0.5
-        brackets = np.pi - np.arctan(-g_s / g)
-
-        thickness = l_cs / 2 * root * brackets
-
-        return 2 * thickness
-
-    def a_1(self, theta):
-        g = self.material.elastic_shear_modulus()
-        g_t = self.material.hardening_shear_modulus()
-
-        sigma_y = self.material.yield_strength
-        sigma_u = self.material.ultimate_tensile_strength
+        # Shared denominator term
+        bottom_left_bracket = g_t * sigma_y + g * (sigma_u - sigma_y)
+        band_bracket = (3 * (g_t - g) * g_s * sigma_y * cos_theta_4
+                        + 4 * g * g_t * sigma_u
+                        + 3 * g * sigma_u * cos_theta_4 * (g_s - g_t))
 
-        top_left_bracket = (3 * (np.power(np.cos(theta), 4) + np.power(np.sin(2 * theta), 2))
+        # a_1
+        top_left_bracket = (3 * (cos_theta_4 + sin_2theta_2)
                             * (sigma_u - sigma_y)
                             * (g - g_t))
         top_right_bracket = 4 * sigma_u * g_t
         numerator = 2 * sigma_u * g_t * g * (top_left_bracket + top_right_bracket)
 
-        bottom_left_bracket = g_t * sigma_y + g * (sigma_u - sigma_y)
-        bottom_right_bracket = (3 * np.power(np.cos(theta), 4)
+        bottom_right_bracket = (3 * cos_theta_4
                                 * (sigma_u - sigma_y)
                                 * (g - g_t)
                                 + 4 * sigma_u * g_t)
-        denominator = bottom_left_bracket * bottom_right_bracket
-
-        value = numerator / denominator
-
-        return value
-
-    def a_2(self, theta):
-        g = self.material.elastic_shear_modulus()
-        g_t = self.material.hardening_shear_modulus()
-        g_s = self.material.softening_shear_modulus()
-
-        sigma_y = self.material.yield_strength
-        sigma_u = self.material.ultimate_tensile_strength
+        self.a_1 = numerator / (bottom_left_bracket * bottom_right_bracket)
 
+        # a_2
         factor = 2 * sigma_u * g_t * g
-        top_left_bracket = 2 * sigma_y * g_s * ((g_t - g) * (np.power(np.sin(2 * theta), 2)
-                                                             + np.power(np.cos(theta), 4)))
-        top_right_bracket = g * sigma_u * (3 * (np.power(np.sin(2 * theta), 2)
-                                                + np.power(np.cos(theta), 4))
+        top_left_bracket = 2 * sigma_y * g_s * ((g_t - g) * (sin_2theta_2 + cos_theta_4))
+        top_right_bracket = g * sigma_u * (3 * (sin_2theta_2 + cos_theta_4)
                                            * (g_s - g_t)
                                            + 4 * g_t)
         numerator = factor * (top_left_bracket + top_right_bracket)
+        self.a_2 = numerator / (bottom_left_bracket * band_bracket)
 
-        bottom_left_bracket = g_t * sigma_y + g * (sigma_u - sigma_y)
-        bottom_right_bracket = (3 * (g_t - g) * g_s * sigma_y * (np.power(np.cos(theta), 4))
-                                + 4 * g * g_t * sigma_u
-                                + 3 * g * sigma_u * np.power(np.cos(theta), 4) * (g_s - g_t))
-        denominator = bottom_left_bracket * bottom_right_bracket
-
-        value = numerator / denominator
-
-        return value
-
-    def b_2(self, theta):
-        g = self.material.elastic_shear_modulus()
-        g_t = self.material.hardening_shear_modulus()
-        g_s = self.material.softening_shear_modulus()
-
-        sigma_y = self.material.yield_strength
-        sigma_u = self.material.ultimate_tensile_strength
-
+        # b_2
         factor = g_t * sigma_u
-        top_left_bracket = g * sigma_u * (-64 * g * np.sin(2 * theta)
+        top_left_bracket = g * sigma_u * (-64 * g * self.sin_2theta
                                           + (9 * np.sin(6 * theta)
-                                             + 13 * np.sin(2 * theta)
+                                             + 13 * self.sin_2theta
                                              - 12 * np.sin(4 * theta) * (g_s - g_t)))
         top_right_bracket = (-9 * g_s * np.sin(6 * theta)
-                             + (64 * g - 13 * g_s) * np.sin(2 * theta)
+                             + (64 * g - 13 * g_s) * self.sin_2theta
                              + 12 * g_s * np.sin(4 * theta)) * (g - g_t) * sigma_y
         numerator = factor * (top_left_bracket + top_right_bracket)
 
-        bottom_left_bracket = -32 * g_t * sigma_y + g * (sigma_u - sigma_y)
-        bottom_right_bracket = (3 * (g_t - g) * g_s * sigma_y * (np.power(np.cos(theta), 4))
-                                + 4 * g * g_t * sigma_u
-                                + 3 * g * sigma_u * np.power(np.cos(theta), 4) * (g_s - g_t))
-        denominator = bottom_left_bracket * bottom_right_bracket
-
-        value = numerator / denominator
-
-        return value
-
-    def a_3(self, theta):
-        g = self.material.elastic_shear_modulus()
-        g_t = self.material.hardening_shear_modulus()
+        bottom_left_bracket_b = -32 * g_t * sigma_y + g * (sigma_u - sigma_y)
+        self.b_2 = numerator / (bottom_left_bracket_b * band_bracket)
 
-        sigma_y = self.material.yield_strength
-        sigma_u = self.material.ultimate_tensile_strength
-
-        top_left_bracket = (3 * np.power(np.cos(theta), 4)
+        # a_3
+        top_left_bracket = (3 * cos_theta_4
                             * (g_t - g)
                             * (sigma_y - sigma_u)
                             + 4 * g_t * sigma_u)
-        top_right_bracket = g_t * sigma_y + g * (sigma_u - sigma_y)
-        numerator = top_left_bracket * top_right_bracket
+        numerator = top_left_bracket * bottom_left_bracket
 
         factor = g * sigma_u * g_t
-        bottom = (3 * (3 * np.power(np.cos(theta), 4) - 4 * np.power(np.cos(theta), 2))
+        bottom = (3 * (3 * cos_theta_4 - 4 * self.cos_theta_2)
                   * (g_t - g)
                   * (sigma_y - sigma_u)
                   - 4 * g_t * sigma_u)
-        denominator = factor * bottom
+        self.a_3 = -0.5 * numerator / (factor * bottom) * self.a_2
 
-        value = -0.5 * numerator / denominator * self.a_2(theta)
+        # xi and eta, nan where the root is negative
+        with np.errstate(invalid="ignore"):
+            self.xi = (3 * epsilon_u * self.a_1 / (sigma_u * l_cs ** 2)) ** 0.5
+            self.eta = (-3 * epsilon_u * self.a_2 / (sigma_u * l_cs ** 2)) ** 0.5
 
-        return value
+        # Thickness-independent part of a_value
+        left_bracket = (4 * np.tan(theta)
+                        - 9 * self.sin_2theta
+                        - 12 * self.sin_theta_2
+                        - 6 * sigma_y * self.cos_theta_2 * self.cot_theta / sigma_u
+                        - 2 * self.cot_theta) / (48 * g)
+        right_bracket = (sigma_y * self.cot_theta * self.cos_theta_2 / sigma_u
+                         - self.cos_theta_2 * self.cot_theta) / (8 * g_t)
+        self.a_bracket = left_bracket + right_bracket
 
-    def xi(self, theta):
-        sigma_u = self.material.ultimate_tensile_strength
-        epsilon_u = self.material.strain_at_uts
+    def a_value(self, thickness):
+        factor = 1 / np.e ** (-self.xi * thickness)
 
-        l_cs = self.material.intrinsic_length
+        return factor * self.a_bracket
 
-        numerator = 3 * epsilon_u * self.a_1(theta)
-        denominator = sigma_u * l_cs ** 2
+    def c_value(self, thickness):
+        numerator = (self.sin_2theta / (4 * self.g)
+                     + self.a_value(thickness) * np.e ** (-self.xi * thickness)
+                     - self.b_2 / self.a_2)
+        denominator = np.cos(self.eta * thickness)
 
-        value = (numerator / denominator) ** 0.5
+        return numerator / denominator
 
-        return value
 
-    def eta(self, theta):
-        sigma_u = self.material.ultimate_tensile_strength
+# Shear band class definition
+class ShearBand:
+    def __init__(self, band_type, material: ShearBandMaterial):
+        self.band_type = band_type
+        self.material = material
 
-        l_cs = self.material.intrinsic_length
-        epsilon_u = self.material.strain_at_uts
+        # Coefficient tables per theta grid, most recently used last
+        self.coefficient_tables = {}
+        self.maximum_tables = 16
+
+    def coefficients(self, theta):
+        theta = np.asarray(theta, dtype=float)
+        key = (theta.shape, theta.tobytes())
 
-        numerator = -3 * epsilon_u * self.a_2(theta)
-        denominator = sigma_u * l_cs ** 2
+        if key in self.coefficient_tables:
+            table = self.coefficient_tables.pop(key)
+        else:
+            table = ShearBandCoefficients(self.material, theta)
+            if len(self.coefficient_tables) >= self.maximum_tables:
+                self.coefficient_tables.pop(next(iter(self.coefficient_tables)))
 
-        value = (numerator / denominator) ** 0.5
+        self.coefficient_tables[key] = table
 
-        return value
+        return table
 
-    def a_value(self, theta, thickness):
+    def band_thickness_shear(self):
         g = self.material.elastic_shear_modulus()
         g_t = self.material.hardening_shear_modulus()
+        g_s = self.material.softening_shear_modulus()
 
         sigma_y = self.material.yield_strength
         sigma_u = self.material.ultimate_tensile_strength
 
-        factor = 1 / np.e ** (-self.xi(theta) * thickness)
+        l_cs = self.material.intrinsic_length
 
-        left_bracket = (4 * np.tan(theta)
-                        - 9 * np.sin(2 * theta)
-                        - 12 * np.power(np.sin(theta), 2)
-                        - 6 * sigma_y * np.power(np.cos(theta), 2) * cot(theta) / sigma_u
-                        - 2 * cot(theta)) / (48 * g)
-        right_bracket = (sigma_y * cot(theta) * np.power(np.cos(theta), 2) / sigma_u
-                         - np.power(np.cos(theta), 2) * cot(theta)) / (8 * g_t)
+        numerator = -2 * g * g_t * sigma_u
+        denominator = (g_s * g_t * sigma_y) + (g * g_s * (sigma_u - sigma_y))
+        root = (numerator / denominator) ** 0.5
+        brackets = np.pi - np.arctan(-g_s / g)
+
+        thickness = l_cs / 2 * root * brackets
 
-        value = factor * (left_bracket + right_bracket)
+        return 2 * thickness
 
-        return value
+    def a_1(self, theta):
+        return self.coefficients(theta).a_1
 
-    def c_value(self, theta, thickness):
-        g = self.material.elastic_shear_modulus()
+    def a_2(self, theta):
+        return self.coefficients(theta).a_2
+
+    def b_2(self, theta):
+        return self.coefficients(theta).b_2
 
-        numerator = (np.sin(2 * theta) / (4 * g)
-                     + self.a_value(theta, thickness) * np.e ** (-self.xi(theta) * thickness)
-                     - self.b_2(theta) / self.a_2(theta))
-        denominator = np.cos(self.eta(theta) * thickness)
+    def a_3(self, theta):
+        return self.coefficients(theta).a_3
 
-        value = numerator / denominator
+    def xi(self, theta):
+        return self.coefficients(theta).xi
 
-        return value
+    def eta(self, theta):
+        return self.coefficients(theta).eta
 
+    def a_value(self, theta, thickness):
+        return self.coefficients(theta).a_value(thickness)
 
-    def band_thickness_uniaxial(self):
-        theta = np.deg2rad(np.arange(91))
+    def c_value(self, theta, thickness):
+        return self.coefficients(theta).c_value(thickness)
 
-        a_1 = self.a_1(theta)
-        a_2 = self.a_2(theta)
-        a_3 = self.a_3(theta)
-        eta = self.eta(theta)
+    def band_thickness_uniaxial(self, theta=None):
+        if theta is None:
+            theta = np.deg2rad(np.arange(91))
+        table = self.coefficients(theta)
 
-        trig = np.arctan((-a_1 / a_2) ** 0.5 * a_3)
-        thickness = (np.pi + trig) / eta
+        with np.errstate(invalid="ignore"):
+            trig = np.arctan((-table.a_1 / table.a_2) ** 0.5 * table.a_3)
+        thickness = (np.pi + trig) / table.eta
 
         return thickness
 
@@ -248,59 +235,57 @@ class ShearBand:
         return value
 
     def strain_rate_12(self, theta, x2, thickness):
-        g = self.material.elastic_shear_modulus()
-
-        strain_rate_matrix = np.zeros((len(x2), len(theta)))
+        table = self.coefficients(theta)
 
-        for matrix_row, x2_value in enumerate(x2):
-            for matrix_column, theta_value in enumerate(theta):
+        # Rows are x2 values and columns theta values, the band thickness belongs to the theta of each column
+        x2 = np.asarray(x2, dtype=float)[:, np.newaxis]
+        thickness = np.asarray(thickness, dtype=float)[:len(table.theta)]
 
-                thickness_value = thickness[matrix_column]
+        # Both branches are evaluated on the full grid, the nan of the branch that is not used is discarded by the mask
+        with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+            inside = (table.sin_2theta / (4 * table.g)
+                      + table.a_value(thickness) * np.e ** (-table.xi * x2))
+            outside = (table.b_2 / table.a_2
+                       + table.c_value(thickness) * np.cos(table.eta * x2))
 
-                if x2_value < thickness_value:
-                    a = self.a_value(theta_value, thickness_value)
-                    xi = self.xi(theta_value)
-                    ic(a, xi)
-                    strain_rate_matrix[matrix_row][matrix_column] = (np.sin(2 * theta_value) / (4 * g)
-                                                                     + a * np.e ** (-xi * x2_value))
-                else:
-                    b_2 = self.b_2(theta_value)
-                    a_2 = self.a_2(theta_value)
-                    c = self.c_value(theta_value, thickness_value)
-                    eta = self.eta(theta)
-
-                    strain_rate_matrix[matrix_row][matrix_column] = (b_2 / a_2
-                                                                     + c * np.cos(eta * x2_value))
+        strain_rate_matrix = np.where(x2 < thickness, inside, outside)
 
         return strain_rate_matrix
 
-    def strain_rate_22(self, theta, x2, thickness):
-        g = self.material.elastic_shear_modulus()
-        sigma_u = self.material.ultimate_tensile_strength
+    def strain_rate_22(self, theta, x2, thickness, strain_rate_12=None):
+        table = self.coefficients(theta)
+        g = table.g
+        sigma_u = table.sigma_u
         epsilon_u = self.material.strain_at_uts
 
-        strain_rate_21 = self.strain_rate_12(theta, x2, thickness)
+        # strain_rate_12 can be passed in when it is already known
+        if strain_rate_12 is None:
+            strain_rate_12 = self.strain_rate_12(theta, x2, thickness)
+        strain_rate_21 = strain_rate_12
         ratio = (sigma_u - 3 * g * epsilon_u) / epsilon_u
 
-        strain_rate_11 = np.full((np.shape(strain_rate_21)), self.strain_rate_11(theta))
+        strain_rate_11 = self.strain_rate_11(theta)
 
-        top_left_bracket = (np.power(np.cos(theta), 2)
-                            + strain_rate_21 * ratio * np.sin(2 * theta) * np.power(np.cos(theta), 2))
+        top_left_bracket = (table.cos_theta_2
+                            + strain_rate_21 * ratio * table.sin_2theta * table.cos_theta_2)
         top_right_bracket = strain_rate_11 * (2 * sigma_u / (3 * epsilon_u)
-                                              - ratio * np.power(np.sin(2 * theta), 2))
+                                              - ratio * table.sin_2theta_2)
         numerator = top_left_bracket - top_right_bracket
 
         denominator = (4 * sigma_u / (3 * epsilon_u)
-                       - ratio * np.power(np.cos(2 * theta), 4))
+                       - ratio * np.power(np.cos(2 * table.theta), 4))
 
         value = numerator / denominator
 
         return value
 
     def overall_effective_strain(self, theta, x2, thickness):
-        term_one = self.strain_rate_12(theta, x2, thickness) * np.sin(2 * theta)
-        term_two = np.full((np.shape(term_one)), self.strain_rate_11(theta)) * np.power(np.sin(theta), 2)
-        term_three = self.strain_rate_22(theta, x2, thickness) * np.power(np.cos(theta), 2)
+        table = self.coefficients(theta)
+        strain_rate_12 = self.strain_rate_12(theta, x2, thickness)
+
+        term_one = strain_rate_12 * table.sin_2theta
+        term_two = self.strain_rate_11(theta) * table.sin_theta_2
+        term_three = self.strain_rate_22(theta, x2, thickness, strain_rate_12) * table.cos_theta_2
 
         value = term_one + term_two + term_three
 
@@ -330,24 +315,52 @@ class ShearBand:
             raise ValueError("Must be 'shear' or 'uniaxial'!")
 
 
+@lru_cache(maxsize=None)
+def material_table(path=MATERIAL_PATH):
+    # Material names and parameter columns (in ShearBandMaterial order), read once per process
+    import pandas as pd
+    materials = pd.read_csv(path).to_numpy()
+
+    return materials[:, 0], materials[:, 1:].astype(float)
+
+
 def get_material_properties(name):
-    materials = pd.read_csv(r'MaterialParametersShearBandThickness.csv').to_numpy()
-    material_names = materials[:, 0]
+    material_names, properties = material_table()
 
     requested_position = np.where(material_names == name)
-    properties = materials[requested_position][0][1:]
+    properties = properties[requested_position][0]
 
     return properties
 
 
-# s235jr_steel = ShearBandMaterial(*get_material_properties("S235JR"))
-# s235jr_band = ShearBand('shear', s235jr_steel)
-# print(s235jr_band.thickness())
-#
-# ah36_steel = ShearBandMaterial(*get_material_properties("AH36"))
-# ah36_band = ShearBand('shear', ah36_steel)
-# print(ah36_band.thickness())
+def batch_material(properties):
+    # One ShearBandMaterial for many parameter sets, every attribute is a column so results broadcast over theta
+    properties = np.atleast_2d(np.asarray(properties, dtype=float))
+
+    return ShearBandMaterial(*properties.transpose()[:, :, np.newaxis])
+
+
+def batch_band_thickness(properties=None, theta=None):
+    # Shear and uniaxial band thickness for every material (row) at once, defaults to all materials in the table
+    if properties is None:
+        properties = material_table()[1]
+
+    band = ShearBand("uniaxial", batch_material(properties))
+    shear_thickness = band.band_thickness_shear()[:, 0]
+    uniaxial_thickness = band.band_thickness_uniaxial(theta)
+
+    return shear_thickness, uniaxial_thickness
+
+
+if __name__ == "__main__":
+    # s235jr_steel = ShearBandMaterial(*get_material_properties("S235JR"))
+    # s235jr_band = ShearBand('shear', s235jr_steel)
+    # print(s235jr_band.thickness())
+    #
+    # ah36_steel = ShearBandMaterial(*get_material_properties("AH36"))
+    # ah36_band = ShearBand('shear', ah36_steel)
+    # print(ah36_band.thickness())
 
-s355_steel = ShearBandMaterial(*get_material_properties("S355"))
-s355_band = ShearBand('uniaxial', s355_steel)
-s355_band.plot_overall_effective_strain()
+    s355_steel = ShearBandMaterial(*get_material_properties("S355"))
+    s355_band = ShearBand('uniaxial', s355_steel)
+    s355_band.plot_overall_effective_strain()
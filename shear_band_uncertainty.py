@@ -0,0 +1,119 @@
+# ----- Import libraries -----
+import numpy as np
+
+from concurrent.futures import ProcessPoolExecutor
+
+from shear_band_thickness import ShearBand, batch_material, get_material_properties
+
+
+# ----- Sampling settings -----
+# Order of the ShearBandMaterial parameters, also the order of the relative scatter
+PARAMETER_NAMES = ("elastic_modulus", "hardening_modulus", "softening_modulus", "yield_strength",
+                   "ultimate_tensile_strength", "intrinsic_length", "strain_at_uts")
+
+# Logarithmic thickness bins [m], quantiles are accurate to about 0.25% of the thickness
+THICKNESS_BINS = np.logspace(-9, -2, 7001)
+
+
+# ----- Function definitions -----
+def sample_properties(nominal, relative_scatter, n_samples, rng):
+    # Normally distributed parameters around the nominal values, scatter given as a fraction of the nominal value
+    nominal = np.asarray(nominal, dtype=float)
+    scatter = np.broadcast_to(np.asarray(relative_scatter, dtype=float), nominal.shape)
+
+    return nominal + rng.standard_normal((n_samples, len(nominal))) * np.abs(nominal) * scatter
+
+
+def thickness_histogram(thickness):
+    # Counts per thickness bin along the last axis, with an underflow bin first and an overflow bin last
+    # Only nan (no valid band) is not counted, so valid bands outside the bins still count as valid
+    thickness = np.atleast_2d(thickness)
+    n_bins = len(THICKNESS_BINS) + 1
+
+    index = np.searchsorted(THICKNESS_BINS, thickness, side="right")
+    valid = ~np.isnan(thickness)
+    rows = np.broadcast_to(np.arange(len(thickness))[:, np.newaxis], index.shape)
+
+    counts = np.bincount((rows * n_bins + index)[valid], minlength=len(thickness) * n_bins)
+
+    return counts.reshape(len(thickness), n_bins)
+
+
+def thickness_chunk(nominal, relative_scatter, n_samples, seed, theta):
+    # Samples are drawn in the worker from its own seed, so only histograms travel between processes
+    rng = np.random.default_rng(seed)
+    band = ShearBand("uniaxial", batch_material(sample_properties(nominal, relative_scatter, n_samples, rng)))
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        shear_thickness = band.band_thickness_shear()[:, 0]
+        uniaxial_thickness = band.band_thickness_uniaxial(theta)
+
+    return thickness_histogram(shear_thickness)[0], thickness_histogram(uniaxial_thickness.transpose())
+
+
+def histogram_quantiles(counts, quantiles):
+    # Quantiles of binned data along the last axis, interpolated logarithmically within a bin
+    # Quantiles that fall in the underflow or overflow bin are outside the bin range and given as nan
+    counts = np.atleast_2d(counts)
+    cumulative = np.cumsum(counts, axis=-1)
+    total = cumulative[:, -1:]
+
+    results = np.full((len(counts), len(quantiles)), np.nan)
+    log_bins = np.log10(THICKNESS_BINS)
+    for (n, quantile) in enumerate(quantiles):
+        target = quantile * total
+        index = np.minimum(np.argmax(cumulative >= target, axis=-1), counts.shape[-1] - 1)
+
+        rows = np.arange(len(counts))
+        below = np.where(index > 0, cumulative[rows, index - 1], 0)
+        in_bin = counts[rows, index]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            fraction = np.clip((target[:, 0] - below) / in_bin, 0, 1)
+
+        inside = (index > 0) & (index < counts.shape[-1] - 1)
+        bin_index = np.clip(index - 1, 0, len(log_bins) - 2)
+        value = 10 ** (log_bins[bin_index] + fraction * (log_bins[bin_index + 1] - log_bins[bin_index]))
+        results[:, n] = np.where((total[:, 0] > 0) & inside, value, np.nan)
+
+    return results
+
+
+def thickness_uncertainty(material, relative_scatter=0.05, n_samples=10 ** 6, chunk_size=50000, theta=None,
+                          quantiles=(0.05, 0.5, 0.95), seed=0, max_workers=None):
+    # Material can be a name from the material table or the seven ShearBandMaterial parameters
+    if isinstance(material, str):
+        nominal = get_material_properties(material)
+    else:
+        nominal = np.asarray(material, dtype=float)
+
+    if theta is None:
+        theta = np.deg2rad(np.arange(91))
+
+    # Fixed chunk sizes and one seed per chunk, so the result does not depend on the number of workers
+    chunk_sizes = [min(chunk_size, n_samples - start) for start in range(0, n_samples, chunk_size)]
+    seeds = np.random.SeedSequence(seed).spawn(len(chunk_sizes))
+    arguments = ([nominal] * len(chunk_sizes), [relative_scatter] * len(chunk_sizes), chunk_sizes, seeds,
+                 [theta] * len(chunk_sizes))
+
+    # Memory stays bounded: every chunk is reduced to histograms before the next ones are collected
+    shear_counts = np.zeros(len(THICKNESS_BINS) + 1, dtype=np.int64)
+    uniaxial_counts = np.zeros((len(theta), len(THICKNESS_BINS) + 1), dtype=np.int64)
+
+    if max_workers == 1:
+        chunks = map(thickness_chunk, *arguments)
+        for (shear_chunk, uniaxial_chunk) in chunks:
+            shear_counts += shear_chunk
+            uniaxial_counts += uniaxial_chunk
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            for (shear_chunk, uniaxial_chunk) in executor.map(thickness_chunk, *arguments):
+                shear_counts += shear_chunk
+                uniaxial_counts += uniaxial_chunk
+
+    return {"quantiles": np.asarray(quantiles), "theta": theta, "n_samples": n_samples,
+            "shear": histogram_quantiles(shear_counts, quantiles)[0],
+            "shear_valid_fraction": shear_counts.sum() / n_samples,
+            "shear_out_of_range_fraction": (shear_counts[0] + shear_counts[-1]) / n_samples,
+            "uniaxial": histogram_quantiles(uniaxial_counts, quantiles),
+            "uniaxial_valid_fraction": uniaxial_counts.sum(axis=-1) / n_samples,
+            "uniaxial_out_of_range_fraction": (uniaxial_counts[:, 0] + uniaxial_counts[:, -1]) / n_samples}
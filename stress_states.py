@@ -1,6 +1,74 @@
 # ----- Libraries -----
 import numpy as np
-import sympy
+
+
+# ----- Invariants from principal values -----
+def principal_invariants(principal_1, principal_2, principal_3):
+    # Mean value and the second and third deviatoric invariants
+    principal_1, principal_2, principal_3 = np.broadcast_arrays(np.asarray(principal_1, dtype=float),
+                                                                np.asarray(principal_2, dtype=float),
+                                                                np.asarray(principal_3, dtype=float))
+    mean = (principal_1 + principal_2 + principal_3) / 3
+    deviatoric_1, deviatoric_2, deviatoric_3 = principal_1 - mean, principal_2 - mean, principal_3 - mean
+
+    j_2 = 0.5 * (deviatoric_1 ** 2 + deviatoric_2 ** 2 + deviatoric_3 ** 2)
+    j_3 = deviatoric_1 * deviatoric_2 * deviatoric_3
+
+    return mean, j_2, j_3, deviatoric_3
+
+
+def lode_angle(j_2, j_3):
+    # Lode angle in [0, pi/3], zero for uniaxial tension, from cos(3 theta) = 3 sqrt(3) / 2 J3 / J2^1.5
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cos_3theta = np.clip(1.5 * 3 ** 0.5 * j_3 / j_2 ** 1.5, -1, 1)
+
+    # Purely hydrostatic states have no Lode angle, zero is used
+    return np.where(j_2 > 0, np.arccos(cos_3theta) / 3, np.where(np.isnan(j_2), np.nan, 0.0))
+
+
+def stress_invariants(sigma_1, sigma_2, sigma_3):
+    # Columns of triaxiality, Lode angle and von Mises stress for principal stresses of any shape
+    mean, j_2, j_3, deviatoric_3 = principal_invariants(sigma_1, sigma_2, sigma_3)
+    von_mises = (3 * j_2) ** 0.5
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        triaxiality = mean / von_mises
+
+    return {"triaxiality": triaxiality, "lode_angle": lode_angle(j_2, j_3), "von_mises": von_mises}
+
+
+def strain_invariants(epsilon_1, epsilon_2, epsilon_3=None):
+    # Columns of triaxiality, Lode angle and equivalent strain for principal (plastic) strains
+    # Without epsilon_3 the material is taken incompressible, e.g. the in-plane strains of shells
+    if epsilon_3 is None:
+        epsilon_3 = -(np.asarray(epsilon_1, dtype=float) + np.asarray(epsilon_2, dtype=float))
+
+    mean, j_2, j_3, deviatoric_3 = principal_invariants(epsilon_1, epsilon_2, epsilon_3)
+    equivalent_strain = (4 / 3 * j_2) ** 0.5
+
+    # The von Mises flow rule makes the deviatoric stress proportional to the deviatoric strain (increment), so
+    # the Lode angle is the same and the triaxiality follows from the third direction being free of stress
+    with np.errstate(divide="ignore", invalid="ignore"):
+        triaxiality = -deviatoric_3 / (3 * j_2) ** 0.5
+
+    return {"triaxiality": triaxiality, "lode_angle": lode_angle(j_2, j_3), "equivalent_strain": equivalent_strain}
+
+
+def chunked_invariants(chunks, kind="stress"):
+    # Invariant columns of a stream of (principal_1, principal_2, principal_3) chunks, e.g. from a large export
+    if kind == "stress":
+        invariants = stress_invariants
+    elif kind == "strain":
+        invariants = strain_invariants
+    else:
+        raise ValueError("Please select 'stress' or 'strain'!")
+
+    columns = {}
+    for chunk in chunks:
+        for (name, values) in invariants(*chunk).items():
+            columns.setdefault(name, []).append(np.ravel(values))
+
+    return {name: np.concatenate(values) for (name, values) in columns.items()}
 
 # Class definition
 class StressState:
@@ -11,8 +79,9 @@ class StressState:
         return np.trace(self.stress_tensor) / -3
 
     def deviatoric_tensor(self):
+        # Hydrostatic stress is a pressure (positive in compression), so it is added back
         diagonal_hydrostatic_tensor = np.diagflat(np.full((1, 3), self.hydrostatic_stress()))
-        return self.stress_tensor - diagonal_hydrostatic_tensor
+        return self.stress_tensor + diagonal_hydrostatic_tensor
 
     def deviatoric_principal_stresses(self):
         eigenvalues, eigenvectors = np.linalg.eig(self.deviatoric_tensor())
@@ -35,9 +104,85 @@ class StressState:
         return diagonal_matrix
 
 
-test_array = np.array([[50, 5, 20],
-                       [5, 50, 10],
-                       [20, 10, 0]])
-test = StressState(test_array)
-print(test.deviatoric_tensor())
-print(test.deviatoric_principal_tensor())
+# Class definition for many stress states at once, e.g. all integration points of an ABAQUS output
+class StressStates:
+    def __init__(self, stress_tensors):
+        # Stack of symmetric (N, 3, 3) tensors
+        self.stress_tensors = np.asarray(stress_tensors, dtype=float)
+
+    @classmethod
+    def from_components(cls, s11, s22, s33, s12, s13, s23):
+        # Same component order as the ABAQUS S field output
+        s11, s22, s33, s12, s13, s23 = np.broadcast_arrays(s11, s22, s33, s12, s13, s23)
+        stress_tensors = np.stack([np.stack([s11, s12, s13], axis=-1),
+                                   np.stack([s12, s22, s23], axis=-1),
+                                   np.stack([s13, s23, s33], axis=-1)], axis=-2)
+
+        return cls(stress_tensors)
+
+    @staticmethod
+    def analysis_dtype():
+        return np.dtype([("principal", float, (3,)), ("deviatoric_principal", float, (3,)),
+                         ("hydrostatic", float), ("von_mises", float), ("triaxiality", float),
+                         ("lode_angle", float)])
+
+    def hydrostatic_stress(self):
+        return np.trace(self.stress_tensors, axis1=-2, axis2=-1) / -3
+
+    def deviatoric_tensor(self):
+        return self.stress_tensors + self.hydrostatic_stress()[..., np.newaxis, np.newaxis] * np.eye(3)
+
+    def invariants(self):
+        # Second and third invariants of the deviatoric tensor, written out for the symmetric case
+        s = self.deviatoric_tensor()
+        s11, s22, s33 = s[..., 0, 0], s[..., 1, 1], s[..., 2, 2]
+        s12, s13, s23 = s[..., 0, 1], s[..., 0, 2], s[..., 1, 2]
+
+        j_2 = 0.5 * (s11 ** 2 + s22 ** 2 + s33 ** 2) + s12 ** 2 + s13 ** 2 + s23 ** 2
+        j_3 = (s11 * s22 * s33 + 2 * s12 * s13 * s23
+               - s11 * s23 ** 2 - s22 * s13 ** 2 - s33 * s12 ** 2)
+
+        return j_2, j_3
+
+    def lode_angle(self, j_2=None, j_3=None):
+        if j_2 is None or j_3 is None:
+            j_2, j_3 = self.invariants()
+
+        return lode_angle(j_2, j_3)
+
+    def analysis(self):
+        # Principal stresses, deviatoric principal stresses, hydrostatic stress, triaxiality and Lode angle in one pass
+        results = np.empty(self.stress_tensors.shape[:-2], dtype=self.analysis_dtype())
+
+        hydrostatic = self.hydrostatic_stress()
+        j_2, j_3 = self.invariants()
+        angle = self.lode_angle(j_2, j_3)
+        von_mises = (3 * j_2) ** 0.5
+
+        # Closed-form principal deviatoric stresses, sorted from largest to smallest
+        radius = 2 * (j_2 / 3) ** 0.5
+        shifts = np.array([0, -2 * np.pi / 3, 2 * np.pi / 3])
+        deviatoric_principal = radius[..., np.newaxis] * np.cos(angle[..., np.newaxis] + shifts)
+
+        results["deviatoric_principal"] = deviatoric_principal
+        results["principal"] = deviatoric_principal - hydrostatic[..., np.newaxis]
+        results["hydrostatic"] = hydrostatic
+        results["von_mises"] = von_mises
+        with np.errstate(divide="ignore", invalid="ignore"):
+            results["triaxiality"] = -hydrostatic / von_mises
+        results["lode_angle"] = angle
+
+        return results
+
+    def principal_stresses(self):
+        # Symmetric eigenvalue solver, sorted from largest to smallest like analysis()
+        return np.linalg.eigvalsh(self.stress_tensors)[..., ::-1]
+
+
+if __name__ == "__main__":
+    test_array = np.array([[50, 5, 20],
+                           [5, 50, 10],
+                           [20, 10, 0]])
+    test = StressState(test_array)
+    print(test.deviatoric_tensor())
+    print(test.deviatoric_principal_tensor())
@@ -0,0 +1,211 @@
+# ----- Command-line entry point for the studies -----
+# Every study imports its module (and with it matplotlib/pandas) only when it is selected, e.g.
+#   python studies.py combined-experimental --action save
+#   python studies.py hill-comparison --phi-type approximation --strain-state-type 3D --backend Agg
+import argparse
+import importlib
+import os
+
+
+# ----- Study definitions -----
+def combined_experimental(arguments):
+    sample = importlib.import_module("AnalyticalTensionTorsionClean").TensionTorsionSample()
+    sample.combined_experimental_numerical_figures(action=arguments.action)
+
+def combined_analytical(arguments):
+    sample = importlib.import_module("AnalyticalTensionTorsionClean").TensionTorsionSample()
+    sample.combined_analytical_numerical_figures(arguments.phi_type, arguments.strain_state_type,
+                                                 action=arguments.action)
+
+def moment_force(arguments):
+    sample = importlib.import_module("AnalyticalTensionTorsionClean").TensionTorsionSample()
+    sample.create_figures(arguments.phi_type, arguments.strain_state_type, action=arguments.action)
+
+def localization(arguments):
+    sample = importlib.import_module("AnalyticalTensionTorsionClean").TensionTorsionSample()
+    sample.localization_figures(arguments.phi_type, arguments.strain_state_type)
+
+def hill_comparison(arguments):
+    hill = importlib.import_module("NumericalHill").NumericalHill()
+    hill.abaqus_python_comparison(arguments.phi_type, arguments.strain_state_type)
+
+def shell_convergence(arguments):
+    hill = importlib.import_module("NumericalHill").NumericalHill()
+    hill.shell_convergence(arguments.alpha)
+
+def non_proportionality(arguments):
+    hill = importlib.import_module("NumericalHill").NumericalHill()
+    hill.non_proportionality(arguments.shell_size)
+
+def plane_strain(arguments):
+    importlib.import_module("AnalyticalPS").stress_strain_curve("save_all" if arguments.action == "save" else "show")
+
+def shear_band(arguments):
+    shear_band_thickness = importlib.import_module("shear_band_thickness")
+    material = shear_band_thickness.ShearBandMaterial(*shear_band_thickness.get_material_properties(arguments.material))
+    shear_band_thickness.ShearBand(arguments.band_type, material).plot_overall_effective_strain()
+
+def bressan_williams(arguments):
+    importlib.import_module("BWShearTesting").bressan_williams_figure()
+
+def plastic_table(arguments):
+    material = importlib.import_module("PowerLaw").PowerLawMaterial(arguments.elastic_modulus, arguments.yield_strength,
+                                                                    arguments.hardening_exponent, arguments.name)
+    material.plastic_behavior()
+
+def calibrate(arguments):
+    calibration = importlib.import_module("calibration")
+    if arguments.table is not None:
+        result = calibration.calibrate_table(column=arguments.table, law=arguments.law)
+    else:
+        sample = importlib.import_module("AnalyticalTensionTorsionClean").TensionTorsionSample()
+        result = calibration.calibrate_sample(sample, arguments.law, targets=arguments.targets,
+                                              phi_type=arguments.phi_type,
+                                              strain_state_type=arguments.strain_state_type)
+
+    for (name, value) in result["parameters"].items():
+        print(f"{name} = {value:.6g}")
+    print(f"Relative RMS error {result['rms']:.3g} after {result['iterations']} iterations")
+    if not result["converged"]:
+        print(f"Not converged ({result['status']}), the parameters are the best point found")
+
+def sensitivity(arguments):
+    sensitivity_module = importlib.import_module("sensitivity")
+    if arguments.method == "sobol":
+        result = sensitivity_module.sobol_indices(n_samples=arguments.samples, max_workers=arguments.workers,
+                                                  phi_type=arguments.phi_type,
+                                                  strain_state_type=arguments.strain_state_type)
+        columns = ("first_order", "total")
+    else:
+        result = sensitivity_module.morris_screening(n_trajectories=arguments.samples, max_workers=arguments.workers,
+                                                     phi_type=arguments.phi_type,
+                                                     strain_state_type=arguments.strain_state_type)
+        columns = ("mu_star", "sigma")
+
+    print(f"{result['n_evaluations']} model evaluations")
+    for (n, criterion) in enumerate(result["criteria"]):
+        print(criterion)
+        for (m, parameter) in enumerate(result["parameters"]):
+            line = f"  {parameter:<14}"
+            for column in columns:
+                line += f"{column} = {result[column][n, m]:8.4f}"
+                # 95% confidence interval of the Sobol indices, * marks an estimate outside [0, 1] (sampling noise)
+                if f"{column}_interval" in result:
+                    lower, upper = result[f"{column}_interval"][n, m]
+                    line += f" [{lower:7.4f}, {upper:7.4f}]" + ("*" if result[f"{column}_flag"][n, m] else " ")
+                line += "  "
+            print(line.rstrip())
+
+def surrogate(arguments):
+    localization_surrogate = importlib.import_module("surrogate").LocalizationSurrogate()
+    shell_size = arguments.shell_size if arguments.criterion == "hill" else float("nan")
+    predictions = localization_surrogate.predict(arguments.criterion, arguments.alphas, shell_size)
+    uncertain = localization_surrogate.uncertain_cases(arguments.criterion, arguments.alphas, [shell_size],
+                                                       tolerance=arguments.tolerance)
+
+    for prediction in predictions:
+        run = " (run ABAQUS)" if prediction["alpha"] in uncertain["alpha"] else ""
+        print(f"alpha = {prediction['alpha']:.4g}: PEEQ = {prediction['peeq']:.4f} +- {prediction['std']:.4f}{run}")
+
+def figures(arguments):
+    figures_module = importlib.import_module("figures")
+    if arguments.dependents is not None:
+        for name in figures_module.dependent_targets(arguments.dependents, arguments.phi_type):
+            print(name)
+    else:
+        figures_module.rebuild_figures(arguments.phi_type, arguments.workers, arguments.force)
+
+def plot(arguments):
+    getattr(importlib.import_module("plotting"), arguments.figure)()
+
+
+# ----- Argument parser -----
+def parser():
+    main_parser = argparse.ArgumentParser(description="Run the tension-torsion, Hill and shear band studies.")
+    main_parser.add_argument("--backend", default=None,
+                             help="Matplotlib backend, e.g. Agg to save figures without a display")
+    subparsers = main_parser.add_subparsers(dest="study", required=True)
+
+    def study(name, function, help_text, action=False, loading=False):
+        study_parser = subparsers.add_parser(name, help=help_text)
+        study_parser.set_defaults(function=function)
+        if action:
+            study_parser.add_argument("--action", choices=("show", "save"), default="show")
+        if loading:
+            study_parser.add_argument("--phi-type", choices=("approximation", "exact"), default="approximation")
+            study_parser.add_argument("--strain-state-type", choices=("2D", "3D"), default="3D")
+
+        return study_parser
+
+    study("combined-experimental", combined_experimental, "Experimental and numerical moment/force grids",
+          action=True)
+    study("combined-analytical", combined_analytical, "Analytical and numerical moment/force grids",
+          action=True, loading=True)
+    study("moment-force", moment_force, "Analytical moment and force curves per alpha", action=True, loading=True)
+    study("localization", localization, "Localization criteria over alpha", loading=True)
+    study("hill-comparison", hill_comparison, "Shell Hill predictions against ABAQUS and axisymmetric results",
+          loading=True)
+    study("shell-convergence", shell_convergence, "Shell size convergence for one alpha").add_argument(
+        "--alpha", type=float, default=0.5)
+    study("non-proportionality", non_proportionality, "Loading paths of the shell models").add_argument(
+        "--shell-size", type=float, default=0.3)
+    study("plane-strain", plane_strain, "Plane strain tension curves", action=True)
+
+    shear_band_parser = study("shear-band", shear_band, "Effective strain across a shear band")
+    shear_band_parser.add_argument("--material", default="S355")
+    shear_band_parser.add_argument("--band-type", choices=("shear", "uniaxial"), default="uniaxial")
+
+    study("bressan-williams", bressan_williams, "Bressan-Williams and Hill forming limits")
+
+    plastic_parser = study("plastic-table", plastic_table, "Power law *PLASTIC table as .csv")
+    plastic_parser.add_argument("--elastic-modulus", type=float, default=68e9)
+    plastic_parser.add_argument("--yield-strength", type=float, default=300e6)
+    plastic_parser.add_argument("--hardening-exponent", type=float, default=0.01)
+    plastic_parser.add_argument("--name", default="baseline")
+
+    calibrate_parser = study("calibrate", calibrate, "Fit a hardening law to the ABAQUS curves or a calibration table",
+                             loading=True)
+    calibrate_parser.add_argument("--law", choices=("power_law", "swift", "voce", "swift_voce"), default="power_law")
+    calibrate_parser.add_argument("--targets", nargs="+", choices=("vm", "moment", "force"), default=["vm"])
+    calibrate_parser.add_argument("--table", default=None,
+                                  help="Column of MaterialCalibrations.csv to fit instead, e.g. VMStress")
+
+    sensitivity_parser = study("sensitivity", sensitivity, "Sensitivity of the localization strains to the parameters",
+                               loading=True)
+    sensitivity_parser.add_argument("--method", choices=("sobol", "morris"), default="sobol")
+    sensitivity_parser.add_argument("--samples", type=int, default=10 ** 5,
+                                    help="Base samples (Sobol) or trajectories (Morris)")
+    sensitivity_parser.add_argument("--workers", type=int, default=None,
+                                    help="Worker processes, one per core by default")
+
+    surrogate_parser = study("surrogate", surrogate, "Localization PEEQ from the surrogate of the ABAQUS runs")
+    surrogate_parser.add_argument("--criterion", choices=("force", "moment", "hill"), default="force")
+    surrogate_parser.add_argument("--alphas", type=float, nargs="+", default=[0.3, 0.6, 1.1, 1.75])
+    surrogate_parser.add_argument("--shell-size", type=float, default=1.0)
+    surrogate_parser.add_argument("--tolerance", type=float, default=0.05,
+                                  help="Relative standard deviation above which an ABAQUS run is advised")
+
+    figures_parser = study("figures", figures, "Render stale saved figures in parallel without a display")
+    figures_parser.add_argument("--phi-type", choices=("approximation", "exact"), default="approximation")
+    figures_parser.add_argument("--workers", type=int, default=None, help="Worker processes, one per core by default")
+    figures_parser.add_argument("--force", action="store_true", help="Redraw all figures, also the up to date ones")
+    figures_parser.add_argument("--dependents", default=None,
+                                help="List the figures redrawn after editing this file instead, e.g. hardening.py")
+
+    study("plot", plot, "Figure from plotting.py by function name").add_argument("figure")
+
+    return main_parser
+
+
+def main(argv=None):
+    arguments = parser().parse_args(argv)
+
+    # Has to be set before matplotlib is imported by the study
+    if arguments.backend is not None:
+        os.environ["MPLBACKEND"] = arguments.backend
+
+    arguments.function(arguments)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,198 @@
+# ----- Import libraries -----
+import numpy as np
+
+from localization import find_peak
+from NumericalHill import NumericalHill
+
+
+# ----- Surrogate settings -----
+# Numerical localization criteria: peak force and peak moment of the axisymmetric runs, Hill on the shell runs
+CRITERIA = ("force", "moment", "hill")
+
+# Standard deviation of the exponent of the PEEQ ~ n scaling, used when the runs hold a single material
+# Considere localizes at eps = n exactly, the numerical criteria only follow it to first order
+MATERIAL_SCALING_STD = 0.5
+
+# Correlation matrix entries per batch of the hyperparameter grid, bounds the memory of the search (32 MB)
+GRID_BATCH_ENTRIES = 2 ** 22
+
+
+# ----- Function definitions -----
+def prediction_dtype():
+    return np.dtype([("criterion", "U8"), ("alpha", float), ("shell_size", float), ("hardening_n", float),
+                     ("peeq", float), ("std", float)])
+
+
+def training_data(hill=None):
+    # Localization PEEQ of every finished ABAQUS run, as columns (alpha, shell_size, hardening_n) and targets
+    if hill is None:
+        hill = NumericalHill()
+
+    data = {}
+    for (criterion, column, sign) in (("force", "RF Mag [N]", 1.0), ("moment", "RM2 [Nm]", -1.0)):
+        inputs, peeqs = [], []
+        for alpha in hill.alphas:
+            eps = hill.dataset("stress_strain", alpha).column("EPS [-]")
+            peeqs.append(eps[find_peak(sign * hill.dataset("alpha_results", alpha).column(column))])
+            inputs.append((alpha, np.nan, hill.hardening_n))
+        data[criterion] = (np.array(inputs), np.array(peeqs))
+
+    # Shell runs that did not localize only give a lower bound, so they are left out
+    predictions = hill.hill_predictions()
+    localized = predictions[predictions["localized"]]
+    data["hill"] = (np.column_stack((localized["alpha"], localized["shell_size"],
+                                     np.full(len(localized), hill.hardening_n))), localized["peeq"])
+
+    return data
+
+
+def batch_log_likelihood(features, targets, length_scales, nuggets):
+    # Log marginal likelihood for a batch of hyperparameters, with the signal variance at its optimum
+    n_points = len(targets)
+    distances = (features[:, np.newaxis, :] - features[np.newaxis, :, :]) ** 2
+    correlations = np.exp(-np.einsum("ijd,kd->kij", distances, 1 / (2 * length_scales ** 2)))
+    correlations += nuggets[:, np.newaxis, np.newaxis] * np.eye(n_points)
+
+    sign, log_determinant = np.linalg.slogdet(correlations)
+    weights = np.linalg.solve(correlations, np.broadcast_to(targets[:, np.newaxis], (len(nuggets), n_points, 1)))
+    variance = np.einsum("i,ki->k", targets, weights[..., 0]) / n_points
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        log_likelihood = -n_points / 2 * np.log(variance) - log_determinant / 2
+
+    return np.where((sign > 0) & (variance > 0), log_likelihood, -np.inf)
+
+
+# ----- Gaussian process regression -----
+# Squared exponential kernel with one length scale per feature, the targets are centred on their mean
+class GaussianProcess:
+    def __init__(self, features, targets, length_scales, nugget):
+        self.features = np.asarray(features, dtype=float)
+        self.mean = np.mean(targets)
+        self.length_scales = np.asarray(length_scales, dtype=float)
+        self.nugget = nugget
+
+        # Cholesky factor of the correlation matrix, the nugget absorbs the increment size of the runs
+        cholesky = np.linalg.cholesky(self.correlation(self.features) + nugget * np.eye(len(self.features)))
+        inverse_cholesky = np.linalg.solve(cholesky, np.eye(len(self.features)))
+        self.inverse = inverse_cholesky.transpose() @ inverse_cholesky
+        self.weights = self.inverse @ (np.asarray(targets, dtype=float) - self.mean)
+        self.variance = (np.asarray(targets, dtype=float) - self.mean) @ self.weights / len(self.features)
+
+    # Hyperparameters maximizing the marginal likelihood, a log grid pass and a finer grid around its best point
+    @classmethod
+    def from_data(cls, features, targets, n_grid=15, refinements=2):
+        features = np.atleast_2d(np.asarray(features, dtype=float))
+        targets = np.asarray(targets, dtype=float)
+        centred = targets - np.mean(targets)
+
+        ranges = np.maximum(np.ptp(features, axis=0), 1e-3)
+        lower = np.concatenate((np.log(ranges / 20), [np.log(1e-8)]))
+        upper = np.concatenate((np.log(ranges * 10), [np.log(1e-1)]))
+
+        for _ in range(refinements + 1):
+            axes = [np.linspace(low, high, n_grid) for (low, high) in zip(lower, upper)]
+            grid = np.exp(np.stack(np.meshgrid(*axes, indexing="ij"), axis=-1).reshape((-1, len(axes))))
+
+            # The grid grows as n_grid ** (features + 1), so it is evaluated in batches of correlation matrices
+            batch_size = max(1, GRID_BATCH_ENTRIES // len(targets) ** 2)
+            log_likelihood = np.concatenate([batch_log_likelihood(features, centred, batch[:, :-1], batch[:, -1])
+                                             for batch in np.split(grid, np.arange(batch_size, len(grid), batch_size))])
+
+            best = np.log(grid[np.argmax(log_likelihood)])
+            spacing = (upper - lower) / (n_grid - 1)
+            lower, upper = best - spacing, best + spacing
+
+        best = np.exp(best)
+
+        return cls(features, targets, best[:-1], best[-1])
+
+    def correlation(self, features, other=None):
+        if other is None:
+            other = features
+        distances = (features[:, np.newaxis, :] - other[np.newaxis, :, :]) / self.length_scales
+
+        return np.exp(-np.sum(distances ** 2, axis=-1) / 2)
+
+    def predict(self, features, scatter=True):
+        # Mean and standard deviation, with the run to run scatter (nugget) of a new run or of the latent function only
+        correlation = self.correlation(np.atleast_2d(features), self.features)
+        mean = self.mean + correlation @ self.weights
+        variance = self.variance * (1 + scatter * self.nugget
+                                    - np.sum((correlation @ self.inverse) * correlation, axis=1))
+
+        return mean, np.sqrt(np.maximum(variance, 0))
+
+
+# ----- Surrogate of the numerical localization strains -----
+# One Gaussian process per criterion for log(PEEQ / n) on log(alpha), log(shell size) for the shell runs, and log(n)
+# once the training runs use more than one material. For a single material, other hardening exponents are a first
+# order (Considere-like) scaling of the PEEQ, with an uncertainty that grows with |log(n / n_train)|.
+class LocalizationSurrogate:
+    def __init__(self, data=None):
+        if data is None:
+            data = training_data()
+
+        self.data = data
+        self.material_feature = {}
+        self.processes = {}
+        for (criterion, (inputs, peeqs)) in data.items():
+            self.material_feature[criterion] = len(np.unique(inputs[:, 2])) > 1
+            self.processes[criterion] = GaussianProcess.from_data(self.features(criterion, inputs),
+                                                                  np.log(peeqs / inputs[:, 2]))
+
+    def features(self, criterion, inputs):
+        columns = [np.log(inputs[:, 0])]
+        if criterion == "hill":
+            columns.append(np.log(inputs[:, 1]))
+        if self.material_feature[criterion]:
+            columns.append(np.log(inputs[:, 2]))
+
+        return np.column_stack(columns)
+
+    def predict(self, criterion, alpha, shell_size=np.nan, hardening_n=None, scatter=True):
+        # Localization PEEQ and its standard deviation, arguments broadcast against each other
+        if criterion not in self.processes:
+            raise ValueError("Please select either force, moment or hill as criterion!")
+        if hardening_n is None:
+            hardening_n = self.data[criterion][0][0, 2]
+
+        alpha, shell_size, hardening_n = np.broadcast_arrays(*(np.asarray(values, dtype=float)
+                                                               for values in (alpha, shell_size, hardening_n)))
+
+        # The features are logarithms, so missing or non-positive inputs would silently give nan
+        if criterion == "hill" and not np.all(shell_size > 0):
+            raise ValueError("Please give a positive shell size for the hill criterion!")
+        if not np.all(alpha > 0) or not np.all(hardening_n > 0):
+            raise ValueError("Please give positive values of alpha and the hardening exponent!")
+        inputs = np.column_stack((alpha.ravel(), shell_size.ravel(), hardening_n.ravel()))
+        log_mean, log_std = self.processes[criterion].predict(self.features(criterion, inputs), scatter)
+
+        # The scaling exponent is not known from a single material, so extrapolating in n adds uncertainty
+        if not self.material_feature[criterion]:
+            scaling_std = MATERIAL_SCALING_STD * np.abs(np.log(inputs[:, 2] / self.data[criterion][0][0, 2]))
+            log_std = np.sqrt(log_std ** 2 + scaling_std ** 2)
+
+        results = np.empty(len(inputs), dtype=prediction_dtype())
+        results["criterion"] = criterion
+        results["alpha"], results["shell_size"], results["hardening_n"] = inputs.transpose()
+        results["peeq"] = inputs[:, 2] * np.exp(log_mean)
+        results["std"] = results["peeq"] * log_std
+
+        return results.reshape(alpha.shape)
+
+    def uncertain_cases(self, criterion, alphas, shell_sizes=(np.nan,), hardening_n=None, tolerance=0.05):
+        # Candidate runs where the standard deviation exceeds the tolerance relative to the PEEQ, most uncertain first
+        # Only the uncertainty of the surrogate counts, the scatter between runs does not go down with another run
+        predictions = self.predict(criterion, np.asarray(alphas, dtype=float)[:, np.newaxis],
+                                   np.asarray(shell_sizes, dtype=float)[np.newaxis, :], hardening_n, False).ravel()
+        relative_std = predictions["std"] / predictions["peeq"]
+        order = np.argsort(-relative_std)
+
+        return predictions[order][relative_std[order] > tolerance]
+
+
+if __name__ == "__main__":
+    surrogate = LocalizationSurrogate()
+    print(surrogate.predict("hill", [0.3, 0.6, 2.2], 1.0))
+    print(surrogate.uncertain_cases("hill", np.linspace(0.25, 3, 12), [0.1, 0.3, 1.0, 3.0, 5.0]))